@@ -0,0 +1,123 @@
+"""Concurrent REST throughput with and without the SQLite connection pool.
+
+Each mode runs in a fresh subprocess against a fresh database so the
+journal mode of one run cannot leak into the other:
+
+    python -m benchmarks.bench_db --threads 8 --seconds 5
+"""
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import app_env, run_json, write_results
+
+
+def _seed(images: int, profiles: int) -> list[str]:
+    from datetime import datetime
+    import ulid
+    from hdmi_control.db import db_conn
+
+    now = datetime.utcnow().isoformat() + "Z"
+    profile_ids = [str(ulid.new()) for _ in range(profiles)]
+    with db_conn() as conn:
+        conn.executemany(
+            "INSERT INTO images (id, original_name, storage_path, mime_type, width, height, size_bytes, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(str(ulid.new()), f"img{i}.png", "/nonexistent", "image/png", 1920, 1080, 1024, now) for i in range(images)],
+        )
+        conn.executemany(
+            "INSERT INTO profiles (id, name, data_json, is_default, created_at, updated_at) VALUES (?, ?, ?, 0, ?, ?)",
+            [(pid, f"profile{i}", json.dumps({"ddc": {}, "render": {}}), now, now) for i, pid in enumerate(profile_ids)],
+        )
+        conn.commit()
+    return profile_ids
+
+
+def _worker_mode(args) -> None:
+    from hdmi_control.app import create_app
+
+    app = create_app()
+    profile_ids = _seed(args.images, args.profiles)
+    deadline = time.perf_counter() + args.seconds
+    counts = [0] * args.threads
+    errors = [0] * args.threads
+
+    def drive(slot: int) -> None:
+        client = app.test_client()
+        i = 0
+        while time.perf_counter() < deadline:
+            i += 1
+            if i % 10 == 0:
+                pid = profile_ids[(slot + i) % len(profile_ids)]
+                resp = client.patch(f"/api/profiles/{pid}", json={"name": f"p{slot}-{i}"})
+            elif i % 3 == 0:
+                resp = client.get("/api/profiles")
+            elif i % 3 == 1:
+                resp = client.get("/api/images")
+            else:
+                resp = client.get("/api/images/missing/file")
+            if resp.status_code >= 500:
+                errors[slot] += 1
+            counts[slot] += 1
+
+    threads = [threading.Thread(target=drive, args=(n,)) for n in range(args.threads)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "requests": sum(counts),
+        "errors": sum(errors),
+        "seconds": round(elapsed, 3),
+        "rps": round(sum(counts) / elapsed, 1),
+    }))
+
+
+def _run_mode(pooled: bool, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = app_env(tmp, DB_POOL="1" if pooled else "0")
+        cmd = [sys.executable, "-m", "benchmarks.bench_db", "--worker",
+               "--threads", str(args.threads), "--seconds", str(args.seconds),
+               "--images", str(args.images), "--profiles", str(args.profiles)]
+        return run_json(cmd, env)
+
+
+def run(args) -> dict:
+    before = _run_mode(False, args)
+    after = _run_mode(True, args)
+    print(f"per-call connections: {before['rps']:>8} req/s  ({before['errors']} errors)", file=sys.stderr)
+    print(f"pooled + WAL:         {after['rps']:>8} req/s  ({after['errors']} errors)", file=sys.stderr)
+    return {
+        "threads": args.threads,
+        "before": before,
+        "after": after,
+        "speedup": round(after["rps"] / before["rps"], 2) if before["rps"] else None,
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--profiles", type=int, default=20)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        _worker_mode(args)
+        return
+    write_results(args.out, "db", run(args), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Headless renderer throughput over a generated image corpus.
+
+Runs the renderer's decode, apply_color and apply_transform stages on
+synthetic JPEGs at several resolutions without pygame or a display:
+
+    python -m benchmarks.bench_renderer --sizes 640x480,1920x1080,3840x2160 --repeat 5
+"""
+import argparse
+import io
+import sys
+import time
+
+from PIL import Image
+
+from benchmarks.common import summarize, write_results
+from renderer.main import apply_color, apply_transform
+
+COLOR_CASES = {
+    "identity": {},
+    "brightness_contrast": {"brightness": 0.1, "contrast": 1.2},
+    "gamma": {"gamma": 1.4},
+    "temperature_tint": {"temperature": 2.0, "tint": -1.0},
+    "all": {"brightness": 0.1, "contrast": 1.2, "saturation": 1.3, "gamma": 1.4, "temperature": 2.0, "tint": -1.0},
+}
+
+TRANSFORM_CASES = {
+    "fit": {"mode": "fit"},
+    "fill": {"mode": "fill"},
+    "stretch": {"mode": "stretch"},
+    "custom_1.5x": {"mode": "custom", "scale": 1.5},
+    "crop_center": {"mode": "fit", "crop": {"x": 0.25, "y": 0.25, "w": 0.5, "h": 0.5}},
+    "rotate_90": {"mode": "fit", "rotationDeg": 90},
+    "rotate_15": {"mode": "fit", "rotationDeg": 15},
+    "flip_hv": {"mode": "fit", "flipH": True, "flipV": True},
+}
+
+
+def parse_size(text: str) -> tuple[int, int]:
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+def make_image(size: tuple[int, int]) -> bytes:
+    """Gradient plus noise, so JPEG sizes and decode costs resemble photos."""
+    r = Image.linear_gradient("L").resize(size)
+    g = Image.linear_gradient("L").rotate(90).resize(size)
+    b = Image.effect_noise(size, 64)
+    image = Image.merge("RGB", (r, g, b))
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def time_ms(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def run(args) -> dict:
+    screen = parse_size(args.screen)
+    results = {"screen": args.screen, "sizes": {}}
+    for size_text in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+        data = make_image(parse_size(size_text))
+        decoded = Image.open(io.BytesIO(data)).convert("RGB")
+        entry = {
+            "jpeg_bytes": len(data),
+            "decode": summarize(time_ms(lambda: Image.open(io.BytesIO(data)).convert("RGB"), args.repeat)),
+            "color": {},
+            "transform": {},
+        }
+        for name, color in COLOR_CASES.items():
+            entry["color"][name] = summarize(time_ms(lambda: apply_color(decoded, color), args.repeat))
+        for name, transform in TRANSFORM_CASES.items():
+            entry["transform"][name] = summarize(
+                time_ms(lambda: apply_transform(decoded, transform, screen, args.interpolation), args.repeat))
+
+        def frame():
+            image = Image.open(io.BytesIO(data)).convert("RGB")
+            image = apply_color(image, COLOR_CASES["all"])
+            apply_transform(image, TRANSFORM_CASES["fit"], screen, args.interpolation).tobytes()
+        entry["full_frame"] = summarize(time_ms(frame, args.repeat))
+        results["sizes"][size_text] = entry
+        print(f"{size_text:>10}: decode {entry['decode']['p50_ms']:.1f} ms  "
+              f"full frame {entry['full_frame']['p50_ms']:.1f} ms", file=sys.stderr)
+    return results
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--sizes", default="640x480,1920x1080,3840x2160")
+    parser.add_argument("--screen", default="1920x1080")
+    parser.add_argument("--interpolation", default="linear", choices=("nearest", "linear", "cubic"))
+    parser.add_argument("--repeat", type=int, default=5)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+    write_results(args.out, "renderer", run(args), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""End-to-end scenarios against the fake ddcutil.
+
+Each scenario runs in its own process with a fresh data directory:
+
+    ddc_drag           slider-drag storm through DdcController
+    profile_apply      POST /api/profiles/<id>/apply until DDC values settle
+    bulk_upload        concurrent uploads until derivatives are done
+    broadcast_fanout   snapshot publishes delivered to many clients
+
+    python -m benchmarks.bench_scenarios --scenarios ddc_drag,broadcast_fanout --seconds 5
+"""
+import argparse
+import io
+import json
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import app_env, run_json, summarize, write_results
+
+SCENARIOS = ("ddc_drag", "profile_apply", "bulk_upload", "broadcast_fanout")
+
+
+def _wait_for(predicate, timeout: float) -> bool:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def _ddc_drag(args) -> dict:
+    from hdmi_control.ddc.controller import DdcController
+    from hdmi_control.metrics import DDC_COALESCED
+    from hdmi_control.state import DdcState
+
+    state = DdcState()
+    lock = threading.Lock()
+    controller = DdcController(state, lambda: None, lock)
+    controller.rescan()
+    writes: list[float] = []
+    send = controller.ddcutil.set_vcp
+
+    def timed_set_vcp(code, value, target_args):
+        start = time.perf_counter()
+        try:
+            return send(code, value, target_args)
+        finally:
+            writes.append((time.perf_counter() - start) * 1000.0)
+
+    controller.ddcutil.set_vcp = timed_set_vcp
+    controller.start()
+    interval = 1.0 / args.rate
+    deadline = time.perf_counter() + args.seconds
+    sent = 0
+    value = 0
+    while time.perf_counter() < deadline:
+        value = (value + 7) % 101
+        controller.set_brightness(value)
+        sent += 1
+        time.sleep(interval)
+    stopped = time.perf_counter()
+
+    def settled():
+        with lock:
+            return state.values["brightness"]["cur"] == value
+    ok = _wait_for(settled, 10.0)
+    settle_ms = (time.perf_counter() - stopped) * 1000.0
+    controller.stop()
+    return {
+        "events_sent": sent,
+        "writes": len(writes),
+        "coalesced": int(DDC_COALESCED.value(code="10")),
+        "settled": ok,
+        "settle_ms": round(settle_ms, 1),
+        "write_latency": summarize(writes),
+    }
+
+
+def _profile_apply(args) -> dict:
+    from datetime import datetime
+    import ulid
+    from hdmi_control.app import create_app, state, state_lock
+    from hdmi_control.db import db_conn
+
+    app = create_app()
+    now = datetime.utcnow().isoformat() + "Z"
+    profiles = []
+    for i in range(args.profiles):
+        data = {
+            "ddc": {"brightness": (i * 17) % 101, "contrast": (i * 29) % 101},
+            "render": {"color": {"brightness": i / 100.0}, "transform": {"mode": "fit"}},
+        }
+        profiles.append((str(ulid.new()), data))
+    with db_conn() as conn:
+        conn.executemany(
+            "INSERT INTO profiles (id, name, data_json, is_default, created_at, updated_at) VALUES (?, ?, ?, 0, ?, ?)",
+            [(pid, f"bench{i}", json.dumps(data), now, now) for i, (pid, data) in enumerate(profiles)],
+        )
+        conn.commit()
+
+    client = app.test_client()
+    latencies: list[float] = []
+    settles: list[float] = []
+    for n in range(args.applies):
+        pid, data = profiles[n % len(profiles)]
+        start = time.perf_counter()
+        resp = client.post(f"/api/profiles/{pid}/apply")
+        latencies.append((time.perf_counter() - start) * 1000.0)
+        if resp.status_code != 200:
+            raise RuntimeError(f"apply failed: {resp.status_code}")
+        target = data["ddc"]
+
+        def settled():
+            with state_lock:
+                values = state.ddc.values
+                return values["brightness"]["cur"] == target["brightness"] and values["contrast"]["cur"] == target["contrast"]
+        if _wait_for(settled, 10.0):
+            settles.append((time.perf_counter() - start) * 1000.0)
+    return {
+        "applies": args.applies,
+        "request": summarize(latencies),
+        "ddc_settle": summarize(settles),
+        "unsettled": args.applies - len(settles),
+    }
+
+
+def _bulk_upload(args) -> dict:
+    from PIL import Image
+    from hdmi_control.app import create_app, image_processor
+
+    app = create_app()
+    w, h = (int(v) for v in args.upload_size.lower().split("x"))
+    payloads = []
+    for _ in range(args.uploads):
+        buf = io.BytesIO()
+        Image.effect_noise((w, h), 48).convert("RGB").save(buf, format="JPEG", quality=90)
+        payloads.append(buf.getvalue())
+
+    latencies: list[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    queue = list(enumerate(payloads))
+
+    def drive():
+        client = app.test_client()
+        while True:
+            with lock:
+                if not queue:
+                    return
+                n, data = queue.pop()
+            start = time.perf_counter()
+            resp = client.post("/api/images", data={"file": (io.BytesIO(data), f"bench{n}.jpg")},
+                               content_type="multipart/form-data")
+            elapsed = (time.perf_counter() - start) * 1000.0
+            with lock:
+                latencies.append(elapsed)
+                if resp.status_code != 200:
+                    errors[0] += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=drive) for _ in range(args.upload_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    accepted = time.perf_counter() - start
+    _wait_for(lambda: image_processor.pending() == 0, 300.0)
+    processed = time.perf_counter() - start
+    return {
+        "uploads": args.uploads,
+        "size": args.upload_size,
+        "threads": args.upload_threads,
+        "errors": errors[0],
+        "request": summarize(latencies),
+        "accepted_seconds": round(accepted, 3),
+        "processed_seconds": round(processed, 3),
+        "uploads_per_second": round(args.uploads / processed, 2) if processed else None,
+    }
+
+
+def _broadcast_fanout(args) -> dict:
+    from hdmi_control.broadcast import BroadcastScheduler
+    from hdmi_control.state import SystemState
+
+    state = SystemState()
+    lock = threading.Lock()
+    published: dict[int, float] = {}
+    latencies: list[float] = []
+    counts = {"deliveries": 0, "builds": 0, "bytes": 0}
+
+    def emit(event, payload, sid):
+        # Socket.IO serializes once per recipient; do the same so the cost
+        # of fan-out is included.
+        encoded = json.dumps(payload)
+        now = time.perf_counter()
+        with lock:
+            counts["deliveries"] += 1
+            counts["bytes"] += len(encoded)
+            sent_at = published.get(payload["state"]["meta"]["version"])
+            if sent_at is not None:
+                latencies.append((now - sent_at) * 1000.0)
+
+    def build():
+        with lock:
+            counts["builds"] += 1
+            return {"state": state.to_dict()}
+
+    scheduler = BroadcastScheduler(emit)
+    for n in range(args.clients):
+        scheduler.add_client(f"client{n}")
+    scheduler.start()
+    interval = 1.0 / args.rate
+    deadline = time.perf_counter() + args.seconds
+    publishes = 0
+    while time.perf_counter() < deadline:
+        with lock:
+            state.render.color["brightness"] = (publishes % 100) / 100.0
+            state.bump()
+            published[state.meta["version"]] = time.perf_counter()
+        scheduler.publish("state.snapshot", build)
+        publishes += 1
+        time.sleep(interval)
+    time.sleep(0.5)
+    scheduler.stop()
+    return {
+        "clients": args.clients,
+        "publishes": publishes,
+        "builds": counts["builds"],
+        "deliveries": counts["deliveries"],
+        "deliveries_per_second": round(counts["deliveries"] / args.seconds, 1),
+        "bytes": counts["bytes"],
+        "latency": summarize(latencies),
+    }
+
+
+WORKERS = {
+    "ddc_drag": _ddc_drag,
+    "profile_apply": _profile_apply,
+    "bulk_upload": _bulk_upload,
+    "broadcast_fanout": _broadcast_fanout,
+}
+
+
+def run_scenario(name: str, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = app_env(tmp, FAKE_DDC_LATENCY_MS=args.ddc_latency_ms, FAKE_DDC_ERROR_RATE=args.ddc_error_rate)
+        cmd = [sys.executable, "-m", "benchmarks.bench_scenarios", "--worker", name]
+        for key, value in vars(args).items():
+            if key in ("worker", "out", "scenarios") or value is None:
+                continue
+            cmd += [f"--{key.replace('_', '-')}", str(value)]
+        return run_json(cmd, env)
+
+
+def run(args) -> dict:
+    results = {}
+    for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+        if name not in WORKERS:
+            raise SystemExit(f"unknown scenario: {name}")
+        results[name] = run_scenario(name, args)
+        print(f"{name:>17}: done", file=sys.stderr)
+    return results
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rate", type=float, default=60.0, help="events per second for drag and fan-out")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--profiles", type=int, default=5)
+    parser.add_argument("--applies", type=int, default=20)
+    parser.add_argument("--uploads", type=int, default=40)
+    parser.add_argument("--upload-size", default="1920x1080")
+    parser.add_argument("--upload-threads", type=int, default=4)
+    parser.add_argument("--ddc-latency-ms", type=float, default=40.0)
+    parser.add_argument("--ddc-error-rate", type=float, default=0.0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--worker", choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(WORKERS[args.worker](args)))
+        return
+    write_results(args.out, "scenarios", run(args), args)
+
+
+if __name__ == "__main__":
+    main()
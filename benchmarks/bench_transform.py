@@ -0,0 +1,103 @@
+"""Single-pass affine transform vs the old step-by-step pipeline.
+
+Each method runs in its own process so peak RSS is comparable:
+
+    python -m benchmarks.bench_transform --source 3840x2160 --screen 1920x1080
+"""
+import argparse
+import json
+import resource
+import sys
+import time
+
+from benchmarks.bench_renderer import make_image, parse_size
+from benchmarks.common import run_json, summarize, write_results
+
+CASES = {
+    "fit": {"mode": "fit"},
+    "fill_crop": {"mode": "fill", "crop": {"x": 0.1, "y": 0.1, "w": 0.6, "h": 0.7}},
+    "rotate_90_flip": {"mode": "fit", "rotationDeg": 90, "flipH": True},
+    "rotate_180_flip_hv": {"mode": "fit", "rotationDeg": 180, "flipH": True, "flipV": True},
+    "rotate_15": {"mode": "fit", "rotationDeg": 15},
+    "rotate_30_crop_flip": {"mode": "fill", "rotationDeg": 30, "flipV": True, "crop": {"x": 0.2, "y": 0.2, "w": 0.5, "h": 0.5}},
+}
+
+METHODS = ("stepwise", "single")
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def _worker(args) -> dict:
+    import io
+    from PIL import Image
+    from renderer.main import apply_transform, apply_transform_stepwise
+
+    screen = parse_size(args.screen)
+    image = Image.open(io.BytesIO(make_image(parse_size(args.source)))).convert("RGB")
+    transform = CASES[args.case]
+
+    def stepwise():
+        out = apply_transform_stepwise(image, transform, screen, args.interpolation)
+        frame = Image.new("RGB", screen)
+        frame.paste(out, ((screen[0] - out.width) // 2, (screen[1] - out.height) // 2))
+        return frame
+
+    def single():
+        return apply_transform(image, transform, screen, args.interpolation)
+
+    fn = stepwise if args.worker == "stepwise" else single
+    baseline = _peak_rss_mb()
+    samples = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    result = summarize(samples)
+    result["peak_rss_delta_mb"] = round(_peak_rss_mb() - baseline, 1)
+    return result
+
+
+def run(args) -> dict:
+    results = {"source": args.source, "screen": args.screen, "cases": {}}
+    for case in CASES:
+        entry = {}
+        for method in METHODS:
+            cmd = [sys.executable, "-m", "benchmarks.bench_transform", "--worker", method, "--case", case,
+                   "--source", args.source, "--screen", args.screen, "--repeat", str(args.repeat),
+                   "--interpolation", args.interpolation]
+            entry[method] = run_json(cmd, None)
+        before, after = entry["stepwise"], entry["single"]
+        entry["speedup"] = round(before["p50_ms"] / after["p50_ms"], 2) if after["p50_ms"] else None
+        entry["rss_saved_mb"] = round(before["peak_rss_delta_mb"] - after["peak_rss_delta_mb"], 1)
+        results["cases"][case] = entry
+        print(f"{case:>20}: {before['p50_ms']:8.1f} ms -> {after['p50_ms']:7.1f} ms  "
+              f"peak +{before['peak_rss_delta_mb']:.0f} MB -> +{after['peak_rss_delta_mb']:.0f} MB", file=sys.stderr)
+    return results
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--source", default="3840x2160")
+    parser.add_argument("--screen", default="1920x1080")
+    parser.add_argument("--interpolation", default="linear", choices=("nearest", "linear", "cubic"))
+    parser.add_argument("--repeat", type=int, default=5)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--worker", choices=METHODS, help=argparse.SUPPRESS)
+    parser.add_argument("--case", choices=tuple(CASES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(_worker(args)))
+        return
+    write_results(args.out, "transform", run(args), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Transition step cost and achievable FPS per screen resolution.
+
+Times one transition step (blend into the preallocated output buffer) for
+each kind, next to a per-frame `Image.blend` crossfade for reference, and
+records how much memory a step allocates as seen by tracemalloc (NumPy
+and Python objects; Pillow's image buffers are not traced):
+
+    python -m benchmarks.bench_transitions --sizes 1280x720,1920x1080,3840x2160 --steps 60
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+from PIL import Image
+
+from benchmarks.bench_renderer import parse_size
+from benchmarks.common import summarize, write_results
+from renderer import transitions
+
+KINDS = ("crossfade", "slide", "wipe")
+
+
+def _frames(size: tuple[int, int]) -> tuple[Image.Image, Image.Image]:
+    before = Image.merge("RGB", [Image.linear_gradient("L").resize(size)] * 3)
+    after = Image.effect_noise(size, 64).convert("RGB")
+    return before, after
+
+
+def _entry(samples: list[float]) -> dict:
+    result = summarize(samples)
+    result["fps"] = round(1000.0 / result["p50_ms"], 1) if result["p50_ms"] else None
+    return result
+
+
+def _step_allocations(step, steps: int) -> int:
+    # Largest traced allocation peak for a single step, after one warm-up.
+    step(0)
+    tracemalloc.start()
+    peak = 0
+    for n in range(1, steps):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        step(n)
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return peak
+
+
+def run(args) -> dict:
+    if not transitions.available():
+        raise SystemExit("numpy is required for transitions")
+    results = {"steps": args.steps, "sizes": {}}
+    for size_text in [s.strip() for s in args.sizes.split(",") if s.strip()]:
+        size = parse_size(size_text)
+        before, after = _frames(size)
+        buffers = transitions.TransitionBuffers(size)
+        entry = {}
+        for kind in KINDS:
+            transition = transitions.Transition(buffers, kind, before.tobytes(), after.tobytes(), 1.0, started=0.0)
+
+            def step(n, transition=transition):
+                transition.frame(n / args.steps)
+
+            samples = []
+            for n in range(args.steps):
+                start = time.perf_counter()
+                step(n)
+                samples.append((time.perf_counter() - start) * 1000.0)
+            entry[kind] = _entry(samples)
+            entry[kind]["alloc_bytes_per_step"] = _step_allocations(step, min(args.steps, 10))
+
+        def pil_blend(n):
+            Image.blend(before, after, n / args.steps)
+
+        samples = []
+        for n in range(args.steps):
+            start = time.perf_counter()
+            pil_blend(n)
+            samples.append((time.perf_counter() - start) * 1000.0)
+        entry["pil_blend"] = _entry(samples)
+        entry["pil_blend"]["alloc_bytes_per_step"] = _step_allocations(pil_blend, min(args.steps, 10))
+        results["sizes"][size_text] = entry
+        print(f"{size_text:>10}: " + "  ".join(f"{k} {v['fps']} fps" for k, v in entry.items()), file=sys.stderr)
+    return results
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--sizes", default="1280x720,1920x1080,3840x2160")
+    parser.add_argument("--steps", type=int, default=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+    write_results(args.out, "transitions", run(args), args)
+
+
+if __name__ == "__main__":
+    main()
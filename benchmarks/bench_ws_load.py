@@ -0,0 +1,120 @@
+"""Socket.IO latency under N concurrent clients dragging sliders.
+
+Starts the web app in a subprocess for each server mode, connects N
+clients that each send render.patch (and every few ticks ddc.set) at the
+drag rate, and measures the time from a client's patch to the first
+snapshot that reflects it:
+
+    python -m benchmarks.bench_ws_load --clients 20 --seconds 10 --modes threading,gevent
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import ROOT, app_env, free_port, percentile, wait_healthy, write_results
+
+
+class DragClient:
+    def __init__(self, url: str, client_id: int, rate_hz: float):
+        import socketio
+
+        self.url = url
+        self.key = f"bench{client_id}"
+        self.interval = 1.0 / rate_hz
+        self.sent: dict[int, float] = {}
+        self.acked = 0
+        self.latencies: list[float] = []
+        self.lock = threading.Lock()
+        self.sio = socketio.Client(reconnection=False)
+        self.sio.on("state.snapshot", self._on_snapshot)
+
+    def _on_snapshot(self, payload):
+        now = time.perf_counter()
+        seq = ((payload.get("state") or {}).get("render") or {}).get("output", {}).get(self.key)
+        if not isinstance(seq, int):
+            return
+        with self.lock:
+            if seq > self.acked and seq in self.sent:
+                self.latencies.append((now - self.sent[seq]) * 1000.0)
+                self.acked = seq
+
+    def run(self, deadline: float) -> None:
+        self.sio.connect(self.url, transports=["websocket"])
+        seq = 0
+        try:
+            while time.perf_counter() < deadline:
+                seq += 1
+                with self.lock:
+                    self.sent[seq] = time.perf_counter()
+                self.sio.emit("render.patch", {"output": {self.key: seq}})
+                if seq % 5 == 0:
+                    self.sio.emit("ddc.set", {"brightness": seq % 100})
+                time.sleep(self.interval)
+            time.sleep(0.5)
+        finally:
+            self.sio.disconnect()
+
+
+def run_mode(mode: str, args) -> dict:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        env = app_env(tmp, SERVER_MODE=mode, BIND_HOST="127.0.0.1", BIND_PORT=port)
+        server = subprocess.Popen([sys.executable, "-m", "hdmi_control.app"], cwd=ROOT, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_healthy(url)
+            clients = [DragClient(url, n, args.rate) for n in range(args.clients)]
+            deadline = time.perf_counter() + args.seconds
+            threads = [threading.Thread(target=c.run, args=(deadline,)) for c in clients]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            server.terminate()
+            server.wait(timeout=10)
+    latencies = [ms for c in clients for ms in c.latencies]
+    sent = sum(len(c.sent) for c in clients)
+    return {
+        "mode": mode,
+        "clients": args.clients,
+        "rate_hz": args.rate,
+        "events_sent": sent,
+        "samples": len(latencies),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies) if latencies else None,
+    }
+
+
+def run(args) -> list[dict]:
+    results = []
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        result = run_mode(mode, args)
+        results.append(result)
+        print(f"{mode:>10}: p50 {result['p50_ms']:.1f} ms  p99 {result['p99_ms']:.1f} ms  ({result['samples']} samples / {result['events_sent']} sent)", file=sys.stderr)
+    return results
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--rate", type=float, default=30.0, help="events per second per client")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--modes", default="threading", help="comma separated: threading,gevent,eventlet")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_arguments(parser)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args()
+    write_results(args.out, "ws_load", run(args), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Helpers shared by the benchmark scripts."""
+import json
+import os
+import platform
+import socket
+import subprocess
+import time
+import urllib.request
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+FAKE_DDCUTIL = Path(__file__).resolve().parent / "fake_ddcutil.py"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_healthy(url: str, timeout: float = 20.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/api/health", timeout=1):
+                return
+        except Exception:
+            time.sleep(0.2)
+    raise RuntimeError("server did not become healthy")
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def summarize(values_ms: list[float]) -> dict:
+    """p50/p95/p99/max of a list of millisecond samples, rounded for JSON."""
+    def r(value):
+        return round(value, 3) if value is not None else None
+    return {
+        "samples": len(values_ms),
+        "p50_ms": r(percentile(values_ms, 50)),
+        "p95_ms": r(percentile(values_ms, 95)),
+        "p99_ms": r(percentile(values_ms, 99)),
+        "max_ms": r(max(values_ms)) if values_ms else None,
+    }
+
+
+def app_env(data_dir: str, **overrides) -> dict:
+    """Environment for an app process with its own data directory.
+
+    DDC goes to the fake ddcutil unless DDCUTIL_PATH is already set or
+    overridden, so runs do not depend on a connected monitor.
+    """
+    env = dict(os.environ)
+    env.update({
+        "DATA_DIR": data_dir,
+        "DB_PATH": os.path.join(data_dir, "screeny.db"),
+        "DDCUTIL_PATH": env.get("DDCUTIL_PATH", str(FAKE_DDCUTIL)),
+        "FAKE_DDC_STATE": os.path.join(data_dir, "fake_ddcutil.json"),
+        "DISABLE_DPMS": "0",
+        "PYTHONPATH": os.pathsep.join(p for p in (str(ROOT), env.get("PYTHONPATH")) if p),
+    })
+    env.update({key: str(value) for key, value in overrides.items()})
+    return env
+
+
+def run_json(cmd: list[str], env: dict, timeout: float | None = None) -> dict:
+    """Run a worker process and parse the JSON object on its last stdout line."""
+    out = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, check=True, timeout=timeout)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def run_meta() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except Exception:
+            return None
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def write_results(path: str | None, name: str, results, args=None) -> dict:
+    """Print results as JSON and optionally write them with run metadata."""
+    document = {"benchmark": name, "meta": run_meta(), "results": results}
+    if args is not None:
+        document["args"] = {k: v for k, v in vars(args).items() if k not in ("out", "worker")}
+    if path:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+    print(json.dumps(results))
+    return document
@@ -0,0 +1,56 @@
+"""Compare two benchmark result files metric by metric.
+
+    python -m benchmarks.compare before.json after.json [--filter p50]
+"""
+import argparse
+import json
+
+
+def flatten(value, prefix: str = "") -> dict[str, float]:
+    flat = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in ("args", "meta"):
+                continue
+            flat.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            label = item.get("mode", index) if isinstance(item, dict) else index
+            flat.update(flatten(item, f"{prefix}[{label}]"))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        flat[prefix] = float(value)
+    return flat
+
+
+def _fmt(value: float | None) -> str:
+    return "-" if value is None else f"{value:.3f}".rstrip("0").rstrip(".")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--filter", default="", help="only show metrics containing this text")
+    args = parser.parse_args()
+
+    with open(args.before, "r", encoding="utf-8") as f:
+        before_doc = json.load(f)
+    with open(args.after, "r", encoding="utf-8") as f:
+        after_doc = json.load(f)
+    before = flatten(before_doc.get("results"))
+    after = flatten(after_doc.get("results"))
+    print(f"before: {before_doc.get('meta', {}).get('commit')}  after: {after_doc.get('meta', {}).get('commit')}")
+    keys = [k for k in sorted(set(before) | set(after)) if args.filter in k]
+    width = max((len(k) for k in keys), default=10)
+    for key in keys:
+        old = before.get(key)
+        new = after.get(key)
+        if old is not None and new is not None and old:
+            delta = f"{(new - old) / abs(old) * 100.0:+.1f}%"
+        else:
+            delta = ""
+        print(f"{key:<{width}}  {_fmt(old):>12}  {_fmt(new):>12}  {delta:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Stand-in for ddcutil with configurable latency, errors and VCP support.
+
+Point DDCUTIL_PATH at this file. It understands the subset of the ddcutil
+command line the app uses (detect, getvcp, setvcp, capabilities) and keeps
+VCP values in a JSON file so getvcp sees earlier setvcp calls.
+
+    FAKE_DDC_LATENCY_MS   base latency per call (default 40, like a real I2C round trip)
+    FAKE_DDC_JITTER_MS    extra uniform random latency (default 10)
+    FAKE_DDC_ERROR_RATE   fraction of calls that fail, 0..1 (default 0)
+    FAKE_DDC_CODES        supported VCP codes (default 10,12,D6,60)
+    FAKE_DDC_BUS          reported I2C bus number (default 3)
+    FAKE_DDC_STATE        value file (default $TMPDIR/fake_ddcutil.json)
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+DEFAULT_VALUES = {"10": [50, 100], "12": [50, 100], "D6": [1, 5], "60": [17, 18]}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _state_path() -> str:
+    return os.environ.get("FAKE_DDC_STATE") or os.path.join(tempfile.gettempdir(), "fake_ddcutil.json")
+
+
+def _load() -> dict:
+    try:
+        with open(_state_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {code: list(value) for code, value in DEFAULT_VALUES.items()}
+
+
+def _save(values: dict) -> None:
+    path = _state_path()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(values, f)
+    os.replace(tmp, path)
+
+
+def _fail(message: str) -> int:
+    print(message, file=sys.stderr)
+    return 1
+
+
+def main(argv: list[str]) -> int:
+    latency = _env_float("FAKE_DDC_LATENCY_MS", 40.0) + random.uniform(0.0, _env_float("FAKE_DDC_JITTER_MS", 10.0))
+    time.sleep(latency / 1000.0)
+    if random.random() < _env_float("FAKE_DDC_ERROR_RATE", 0.0):
+        return _fail("DDC communication failed")
+
+    supported = {c.strip().upper() for c in os.environ.get("FAKE_DDC_CODES", "10,12,D6,60").split(",") if c.strip()}
+    bus = os.environ.get("FAKE_DDC_BUS", "3")
+    args = [a for a in argv if not a.startswith("--")]
+    command = args[0] if args else ""
+
+    if command == "detect":
+        print("Display 1")
+        print(f"   I2C bus:  /dev/i2c-{bus}")
+        print("   DRM connector:           card0-HDMI-A-1")
+        print("   EDID synopsis:")
+        print("      Mfg id:               FAK")
+        print("   Model:                   Fake Monitor")
+        print("   Serial number:           0001")
+        return 0
+    if command == "capabilities":
+        print("Model: Fake Monitor")
+        print("VCP Features:")
+        for code in sorted(supported):
+            print(f"   Feature: {code}")
+        return 0
+    if command == "getvcp" and len(args) > 1:
+        code = args[1].upper()
+        if code not in supported:
+            print(f"VCP {code} ERR")
+            return 0
+        cur, maximum = _load().get(code, [0, 100])
+        print(f"VCP {code} C {cur} {maximum}")
+        return 0
+    if command == "setvcp" and len(args) > 2:
+        code = args[1].upper()
+        if code not in supported:
+            return _fail(f"VCP feature {code} not supported")
+        values = _load()
+        maximum = values.get(code, [0, 100])[1]
+        values[code] = [max(0, min(int(args[2]), maximum)), maximum]
+        _save(values)
+        return 0
+    return _fail(f"Unrecognized command: {' '.join(argv)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,61 @@
+"""Run the benchmark suites and write one JSON file per run.
+
+    python -m benchmarks.run                       # all suites, results/<commit>.json
+    python -m benchmarks.run --suites renderer,scenarios --quick
+    python -m benchmarks.compare benchmarks/results/a.json benchmarks/results/b.json
+"""
+import argparse
+import sys
+
+from benchmarks import bench_db, bench_renderer, bench_scenarios, bench_transform, bench_transitions, bench_ws_load
+from benchmarks.common import ROOT, run_meta, write_results
+
+SUITES = {
+    "renderer": bench_renderer,
+    "transform": bench_transform,
+    "transitions": bench_transitions,
+    "scenarios": bench_scenarios,
+    "db": bench_db,
+    "ws_load": bench_ws_load,
+}
+
+# Shorter runs for a quick before/after check; full defaults otherwise.
+QUICK = {
+    "renderer": ["--sizes", "640x480,1920x1080", "--repeat", "3"],
+    "transform": ["--source", "1920x1080", "--screen", "1280x720", "--repeat", "3"],
+    "transitions": ["--sizes", "1280x720,1920x1080", "--steps", "20"],
+    "scenarios": ["--seconds", "2", "--applies", "5", "--uploads", "10", "--upload-size", "1280x720"],
+    "db": ["--seconds", "2"],
+    "ws_load": ["--seconds", "3", "--clients", "10"],
+}
+
+
+def suite_args(name: str, quick: bool) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog=name)
+    SUITES[name].add_arguments(parser)
+    return parser.parse_args(QUICK[name] if quick else [])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suites", default=",".join(SUITES))
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--out", help="default: benchmarks/results/<commit>.json")
+    args = parser.parse_args()
+
+    names = [s.strip() for s in args.suites.split(",") if s.strip()]
+    unknown = [name for name in names if name not in SUITES]
+    if unknown:
+        raise SystemExit(f"unknown suites: {', '.join(unknown)}")
+    results = {}
+    for name in names:
+        print(f"== {name}", file=sys.stderr)
+        suite = suite_args(name, args.quick)
+        results[name] = {"args": vars(suite), "results": SUITES[name].run(suite)}
+    out = args.out or str(ROOT / "benchmarks" / "results" / f"{(run_meta()['commit'] or 'unknown')[:12]}.json")
+    write_results(out, "suite", results, args)
+    print(f"wrote {out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,67 +1,165 @@
 from __future__ import annotations
+from .config import CONFIG
+
+if __name__ == "__main__":
+    # Cooperative server modes must patch the standard library before the
+    # rest of the app imports threading, socket or subprocess.
+    from .blocking import monkey_patch
+    monkey_patch(CONFIG.server_mode)
+
+import atexit
+import copy
 import json
 import os
-from threading import Lock
-from flask import Flask, jsonify, request, send_file, render_template
-from io import BytesIO
-from PIL import Image
+import signal
+import sqlite3
+import sys
+import time
+from datetime import datetime
+from threading import Event, Lock, Thread
+from flask import Flask, Response, current_app, g, jsonify, request, send_file, render_template
 from pathlib import Path
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room
 
-from .config import CONFIG
-from .db import init_db
+from .db import init_db, close_pool
+from .startup import Startup
 from .state import SystemState
+from .broadcast import BroadcastScheduler
+from .persist import StatePersister
+from .processing import ImageProcessor
 from .ddc.controller import DdcController
 from .ddc.ddcutil import DdcUtil
+from .ddc.ramp import software_level, software_points
 from .sleep import apply_sleep_prevention
-from .images import add_image, list_images, delete_image, get_image_path
-from .profiles import list_profiles, create_profile, update_profile, delete_profile as delete_profile_db, set_default_profile, get_profile, load_default_or_last
+from .images import add_image, list_images, get_image, delete_image, get_image_blob, import_images, resolve_import_source, LIST_LIMIT_DEFAULT
+from .profiles import list_profiles, create_profile, update_profile, delete_profile as delete_profile_db, set_default_profile, get_compiled, load_default_or_last, vcp_code, CompiledProfile
+from .profile_apply import ProfileApplies
+from .playlists import list_playlists, create_playlist, update_playlist, delete_playlist, get_playlist, normalize_items
+from .playback import PlaylistPlayer
+from .schedules import list_schedules, create_schedule, update_schedule, delete_schedule, get_schedule, normalize_rule, next_fire
+from .scheduler import ProfileScheduler
 from .app_state import get_state_value, set_state_value
-from .drm import list_connectors
+from .drm import list_connectors, list_displays
+from .hotplug import ConnectorWatcher
+from .metrics import REGISTRY, CACHE_REQUESTS, PROFILE_APPLY_SECONDS, RENDERER_FPS, RENDERER_FRAME_SECONDS
+from .trace import tracer, profiler, traced
+from .thumbs import ensure_thumb, pick_size, thumb_etag
+from .tiles import load_manifest, should_tile, tile_etag, tile_path
 
 
-socketio = SocketIO(async_mode="threading", cors_allowed_origins=[])
+socketio = SocketIO(async_mode=CONFIG.server_mode, cors_allowed_origins=[])
 state_lock = Lock()
+import_lock = Lock()
+recover_lock = Lock()
 state = SystemState()
+TELEMETRY_MAX_SPANS = 512
+# Label values the renderer reports; anything else is counted as "other"
+# so a bad client cannot grow the metric series without bound.
+TELEMETRY_STAGES = frozenset({
+    "fetch", "animation_load", "decode", "tiles", "color", "transform", "present",
+    "frame", "slide_late", "transition", "transition_step",
+})
+TELEMETRY_CACHE_RESULTS = frozenset({
+    "memory", "miss", "resumed", "revalidated", "offline", "tile_memory", "tile_disk", "tile_miss",
+})
+RAMP_CODE_NAMES = {"brightness": "10", "contrast": "12"}
 
 
 ddc_controller = DdcController(state.ddc, lambda: state.bump(), state_lock)
 
 
+def _emit_to_client(event: str, payload: dict, sid: str) -> None:
+    socketio.emit(event, payload, to=sid)
+
+
+def _client_backlog(sid: str) -> int:
+    try:
+        eio_sid = socketio.server.manager.eio_sid_from_sid(sid, "/")
+        sock = socketio.server.eio.sockets.get(eio_sid)
+        return sock.queue.qsize() if sock else 0
+    except Exception:
+        return 0
+
+
+broadcaster = BroadcastScheduler(_emit_to_client, backlog=_client_backlog)
+persister = StatePersister()
+image_processor = ImageProcessor()
+connector_watcher = ConnectorWatcher(lambda changes: _on_connectors_changed(changes))
+playlist_player = PlaylistPlayer(lambda info: _on_playlist_changed(info))
+PLAYBACK_ACTIONS = ("pause", "resume", "stop", "next", "previous", "goto")
+profile_applies = ProfileApplies(lambda timing: _on_profile_applied(timing))
+profile_scheduler = ProfileScheduler(
+    on_warm=lambda schedule: _warm_schedule(schedule),
+    on_fire=lambda schedule: _fire_schedule(schedule),
+    lead=CONFIG.schedule_lead_s,
+    next_fire=lambda rule, after: next_fire(rule, after, CONFIG.latitude, CONFIG.longitude),
+)
+# Socket.IO sessions that announced themselves with "renderer.hello".
+RENDERER_ROOM = "renderer"
+renderer_sids: set[str] = set()
+startup = Startup()
+
+
 def create_app() -> Flask:
     root = Path(__file__).resolve().parents[1]
     app = Flask(__name__, template_folder=str(root / "templates"), static_folder=str(root / "static"))
     app.config["MAX_CONTENT_LENGTH"] = CONFIG.upload_max_mb * 1024 * 1024
+    app.config["USE_X_SENDFILE"] = CONFIG.use_x_sendfile
+    app.sleep_status = None
+    startup.mark("boot")
 
-    init_db()
-    os.makedirs(CONFIG.data_dir, exist_ok=True)
+    with startup.phase("db"):
+        init_db()
+        os.makedirs(CONFIG.data_dir, exist_ok=True)
 
-    ddc_controller.start()
-    ddc_controller.rescan()
-    ddc_controller.wake_display()
+    with startup.phase("restore"):
+        _restore_state()
 
-    if CONFIG.disable_dpms:
-        app.sleep_status = apply_sleep_prevention()
-    else:
-        app.sleep_status = None
+    persister.start()
+    # atexit runs in reverse order: flush pending state, then close the pool.
+    atexit.register(close_pool)
+    atexit.register(persister.stop)
 
-    active_profile = get_state_value("active_profile_id")
-    if active_profile and "value" in active_profile:
-        state.activeProfileId = active_profile["value"]
-    else:
-        state.activeProfileId = load_default_or_last()
+    with startup.phase("services"):
+        socketio.init_app(app)
+        broadcaster.start()
+        ddc_controller.set_on_update(lambda: _ddc_updated())
+        ddc_controller.set_on_ramp(lambda info: _on_ramp_event(info))
+        image_processor.set_on_progress(lambda event: socketio.emit("image.processing", event))
+        if CONFIG.hotplug_enabled:
+            connector_watcher.start()
+        playlist_player.start()
+        _restore_playback()
+        profile_scheduler.start()
+        _reload_schedules()
 
-    selected_output = get_state_value("ddc_output")
-    if selected_output and "value" in selected_output:
-        pref = selected_output["value"]
-        ddc_controller.set_preference(pref.get("connector"), pref.get("bus"), pref.get("display_index"))
+    # DDC discovery (several ddcutil round trips) and sleep prevention (a
+    # handful of xset runs) take seconds on a Pi Zero; the server listens
+    # meanwhile and reports "initializing". The DDC worker starts after the
+    # rescan, so writes made before then queue up and coalesce.
+    state.ddc.status = "initializing"
+    chains = [[("ddc.rescan", ddc_controller.rescan), ("ddc.wake", ddc_controller.wake_display),
+               ("ddc.start", ddc_controller.start)]]
+    if CONFIG.disable_dpms:
+        chains.append([("sleepPrevention", lambda: setattr(app, "sleep_status", apply_sleep_prevention(CONFIG.sleep_mode)))])
+    startup.run_background(chains, _on_startup_ready)
+    startup.mark("serving")
+
+    @app.before_request
+    def trace_start():
+        g.trace_start = (time.time(), time.perf_counter())
 
-    socketio.init_app(app)
-    ddc_controller.set_on_update(lambda: _ddc_updated())
+    @app.teardown_request
+    def trace_end(exc):
+        started = g.pop("trace_start", None)
+        if started is None:
+            return
+        rule = request.url_rule.rule if request.url_rule else request.path
+        tracer.record(f"{request.method} {rule}", "http", started[0], time.perf_counter() - started[1])
 
     @app.before_request
     def auth_guard():
-        if CONFIG.auth_token and request.path.startswith("/api/"):
+        if CONFIG.auth_token and (request.path.startswith("/api/") or request.path == "/metrics"):
             token = request.headers.get("X-Auth-Token")
             if token != CONFIG.auth_token:
                 return jsonify({"error": "unauthorized"}), 401
@@ -70,11 +168,17 @@ def create_app() -> Flask:
     def index():
         return render_template("index.html")
 
+    @app.route("/metrics")
+    def metrics():
+        return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
     @app.route("/api/health")
     def health():
         return jsonify({
             "ok": True,
-            "renderer": {"connected": True},
+            "startup": startup.info(),
+            "renderer": {"connected": bool(renderer_sids)},
+            "lastProfileApply": profile_applies.last,
             "ddc": state.ddc.__dict__,
             "sleep_prevention": {
                 "ok": app.sleep_status.ok if app.sleep_status else False,
@@ -90,6 +194,7 @@ def create_app() -> Flask:
     def ddc_outputs():
         return jsonify({
             "connectors": list_connectors(),
+            "displays": list_displays(),
             "ddc_displays": state.ddc.display,
             "preference": ddc_controller.get_preference(),
         })
@@ -102,13 +207,13 @@ def create_app() -> Flask:
         display_index = payload.get("display_index")
         ddc_controller.set_preference(connector, bus, display_index)
         set_state_value("ddc_output", {"value": {"connector": connector, "bus": bus, "display_index": display_index}})
-        ddc_controller.rescan()
+        _rescan_and_resume()
         ddc_controller.wake_display()
         return jsonify({"ok": True, "ddc": state.ddc.__dict__})
 
     @app.route("/api/ddc/rescan", methods=["POST"])
     def ddc_rescan():
-        ddc_controller.rescan()
+        _rescan_and_resume()
         ddc_controller.wake_display()
         return jsonify({"ok": True, "ddc": state.ddc.__dict__})
 
@@ -131,6 +236,43 @@ def create_app() -> Flask:
             "getvcp_60": util.run_raw(["getvcp", "60", "--brief"] + target_args),
         })
 
+    @app.route("/api/debug/trace")
+    def debug_trace():
+        response = jsonify(tracer.chrome_trace())
+        response.headers["Content-Disposition"] = "attachment; filename=screeny-trace.json"
+        return response
+
+    @app.route("/api/debug/trace", methods=["POST"])
+    def debug_trace_toggle():
+        payload = request.get_json(silent=True) or {}
+        if payload.get("clear"):
+            tracer.clear()
+        if "enabled" in payload:
+            tracer.set_enabled(bool(payload["enabled"]))
+        return jsonify({"enabled": tracer.enabled, "slowMs": tracer.slow_ms})
+
+    @app.route("/api/debug/slow")
+    def debug_slow():
+        return jsonify({"slowMs": tracer.slow_ms, "ops": tracer.slow_ops()})
+
+    @app.route("/api/debug/profile")
+    def debug_profile():
+        if request.args.get("format") == "collapsed":
+            return Response(profiler.collapsed(), mimetype="text/plain")
+        return jsonify(profiler.result())
+
+    @app.route("/api/debug/profile", methods=["POST"])
+    def debug_profile_start():
+        payload = request.get_json(silent=True) or {}
+        try:
+            seconds = float(payload.get("seconds", 10))
+            interval_ms = float(payload.get("intervalMs", 10))
+        except (TypeError, ValueError):
+            return jsonify({"error": "invalid seconds or intervalMs"}), 400
+        if not profiler.start(seconds, interval_ms):
+            return jsonify({"error": "profile already running"}), 409
+        return jsonify(profiler.result()), 202
+
     @app.route("/api/ddc/wake", methods=["POST"])
     def ddc_wake():
         ddc_controller.wake_display()
@@ -145,43 +287,158 @@ def create_app() -> Flask:
             ddc_controller.set_contrast(payload["contrast"])
         return jsonify({"accepted": True, "version": state.meta["version"]})
 
+    @app.route("/api/ddc/ramp")
+    def ddc_ramps():
+        with state_lock:
+            software = copy.deepcopy(state.softwareRamp)
+        return jsonify({"ramps": ddc_controller.ramps(), "latencyMs": round(ddc_controller.latency_ms(), 1),
+                        "software": software})
+
+    @app.route("/api/ddc/ramp", methods=["POST"])
+    def ddc_ramp():
+        payload = request.get_json(force=True)
+        try:
+            code = payload.get("code", "10")
+            code = RAMP_CODE_NAMES.get(code) or vcp_code(code)
+            duration_ms = float(payload.get("durationMs", 1000))
+            curve = payload.get("curve", "linear")
+            software = payload.get("software")
+            dim_to = None
+            if software is not None:
+                dim_to = float(software["to"])
+                if not 0.0 <= dim_to <= 1.0:
+                    raise ValueError("software.to must be between 0 and 1")
+            info = ddc_controller.ramp(code, int(payload["target"]), duration_ms, curve)
+        except (KeyError, TypeError, ValueError) as exc:
+            return jsonify({"error": str(exc)}), 400
+        if dim_to is not None:
+            _start_software_ramp(info, dim_to)
+        socketio.emit("ddc.ramp", info)
+        return jsonify(info), 202
+
     @app.route("/api/images", methods=["GET"])
     def images_list():
-        return jsonify(_sanitize_images(list_images()))
+        args = request.args
+        try:
+            items, next_cursor = list_images(
+                after=args.get("after") or None,
+                limit=_int_arg("limit", LIST_LIMIT_DEFAULT),
+                mime_type=args.get("mime") or None,
+                name_prefix=args.get("name") or None,
+                min_width=_int_arg("min_width"),
+                min_height=_int_arg("min_height"),
+                max_width=_int_arg("max_width"),
+                max_height=_int_arg("max_height"),
+            )
+        except ValueError:
+            return jsonify({"error": "invalid query"}), 400
+        response = jsonify(items)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response
+
+    @app.route("/api/images/import", methods=["POST"])
+    def images_import():
+        payload = request.get_json(force=True)
+        try:
+            source = resolve_import_source(payload.get("source"), CONFIG.import_root)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        if not import_lock.acquire(blocking=False):
+            return jsonify({"error": "import already running"}), 409
+        Thread(target=_run_import, args=(source, bool(payload.get("mirror"))), daemon=True).start()
+        return jsonify({"accepted": True}), 202
+
+    @app.route("/api/images/<image_id>", methods=["GET"])
+    def images_get(image_id: str):
+        image = get_image(image_id)
+        if not image:
+            return jsonify({"error": "not found"}), 404
+        return jsonify(image)
 
     @app.route("/api/images", methods=["POST"])
     def images_upload():
         if "file" not in request.files:
             return jsonify({"error": "file missing"}), 400
-        image = add_image(request.files["file"])
+        tiles = request.form.get("tiles", "auto")
+        if tiles not in ("auto", "0", "1"):
+            return jsonify({"error": "tiles must be auto, 0 or 1"}), 400
+        try:
+            image = add_image(request.files["file"])
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        if image["status"] == "processing" or (tiles == "1" and not load_manifest(image["sha256"])):
+            image_processor.submit(image["id"], image["sha256"], image["storage_path"], tiles)
         return jsonify(_sanitize_images([image])[0])
 
     @app.route("/api/images/<image_id>", methods=["DELETE"])
     def images_delete(image_id: str):
         delete_image(image_id)
         if state.activeImageId == image_id:
-            state.activeImageId = None
-            state.bump()
+            with state_lock:
+                state.activeImageId = None
+                state.bump()
+                _persist_state()
+            _broadcast_snapshot()
         return jsonify({"ok": True})
 
     @app.route("/api/images/<image_id>/thumb")
     def images_thumb(image_id: str):
-        path = get_image_path(image_id)
-        if not path or not os.path.exists(path):
+        size = pick_size(request.args.get("size", type=int))
+        blob = get_image_blob(image_id)
+        if not blob:
+            return jsonify({"error": "not found"}), 404
+        etag = thumb_etag(blob["cache_key"], size)
+        if etag in request.if_none_match:
+            return _not_modified(etag, "http_thumb")
+        path = blob["storage_path"]
+        if not os.path.exists(path):
             return jsonify({"error": "not found"}), 404
-        with Image.open(path) as image:
-            image.thumbnail((256, 256))
-            buf = BytesIO()
-            image.save(buf, format="JPEG")
-        buf.seek(0)
-        return send_file(buf, mimetype="image/jpeg")
+        thumb, _ = ensure_thumb(blob["cache_key"], path, size)
+        return _send_immutable(thumb, "image/jpeg", etag, "http_thumb")
+
+    @app.route("/api/images/<image_id>/tiles")
+    def images_tiles(image_id: str):
+        blob = get_image_blob(image_id)
+        manifest = load_manifest(blob["cache_key"]) if blob else None
+        if not manifest:
+            # While a large upload is still processing its pyramid is on the way.
+            image = get_image(image_id) if blob else None
+            pending = bool(image and image["status"] == "processing" and should_tile(image["width"], image["height"]))
+            return jsonify({"error": "not tiled", "pending": pending}), 404
+        etag = tile_etag(blob["cache_key"], -1, 0, 0)
+        if etag in request.if_none_match:
+            return _not_modified(etag, "http_tile")
+        CACHE_REQUESTS.inc(cache="http_tile", result="miss")
+        response = jsonify(manifest)
+        response.set_etag(etag)
+        return _immutable(response)
+
+    @app.route("/api/images/<image_id>/tiles/<int:level>/<int:col>_<int:row>.jpg")
+    def images_tile(image_id: str, level: int, col: int, row: int):
+        blob = get_image_blob(image_id)
+        if not blob:
+            return jsonify({"error": "not found"}), 404
+        etag = tile_etag(blob["cache_key"], level, col, row)
+        if etag in request.if_none_match:
+            return _not_modified(etag, "http_tile")
+        path = tile_path(blob["cache_key"], level, col, row)
+        if not os.path.exists(path):
+            return jsonify({"error": "not found"}), 404
+        return _send_immutable(path, "image/jpeg", etag, "http_tile")
 
     @app.route("/api/images/<image_id>/file")
     def images_file(image_id: str):
-        path = get_image_path(image_id)
-        if not path or not os.path.exists(path):
+        blob = get_image_blob(image_id)
+        if not blob:
+            return jsonify({"error": "not found"}), 404
+        etag = blob["cache_key"]
+        if etag in request.if_none_match:
+            return _not_modified(etag, "http_file")
+        path = blob["storage_path"]
+        if not os.path.exists(path):
             return jsonify({"error": "not found"}), 404
-        return send_file(path)
+        return _send_immutable(path, blob["mime_type"], etag, "http_file")
 
     @app.route("/api/state")
     def get_state():
@@ -191,6 +448,8 @@ def create_app() -> Flask:
     @app.route("/api/state", methods=["PATCH"])
     def patch_state():
         payload = request.get_json(force=True)
+        if "activeImageId" in payload:
+            playlist_player.stop()
         with state_lock:
             if "render" in payload:
                 for key, value in payload["render"].items():
@@ -204,7 +463,7 @@ def create_app() -> Flask:
                 state.activeImageId = payload["activeImageId"]
             state.bump()
             _persist_state()
-            socketio.emit("state.snapshot", {"state": state.to_dict()})
+            _broadcast_snapshot()
         return jsonify(state.to_dict())
 
     @app.route("/api/profiles", methods=["GET"])
@@ -237,25 +496,158 @@ def create_app() -> Flask:
 
     @app.route("/api/profiles/<profile_id>/apply", methods=["POST"])
     def profiles_apply(profile_id: str):
-        profile = get_profile(profile_id)
+        profile = get_compiled(profile_id)
         if not profile:
             return jsonify({"error": "not found"}), 404
-        _apply_profile(profile["data"], profile_id)
+        timing = _apply_profile(profile)
+        return jsonify({"ok": True, "timing": timing})
+
+    @app.route("/api/playlists", methods=["GET"])
+    def playlists_list():
+        return jsonify(list_playlists())
+
+    @app.route("/api/playlists", methods=["POST"])
+    def playlists_create():
+        payload = request.get_json(force=True)
+        try:
+            items = normalize_items(payload.get("items", []))
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        try:
+            playlist = create_playlist(payload.get("name") or "Playlist", items, bool(payload.get("loop", True)))
+        except sqlite3.IntegrityError:
+            return jsonify({"error": "name already in use"}), 409
+        return jsonify(playlist)
+
+    @app.route("/api/playlists/<playlist_id>", methods=["GET"])
+    def playlists_get(playlist_id: str):
+        playlist = get_playlist(playlist_id)
+        if not playlist:
+            return jsonify({"error": "not found"}), 404
+        return jsonify(playlist)
+
+    @app.route("/api/playlists/<playlist_id>", methods=["PATCH"])
+    def playlists_patch(playlist_id: str):
+        payload = request.get_json(force=True)
+        try:
+            items = normalize_items(payload["items"]) if "items" in payload else None
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        loop = bool(payload["loop"]) if "loop" in payload else None
+        try:
+            update_playlist(playlist_id, payload.get("name"), items, loop)
+        except sqlite3.IntegrityError:
+            return jsonify({"error": "name already in use"}), 409
+        playlist = get_playlist(playlist_id)
+        if not playlist:
+            return jsonify({"error": "not found"}), 404
+        playlist_player.update(playlist)
+        return jsonify(playlist)
+
+    @app.route("/api/playlists/<playlist_id>", methods=["DELETE"])
+    def playlists_delete(playlist_id: str):
+        if playlist_player.playlist_id() == playlist_id:
+            playlist_player.stop()
+        delete_playlist(playlist_id)
         return jsonify({"ok": True})
 
+    @app.route("/api/playlists/<playlist_id>/play", methods=["POST"])
+    def playlists_play(playlist_id: str):
+        payload = request.get_json(silent=True) or {}
+        playlist = get_playlist(playlist_id)
+        if not playlist:
+            return jsonify({"error": "not found"}), 404
+        try:
+            info = playlist_player.play(playlist, int(payload.get("index", 0)))
+        except (TypeError, ValueError) as exc:
+            return jsonify({"error": str(exc)}), 400
+        return jsonify(info)
+
+    @app.route("/api/schedules", methods=["GET"])
+    def schedules_list():
+        return jsonify(_with_next_fire(list_schedules()))
+
+    @app.route("/api/schedules", methods=["POST"])
+    def schedules_create():
+        payload = request.get_json(force=True)
+        try:
+            rule = _checked_rule(payload.get("rule"))
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        if not isinstance(payload.get("profileId"), str) or not payload["profileId"]:
+            return jsonify({"error": "profileId is required"}), 400
+        try:
+            schedule = create_schedule(payload.get("name") or "Schedule", payload["profileId"], rule, bool(payload.get("enabled", True)))
+        except sqlite3.IntegrityError:
+            return jsonify({"error": "name already in use"}), 409
+        _reload_schedules()
+        return jsonify(_with_next_fire([schedule])[0])
+
+    @app.route("/api/schedules/<schedule_id>", methods=["GET"])
+    def schedules_get(schedule_id: str):
+        schedule = get_schedule(schedule_id)
+        if not schedule:
+            return jsonify({"error": "not found"}), 404
+        return jsonify(_with_next_fire([schedule])[0])
+
+    @app.route("/api/schedules/<schedule_id>", methods=["PATCH"])
+    def schedules_patch(schedule_id: str):
+        payload = request.get_json(force=True)
+        try:
+            rule = _checked_rule(payload["rule"]) if "rule" in payload else None
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+        enabled = bool(payload["enabled"]) if "enabled" in payload else None
+        try:
+            update_schedule(schedule_id, payload.get("name"), payload.get("profileId") or None, rule, enabled)
+        except sqlite3.IntegrityError:
+            return jsonify({"error": "name already in use"}), 409
+        schedule = get_schedule(schedule_id)
+        if not schedule:
+            return jsonify({"error": "not found"}), 404
+        _reload_schedules()
+        return jsonify(_with_next_fire([schedule])[0])
+
+    @app.route("/api/schedules/<schedule_id>", methods=["DELETE"])
+    def schedules_delete(schedule_id: str):
+        delete_schedule(schedule_id)
+        _reload_schedules()
+        return jsonify({"ok": True})
+
+    @app.route("/api/playback")
+    def playback_status():
+        return jsonify(playlist_player.info())
+
+    @app.route("/api/playback", methods=["POST"])
+    def playback_control():
+        payload = request.get_json(force=True)
+        try:
+            info = _control_playback(payload.get("action"), payload.get("index"))
+        except (TypeError, ValueError) as exc:
+            return jsonify({"error": str(exc)}), 400
+        return jsonify(info)
+
     @socketio.on("connect")
     def ws_connect():
-        emit("state.snapshot", {"state": state.to_dict()})
+        broadcaster.add_client(request.sid)
+        emit("state.snapshot", {"state": _snapshot()})
+
+    @socketio.on("disconnect")
+    def ws_disconnect():
+        broadcaster.remove_client(request.sid)
+        renderer_sids.discard(request.sid)
 
     @socketio.on("ddc.set")
+    @traced("ws ddc.set", "socketio")
     def ws_ddc_set(message):
         if "brightness" in message:
             ddc_controller.set_brightness(message["brightness"])
         if "contrast" in message:
             ddc_controller.set_contrast(message["contrast"])
-        emit("ddc.updated", {"values": state.ddc.values, "meta": state.meta}, broadcast=True)
+        _broadcast_ddc()
 
     @socketio.on("render.patch")
+    @traced("ws render.patch", "socketio")
     def ws_render_patch(message):
         with state_lock:
             for section in ("transform", "color", "output"):
@@ -267,29 +659,268 @@ def create_app() -> Flask:
                         setattr(state.render, section, message[section])
             state.bump()
             _persist_state()
-            emit("state.snapshot", {"state": state.to_dict()}, broadcast=True)
+        _broadcast_snapshot()
 
     @socketio.on("image.select")
+    @traced("ws image.select", "socketio")
     def ws_image_select(message):
+        playlist_player.stop()
         with state_lock:
             state.activeImageId = message.get("imageId")
             state.bump()
             _persist_state()
-            emit("state.snapshot", {"state": state.to_dict()}, broadcast=True)
+        _broadcast_snapshot()
 
     @socketio.on("profile.apply")
+    @traced("ws profile.apply", "socketio")
     def ws_profile_apply(message):
         profile_id = message.get("profileId")
-        profile = get_profile(profile_id) if profile_id else None
+        profile = get_compiled(profile_id) if profile_id else None
         if not profile:
             emit("ddc.error", {"message": "Profile not found", "detail": "", "recoverable": True})
             return
-        _apply_profile(profile["data"], profile_id)
-        emit("state.snapshot", {"state": state.to_dict()}, broadcast=True)
+        _apply_profile(profile)
+
+    @socketio.on("playlist.play")
+    @traced("ws playlist.play", "socketio")
+    def ws_playlist_play(message):
+        playlist_id = message.get("playlistId")
+        playlist = get_playlist(playlist_id) if playlist_id else None
+        if not playlist:
+            emit("playlist.error", {"message": "Playlist not found"})
+            return
+        try:
+            playlist_player.play(playlist, int(message.get("index", 0)))
+        except (TypeError, ValueError) as exc:
+            emit("playlist.error", {"message": str(exc)})
+
+    @socketio.on("playlist.control")
+    @traced("ws playlist.control", "socketio")
+    def ws_playlist_control(message):
+        try:
+            _control_playback(message.get("action"), message.get("index"))
+        except (TypeError, ValueError) as exc:
+            emit("playlist.error", {"message": str(exc)})
+
+    @socketio.on("renderer.telemetry")
+    @traced("ws renderer.telemetry", "socketio")
+    def ws_renderer_telemetry(message):
+        _record_telemetry(message if isinstance(message, dict) else {})
+
+    @socketio.on("renderer.hello")
+    def ws_renderer_hello(message=None):
+        join_room(RENDERER_ROOM)
+        renderer_sids.add(request.sid)
+
+    @socketio.on("render.ready")
+    def ws_render_ready(message):
+        if isinstance(message, dict):
+            profile_applies.ready(str(message.get("token")))
+
+    @socketio.on("render.presented")
+    def ws_render_presented(message):
+        if isinstance(message, dict):
+            profile_applies.presented(str(message.get("token")))
 
     return app
 
 
+def _run_import(source: str, mirror: bool) -> None:
+    try:
+        summary = import_images(source, mirror=mirror, progress=lambda summary: socketio.emit("images.import", summary))
+        socketio.emit("images.import", dict(summary, done=True))
+    except Exception as exc:
+        socketio.emit("images.import", {"source": source, "done": True, "error": str(exc)})
+    finally:
+        import_lock.release()
+
+
+def _record_telemetry(message: dict) -> None:
+    # Sent by the renderer every few seconds: [stage, wall start, seconds]
+    # spans since the last report, its frame rate and image cache counts.
+    fps = message.get("fps")
+    if isinstance(fps, (int, float)):
+        RENDERER_FPS.set(fps)
+    pid = message.get("pid") if isinstance(message.get("pid"), int) else "renderer"
+    spans = message.get("spans")
+    if isinstance(spans, list):
+        for item in spans[:TELEMETRY_MAX_SPANS]:
+            if not (isinstance(item, list) and len(item) == 3):
+                continue
+            stage, wall, seconds = item
+            if not (isinstance(wall, (int, float)) and isinstance(seconds, (int, float)) and seconds >= 0):
+                continue
+            stage = _known_label(stage, TELEMETRY_STAGES)
+            RENDERER_FRAME_SECONDS.observe(seconds, stage=stage)
+            tracer.record(f"renderer {stage}", "renderer", wall, seconds, pid=pid, tid="render")
+    cache = message.get("cache")
+    if isinstance(cache, dict):
+        for result, count in cache.items():
+            if isinstance(count, int) and count > 0:
+                CACHE_REQUESTS.inc(count, cache="renderer", result=_known_label(result, TELEMETRY_CACHE_RESULTS))
+
+
+def _known_label(value, known: frozenset[str]) -> str:
+    return value if isinstance(value, str) and value in known else "other"
+
+
+def _ddc_target() -> str | None:
+    # Only the connector DDC is bound to matters; if that is not known yet,
+    # any connector counts.
+    return ddc_controller.get_preference().get("connector") or (state.ddc.display or {}).get("connector")
+
+
+def _target_present(target: str | None, connected: list[str]) -> bool:
+    return target in connected if target else bool(connected)
+
+
+def _connected_names() -> list[str]:
+    return [c["name"] for c in connector_watcher.connectors() if c["connected"]]
+
+
+def _rescan_and_resume() -> None:
+    # A manual rescan or output change that finds a display ends a hold
+    # left over from a disconnect, even if that connector never came back.
+    if ddc_controller.rescan():
+        ddc_controller.resume()
+
+
+def _on_connectors_changed(changes: list[dict]) -> None:
+    target = _ddc_target()
+    connected = _connected_names()
+    socketio.emit("display.hotplug", {"changes": changes, "connected": connected})
+    relevant = [c for c in changes if not target or c["name"] == target]
+    if not relevant:
+        return
+    if not _target_present(target, connected):
+        ddc_controller.suspend("Display disconnected")
+    elif any(c["connected"] for c in relevant):
+        Thread(target=_recover_display, daemon=True).start()
+
+
+def _recover_display() -> None:
+    if not recover_lock.acquire(blocking=False):
+        return
+    try:
+        # Monitors answer DDC only some time after the link comes up.
+        time.sleep(CONFIG.hotplug_settle_ms / 1000.0)
+        # It may have been unplugged again while settling; the disconnect
+        # already suspended the controller, so leave it that way.
+        if not _target_present(_ddc_target(), _connected_names()):
+            return
+        _rescan_and_resume()
+    finally:
+        recover_lock.release()
+
+
+def _control_playback(action: str | None, index) -> dict | None:
+    if action not in PLAYBACK_ACTIONS:
+        raise ValueError(f"action must be one of {', '.join(PLAYBACK_ACTIONS)}")
+    if action == "goto":
+        return playlist_player.goto(int(index))
+    if action == "stop":
+        playlist_player.stop()
+        return None
+    return getattr(playlist_player, action)()
+
+
+def _on_playlist_changed(info: dict | None) -> None:
+    with state_lock:
+        state.playlist = info
+        if info:
+            state.activeImageId = info["imageId"]
+        state.bump()
+        _persist_state()
+    _broadcast_snapshot()
+
+
+def _restore_state() -> None:
+    active_profile = get_state_value("active_profile_id")
+    if active_profile and "value" in active_profile:
+        state.activeProfileId = active_profile["value"]
+    else:
+        state.activeProfileId = load_default_or_last()
+
+    active_image = get_state_value("active_image_id")
+    if active_image and "value" in active_image:
+        state.activeImageId = active_image["value"]
+
+    saved_render = get_state_value("render")
+    if saved_render and isinstance(saved_render.get("value"), dict):
+        for section in ("transform", "color", "output"):
+            if isinstance(saved_render["value"].get(section), dict):
+                getattr(state.render, section).update(saved_render["value"][section])
+
+    # Before the first rescan, which picks the display by this preference.
+    selected_output = get_state_value("ddc_output")
+    if selected_output and "value" in selected_output:
+        pref = selected_output["value"]
+        ddc_controller.set_preference(pref.get("connector"), pref.get("bus"), pref.get("display_index"))
+
+
+def _on_startup_ready() -> None:
+    with state_lock:
+        state.bump()
+    _broadcast_snapshot()
+
+
+def _restore_playback() -> None:
+    saved = get_state_value("playlist")
+    value = saved.get("value") if saved else None
+    if not isinstance(value, dict) or value.get("status") not in ("playing", "paused"):
+        return
+    playlist = get_playlist(value.get("id", ""))
+    if not playlist or not playlist["items"]:
+        return
+    playlist_player.play(playlist, int(value.get("index", 0)))
+    if value["status"] == "paused":
+        playlist_player.pause()
+
+
+def _reload_schedules() -> None:
+    profile_scheduler.reload(list_schedules())
+
+
+def _checked_rule(rule) -> dict:
+    # A rule that can never fire (e.g. a sun rule without coordinates) is
+    # rejected up front rather than silently never running.
+    rule = normalize_rule(rule)
+    if next_fire(rule, datetime.now().astimezone(), CONFIG.latitude, CONFIG.longitude) is None:
+        raise ValueError("rule never fires")
+    return rule
+
+
+def _with_next_fire(schedules: list[dict]) -> list[dict]:
+    upcoming = profile_scheduler.upcoming()
+    for schedule in schedules:
+        at = upcoming.get(schedule["id"])
+        schedule["nextAt"] = datetime.fromtimestamp(at).astimezone().isoformat() if at else None
+    return schedules
+
+
+def _warm_schedule(schedule: dict) -> None:
+    # Ahead of a switch: compile the profile, have the renderer fetch and
+    # render its frame, and wake the monitor's DDC/CI link.
+    profile = get_compiled(schedule["profileId"])
+    if not profile:
+        return
+    if renderer_sids:
+        with state_lock:
+            render = _merged_render(profile.render)
+        socketio.emit("render.prepare", {"token": None, "imageId": profile.image_id, "render": render}, to=RENDERER_ROOM)
+    if profile.vcp:
+        ddc_controller.warm()
+
+
+def _fire_schedule(schedule: dict) -> None:
+    profile = get_compiled(schedule["profileId"])
+    if not profile:
+        socketio.emit("schedule.fired", {"id": schedule["id"], "profileId": schedule["profileId"], "error": "profile not found"})
+        return
+    timing = _apply_profile(profile)
+    socketio.emit("schedule.fired", {"id": schedule["id"], "profileId": profile.id, "timing": timing})
+
+
 def _profile_from_state() -> dict:
     return {
         "name": "",
@@ -307,38 +938,188 @@ def _profile_from_state() -> dict:
     }
 
 
-def _apply_profile(profile_data: dict, profile_id: str | None) -> None:
-    ddc = profile_data.get("ddc", {})
-    if "brightness" in ddc and ddc["brightness"] is not None:
-        ddc_controller.set_brightness(ddc["brightness"])
-    if "contrast" in ddc and ddc["contrast"] is not None:
-        ddc_controller.set_contrast(ddc["contrast"])
-    render = profile_data.get("render", {})
-    for section in ("transform", "color", "output"):
-        if section in render:
-            current = getattr(state.render, section)
-            if isinstance(current, dict):
-                current.update(render[section])
-            else:
-                setattr(state.render, section, render[section])
-    state.activeImageId = profile_data.get("activeImageId")
-    state.activeProfileId = profile_id
-    state.bump()
-    _persist_state()
+def _apply_profile(profile: CompiledProfile) -> dict:
+    """Apply a profile so image, render state and DDC values change together.
+
+    The renderer pre-renders the target frame first, then the DDC batch is
+    written, and only then is the new state committed and broadcast, so the
+    renderer swaps to a frame it already has. Each wait is capped at
+    PROFILE_APPLY_TIMEOUT_MS. Returns the phase timings in ms; the total up
+    to the renderer presenting the frame is reported via "profile.applied".
+    """
+    timeout = CONFIG.profile_apply_timeout_ms / 1000.0
+    started = time.perf_counter()
+    timing = {"profileId": profile.id, "started": started}
+    token = None
+    if renderer_sids:
+        with state_lock:
+            render = _merged_render(profile.render)
+        token = profile_applies.begin()
+        socketio.emit("render.prepare", {"token": token, "imageId": profile.image_id, "render": render}, to=RENDERER_ROOM)
+        timing["preRendered"] = profile_applies.wait_ready(token, timeout)
+        timing["prepareMs"] = _ms_since(started)
+    if profile.vcp and not ddc_controller.is_suspended():
+        written = Event()
+        results = {}
+
+        def _on_written(batch):
+            results.update(batch)
+            written.set()
+
+        ddc_started = time.perf_counter()
+        ddc_controller.set_many(profile.vcp, _on_written)
+        written.wait(timeout)
+        timing["ddcMs"] = _ms_since(ddc_started)
+        timing["ddcOk"] = bool(results) and all(result.ok for result in results.values())
+    elif profile.vcp:
+        # Held until the display is back, like any other write.
+        ddc_controller.set_many(profile.vcp)
+    # The profile picks its own image, which ends any slideshow.
+    playlist_player.stop()
+    with state_lock:
+        for section, values in _merged_render(profile.render).items():
+            setattr(state.render, section, values)
+        state.activeImageId = profile.image_id
+        state.activeProfileId = profile.id
+        state.bump()
+        _persist_state()
+    _broadcast_snapshot()
+    timing["commitMs"] = _ms_since(started)
+    phases = {key: value for key, value in timing.items() if key != "started"}
+    profile_applies.committed(token, timing)
+    return phases
+
+
+def _software_level_locked(now: float) -> float:
+    ramp = state.softwareRamp
+    if ramp:
+        return software_level(ramp["points"], (now - ramp["startAt"]) * 1000.0)
+    return float(state.render.output.get("dim", 1.0))
+
+
+def _start_software_ramp(info: dict, dim_to: float) -> None:
+    # The renderer follows the keyframes from the same start time as the DDC
+    # writes; "dim" already holds where it ends so a late snapshot is right.
+    with state_lock:
+        start = _software_level_locked(info["startAt"])
+        state.softwareRamp = {
+            "code": info["code"],
+            "startAt": info["startAt"],
+            "durationMs": info["durationMs"],
+            "points": software_points(start, dim_to, info["durationMs"], info["curve"]),
+        }
+        state.render.output["dim"] = dim_to
+        state.bump()
+        _persist_state()
+    _broadcast_snapshot()
+
+
+def _on_ramp_event(info: dict) -> None:
+    socketio.emit("ddc.ramp", info)
+    if info["status"] == "merged":
+        # The ramp replacing it sets up its own software part, if any.
+        return
+    with state_lock:
+        ramp = state.softwareRamp
+        if not ramp or ramp["code"] != info["code"]:
+            return
+        if info["status"] == "cancelled":
+            # Stay at the level reached, like the DDC value does.
+            state.render.output["dim"] = round(_software_level_locked(time.time()), 4)
+        state.softwareRamp = None
+        state.bump()
+        _persist_state()
+    _broadcast_snapshot()
+
+
+def _merged_render(sections: dict) -> dict:
+    # Profile sections are merged over the current values, not swapped in.
+    render = copy.deepcopy(state.render.__dict__)
+    for section, values in sections.items():
+        if isinstance(render.get(section), dict) and isinstance(values, dict):
+            render[section].update(values)
+        else:
+            render[section] = values
+    return render
+
+
+def _ms_since(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000.0, 1)
+
+
+def _on_profile_applied(timing: dict) -> None:
+    for key in ("prepareMs", "ddcMs", "commitMs", "totalMs"):
+        if key in timing:
+            PROFILE_APPLY_SECONDS.observe(timing[key] / 1000.0, phase=key[:-2])
+    socketio.emit("profile.applied", timing)
 
 
 def _persist_state() -> None:
+    # Only records the values; the persister writes them out in one batch
+    # off the request path.
     if state.activeProfileId:
-        set_state_value("active_profile_id", {"value": state.activeProfileId})
+        persister.mark("active_profile_id", {"value": state.activeProfileId})
+    persister.mark("active_image_id", {"value": state.activeImageId})
+    persister.mark("render", {"value": copy.deepcopy(state.render.__dict__)})
+    playlist = state.playlist
+    persister.mark("playlist", {"value": {"id": playlist["id"], "index": playlist["index"], "status": playlist["status"]} if playlist else None})
+
+
+def _snapshot() -> dict:
+    with state_lock:
+        return state.to_dict()
+
+
+def _broadcast_snapshot() -> None:
+    broadcaster.publish("state.snapshot", lambda: {"state": _snapshot()})
+
+
+def _ddc_payload() -> dict:
+    with state_lock:
+        return {"values": copy.deepcopy(state.ddc.values), "meta": dict(state.meta)}
+
+
+def _broadcast_ddc() -> None:
+    broadcaster.publish("ddc.updated", _ddc_payload)
 
 
 def _ddc_updated() -> None:
     with state_lock:
         state.bump()
-    try:
-        socketio.emit("ddc.updated", {"values": state.ddc.values, "meta": state.meta})
-    except Exception:
-        pass
+    _broadcast_ddc()
+
+
+def _not_modified(etag: str, cache: str):
+    # Content behind an id or hash never changes, so a matching validator
+    # can be answered without touching the disk.
+    CACHE_REQUESTS.inc(cache=cache, result="hit")
+    return _immutable(current_app.response_class(status=304, headers={"ETag": f'"{etag}"'}))
+
+
+def _send_immutable(path: str, mimetype: str, etag: str, cache: str):
+    # conditional=True makes Werkzeug answer If-None-Match,
+    # If-Modified-Since and byte Range requests. The body goes out through
+    # wsgi.file_wrapper (sendfile where the server supports it) or as an
+    # X-Sendfile header when USE_X_SENDFILE is set behind a proxy.
+    CACHE_REQUESTS.inc(cache=cache, result="miss")
+    return _immutable(send_file(path, mimetype=mimetype, etag=etag, conditional=True))
+
+
+def _immutable(response):
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+    return response
+
+
+def _int_arg(name: str, default: int | None = None) -> int | None:
+    # request.args.get(type=int) silently falls back to the default on bad
+    # input; raise instead so the caller can answer 400.
+    raw = request.args.get(name)
+    if raw is None or raw == "":
+        return default
+    return int(raw)
 
 
 def _sanitize_images(images: list[dict]) -> list[dict]:
@@ -351,6 +1132,11 @@ def _sanitize_images(images: list[dict]) -> list[dict]:
 
 
 if __name__ == "__main__":
+    # Turn SIGTERM from systemd into a normal exit so atexit handlers
+    # (pending state flush) run.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     app = create_app()
+    # allow_unsafe_werkzeug only matters in threading mode; gevent and
+    # eventlet serve through their own WSGI servers.
     socketio.run(app, host=CONFIG.bind_host, port=CONFIG.bind_port, allow_unsafe_werkzeug=True)
 
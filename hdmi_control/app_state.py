@@ -1,8 +1,10 @@
 import json
 from datetime import datetime
 from .db import db_conn
+from .blocking import offloaded
 
 
+@offloaded
 def get_state_value(key: str) -> dict | None:
     with db_conn() as conn:
         row = conn.execute("SELECT value_json FROM app_state WHERE key = ?", (key,)).fetchone()
@@ -11,6 +13,7 @@ def get_state_value(key: str) -> dict | None:
     return json.loads(row[0])
 
 
+@offloaded
 def set_state_value(key: str, value: dict) -> None:
     now = datetime.utcnow().isoformat() + "Z"
     with db_conn() as conn:
@@ -19,3 +22,14 @@ def set_state_value(key: str, value: dict) -> None:
             (key, json.dumps(value), now),
         )
         conn.commit()
+
+
+@offloaded
+def set_state_values(values: dict[str, dict]) -> None:
+    now = datetime.utcnow().isoformat() + "Z"
+    with db_conn() as conn:
+        conn.executemany(
+            "INSERT INTO app_state (key, value_json, updated_at) VALUES (?, ?, ?) ON CONFLICT(key) DO UPDATE SET value_json = excluded.value_json, updated_at = excluded.updated_at",
+            [(key, json.dumps(value), now) for key, value in values.items()],
+        )
+        conn.commit()
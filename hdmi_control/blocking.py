@@ -0,0 +1,75 @@
+from __future__ import annotations
+import functools
+import threading
+from typing import Any, Callable
+
+from .config import CONFIG
+
+
+SERVER_MODES = ("threading", "gevent", "eventlet")
+
+_local = threading.local()
+# Set once the process has actually been patched; child processes and
+# CLI tools that never call monkey_patch() always run inline.
+_active_mode = "threading"
+
+
+def monkey_patch(mode: str) -> None:
+    """Patch the standard library for a cooperative server mode.
+
+    Must run before anything else imports socket, threading or subprocess.
+    """
+    global _active_mode
+    if mode not in SERVER_MODES:
+        raise ValueError(f"Unknown SERVER_MODE: {mode}")
+    if mode == "gevent":
+        from gevent import monkey
+        monkey.patch_all()
+    elif mode == "eventlet":
+        import os
+        os.environ.setdefault("EVENTLET_THREADPOOL_SIZE", str(CONFIG.blocking_workers))
+        import eventlet
+        eventlet.monkey_patch()
+    _active_mode = mode
+
+
+def run_blocking(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run `fn` where it cannot stall the event loop.
+
+    In threading mode every request already has its own OS thread, so this
+    is a plain call. Under gevent/eventlet the call goes to the hub's native
+    thread pool, bounded by BLOCKING_WORKERS. Nested calls run inline so a
+    worker never waits on the pool it occupies.
+    """
+    mode = _active_mode
+    if mode == "threading" or getattr(_local, "in_worker", False):
+        return fn(*args, **kwargs)
+    if mode == "gevent":
+        import gevent
+        hub = gevent.get_hub()
+        if hub.threadpool.maxsize != CONFIG.blocking_workers:
+            hub.threadpool.maxsize = CONFIG.blocking_workers
+        return hub.threadpool.apply(_in_worker, (fn, args, kwargs))
+    from eventlet import tpool
+    return tpool.execute(_in_worker, fn, args, kwargs)
+
+
+def offloaded(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Decorator form of `run_blocking` for SQLite and PIL helpers.
+
+    Subprocess calls (ddcutil, xset) are not offloaded: once patched they
+    already wait cooperatively, and gevent cannot reap children from a
+    native pool thread.
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return run_blocking(fn, *args, **kwargs)
+    return wrapper
+
+
+def _in_worker(fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    _local.in_worker = True
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _local.in_worker = False
@@ -0,0 +1,129 @@
+from __future__ import annotations
+import json
+import threading
+import time
+from typing import Any, Callable
+
+from .config import CONFIG
+from .metrics import BROADCAST_EVENTS, BROADCAST_PAYLOAD_BYTES, BROADCAST_SKIPPED
+
+
+class BroadcastScheduler:
+    """Per-client, rate-limited delivery of the latest version of each event.
+
+    Publishers only record that an event changed; the payload is built at most
+    once per tick and delivered to every client that has not seen that version.
+    Clients that are still draining earlier packets are skipped, so they get
+    the newest payload once they catch up instead of a backlog of stale ones.
+    """
+
+    def __init__(
+        self,
+        emit: Callable[[str, Any, str], None],
+        max_hz: float | None = None,
+        backlog: Callable[[str], int] | None = None,
+    ):
+        self._emit = emit
+        self._interval = 1.0 / max(max_hz or CONFIG.broadcast_max_hz, 1.0)
+        self._backlog = backlog or (lambda sid: 0)
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._version = 0
+        self._latest: dict[str, tuple[int, Callable[[], Any]]] = {}
+        self._clients: dict[str, dict[str, int]] = {}
+        self._dirty = False
+        self._stop = False
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+
+    def start(self) -> None:
+        # See StatePersister.start: create_app() may run more than once.
+        with self._lock:
+            if self._thread.ident is None:
+                self._thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stop = True
+            self._wake.notify_all()
+
+    def add_client(self, sid: str) -> None:
+        # New clients receive a full snapshot on connect, so everything
+        # published so far counts as delivered.
+        with self._lock:
+            self._clients[sid] = {event: version for event, (version, _) in self._latest.items()}
+
+    def remove_client(self, sid: str) -> None:
+        with self._lock:
+            self._clients.pop(sid, None)
+
+    def publish(self, event: str, build: Callable[[], Any]) -> None:
+        with self._lock:
+            self._version += 1
+            self._latest[event] = (self._version, build)
+            self._dirty = True
+            self._wake.notify_all()
+
+    def _worker(self) -> None:
+        while True:
+            with self._lock:
+                while not self._dirty and not self._stop:
+                    self._wake.wait()
+                if self._stop:
+                    return
+                self._dirty = False
+                latest = dict(self._latest)
+                clients = {sid: dict(seen) for sid, seen in self._clients.items()}
+            started = time.monotonic()
+            self._flush(latest, clients)
+            elapsed = time.monotonic() - started
+            if elapsed < self._interval:
+                time.sleep(self._interval - elapsed)
+
+    def _flush(self, latest: dict[str, tuple[int, Callable[[], Any]]], clients: dict[str, dict[str, int]]) -> None:
+        ordered = sorted(latest.items(), key=lambda item: item[1][0])
+        payloads: dict[str, Any] = {}
+        skipped = False
+        for sid, seen in clients.items():
+            due = [(event, version, build) for event, (version, build) in ordered if seen.get(event, 0) < version]
+            if not due:
+                continue
+            if self._backlog(sid) > 0:
+                BROADCAST_SKIPPED.inc()
+                skipped = True
+                continue
+            for event, version, build in due:
+                if event not in payloads:
+                    try:
+                        payloads[event] = build()
+                    except Exception:
+                        payloads[event] = None
+                    else:
+                        _observe_size(event, payloads[event])
+                if payloads[event] is None:
+                    continue
+                try:
+                    self._emit(event, payloads[event], sid)
+                except Exception:
+                    continue
+                BROADCAST_EVENTS.inc(event=event)
+                seen[event] = version
+            with self._lock:
+                current = self._clients.get(sid)
+                if current is not None:
+                    for event, version in seen.items():
+                        if current.get(event, 0) < version:
+                            current[event] = version
+        if skipped:
+            with self._lock:
+                self._dirty = True
+
+
+def _observe_size(event: str, payload: Any) -> None:
+    # Built once per tick, so serializing here for the size costs one extra
+    # dumps per event rather than one per client.
+    if payload is None:
+        return
+    try:
+        BROADCAST_PAYLOAD_BYTES.observe(len(json.dumps(payload, default=str)), event=event)
+    except (TypeError, ValueError):
+        pass
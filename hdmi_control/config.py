@@ -6,20 +6,62 @@ from dataclasses import dataclass
 class AppConfig:
     bind_host: str = os.getenv("BIND_HOST", "0.0.0.0")
     bind_port: int = int(os.getenv("BIND_PORT", "5000"))
+    server_mode: str = os.getenv("SERVER_MODE", "threading")
+    blocking_workers: int = int(os.getenv("BLOCKING_WORKERS", "8"))
     data_dir: str = os.getenv("DATA_DIR", "data")
     db_path: str = os.getenv("DB_PATH", os.path.join("data", "screeny.db"))
     upload_max_mb: int = int(os.getenv("UPLOAD_MAX_MB", "25"))
+    use_x_sendfile: bool = os.getenv("USE_X_SENDFILE", "0") == "1"
+    image_workers: int = int(os.getenv("IMAGE_WORKERS", "2"))
+    import_workers: int = int(os.getenv("IMPORT_WORKERS", "0")) or (os.cpu_count() or 2)
+    import_batch_size: int = int(os.getenv("IMPORT_BATCH_SIZE", "200"))
+    # POST /api/images/import only reads sources under this directory.
+    import_root: str = os.getenv("IMPORT_ROOT", os.path.join(os.getenv("DATA_DIR", "data"), "import"))
+    max_image_megapixels: int = int(os.getenv("MAX_IMAGE_MEGAPIXELS", "400"))
+    tile_size: int = int(os.getenv("TILE_SIZE", "512"))
+    tile_min_megapixels: float = float(os.getenv("TILE_MIN_MEGAPIXELS", "40"))
     auth_token: str | None = os.getenv("AUTH_TOKEN")
 
+    db_pool: bool = os.getenv("DB_POOL", "1") == "1"
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "4"))
+    db_cache_kb: int = int(os.getenv("DB_CACHE_KB", "8192"))
+    db_mmap_mb: int = int(os.getenv("DB_MMAP_MB", "64"))
+    db_cached_statements: int = int(os.getenv("DB_CACHED_STATEMENTS", "256"))
+
     ddcutil_path: str = os.getenv("DDCUTIL_PATH", "/usr/bin/ddcutil")
     ddc_timeout_ms: int = int(os.getenv("DDC_TIMEOUT_MS", "2000"))
     ddc_retry_count: int = int(os.getenv("DDC_RETRY_COUNT", "1"))
     ddc_target: str = os.getenv("DDC_TARGET", "auto")
     ddc_coalesce_ms: int = int(os.getenv("DDC_COALESCE_MS", "75"))
+    # Assumed time of one VCP write until the controller has measured it.
+    ddc_ramp_latency_ms: int = int(os.getenv("DDC_RAMP_LATENCY_MS", "150"))
+
+    drm_sysfs_path: str = os.getenv("DRM_SYSFS_PATH", "/sys/class/drm")
+    hotplug_enabled: bool = os.getenv("HOTPLUG_ENABLED", "1") == "1"
+    hotplug_poll_ms: int = int(os.getenv("HOTPLUG_POLL_MS", "1000"))
+    hotplug_settle_ms: int = int(os.getenv("HOTPLUG_SETTLE_MS", "1500"))
+
+    persist_debounce_ms: int = int(os.getenv("PERSIST_DEBOUNCE_MS", "300"))
+    broadcast_max_hz: float = float(os.getenv("BROADCAST_MAX_HZ", "30"))
+
+    trace_enabled: bool = os.getenv("TRACE_ENABLED", "0") == "1"
+    trace_buffer_size: int = int(os.getenv("TRACE_BUFFER_SIZE", "20000"))
+    trace_slow_ms: float = float(os.getenv("TRACE_SLOW_MS", "0"))
 
     renderer_url: str = os.getenv("RENDERER_URL", "http://127.0.0.1:5000")
+    # How long a profile apply waits for the renderer's pre-render and for
+    # the DDC batch before committing anyway.
+    profile_apply_timeout_ms: int = int(os.getenv("PROFILE_APPLY_TIMEOUT_MS", "2000"))
+    # Scheduled profile switches: pre-warm this long before each one. Sun
+    # rules need the screen's coordinates (decimal degrees, east positive).
+    schedule_lead_s: float = float(os.getenv("SCHEDULE_LEAD_S", "30"))
+    latitude: float | None = float(os.environ["LATITUDE"]) if os.getenv("LATITUDE") else None
+    longitude: float | None = float(os.environ["LONGITUDE"]) if os.getenv("LONGITUDE") else None
 
     disable_dpms: bool = os.getenv("DISABLE_DPMS", "1") == "1"
+    # "x11" (xset), "console" (setterm/vcgencmd, for the framebuffer
+    # renderer without X) or "auto" (xset, falling back to the console).
+    sleep_mode: str = os.getenv("SLEEP_MODE", "auto")
 
 
 CONFIG = AppConfig()
@@ -1,7 +1,16 @@
 import os
+import queue
 import sqlite3
+import time
 from contextlib import contextmanager
 from .config import CONFIG
+from .metrics import DB_SECONDS
+
+
+def new_id() -> str:
+    """A new row id (ULID); ulid is imported on first use to keep startup fast."""
+    import ulid
+    return str(ulid.new())
 
 
 SCHEMA = """
@@ -16,6 +25,21 @@ CREATE TABLE IF NOT EXISTS images (
   created_at TEXT NOT NULL
 );
 
+CREATE INDEX IF NOT EXISTS idx_images_mime_type ON images (mime_type, id);
+CREATE INDEX IF NOT EXISTS idx_images_original_name ON images (original_name);
+
+CREATE TABLE IF NOT EXISTS blobs (
+  sha256 TEXT PRIMARY KEY,
+  storage_path TEXT NOT NULL,
+  mime_type TEXT NOT NULL,
+  width INTEGER NOT NULL,
+  height INTEGER NOT NULL,
+  orientation INTEGER NOT NULL DEFAULT 1,
+  size_bytes INTEGER NOT NULL,
+  ref_count INTEGER NOT NULL DEFAULT 0,
+  created_at TEXT NOT NULL
+);
+
 CREATE TABLE IF NOT EXISTS profiles (
   id TEXT PRIMARY KEY,
   name TEXT UNIQUE NOT NULL,
@@ -25,6 +49,25 @@ CREATE TABLE IF NOT EXISTS profiles (
   updated_at TEXT NOT NULL
 );
 
+CREATE TABLE IF NOT EXISTS playlists (
+  id TEXT PRIMARY KEY,
+  name TEXT UNIQUE NOT NULL,
+  items_json TEXT NOT NULL,
+  loop INTEGER NOT NULL DEFAULT 1,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS schedules (
+  id TEXT PRIMARY KEY,
+  name TEXT UNIQUE NOT NULL,
+  profile_id TEXT NOT NULL,
+  rule_json TEXT NOT NULL,
+  enabled INTEGER NOT NULL DEFAULT 1,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL
+);
+
 CREATE TABLE IF NOT EXISTS app_state (
   key TEXT PRIMARY KEY,
   value_json TEXT NOT NULL,
@@ -40,17 +83,110 @@ CREATE TABLE IF NOT EXISTS ddc_cache (
 """
 
 
+# Columns added after the first release. CREATE TABLE IF NOT EXISTS leaves
+# existing databases alone, so these are added on startup when missing.
+MIGRATIONS = {
+    "images": [
+        ("sha256", "TEXT"),
+        ("status", "TEXT NOT NULL DEFAULT 'ready'"),
+        ("orientation", "INTEGER NOT NULL DEFAULT 1"),
+        ("import_source", "TEXT"),
+        ("source_key", "TEXT"),
+        ("frame_count", "INTEGER NOT NULL DEFAULT 1"),
+        ("duration_ms", "INTEGER"),
+    ],
+    "blobs": [
+        ("frame_count", "INTEGER NOT NULL DEFAULT 1"),
+        ("duration_ms", "INTEGER"),
+    ],
+}
+
+# Indexes on migrated columns; created once the columns are guaranteed to exist.
+POST_MIGRATION = """
+CREATE INDEX IF NOT EXISTS idx_images_sha256 ON images (sha256);
+CREATE INDEX IF NOT EXISTS idx_images_import_source ON images (import_source, source_key);
+"""
+
+
+# Idle connections ready for reuse. Requests run on short-lived threads, so
+# connections are checked out per `db_conn()` block rather than pinned to a
+# thread. LIFO keeps the warmest connection (page cache, statement cache) busy.
+_pool: queue.LifoQueue = queue.LifoQueue()
+
+
 def init_db() -> None:
-    os.makedirs(os.path.dirname(CONFIG.db_path), exist_ok=True)
-    with sqlite3.connect(CONFIG.db_path) as conn:
+    os.makedirs(os.path.dirname(CONFIG.db_path) or ".", exist_ok=True)
+    with db_conn() as conn:
         conn.executescript(SCHEMA)
+        _migrate(conn)
+        conn.executescript(POST_MIGRATION)
         conn.commit()
 
 
+def _migrate(conn: sqlite3.Connection) -> None:
+    for table, columns in MIGRATIONS.items():
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, decl in columns:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        CONFIG.db_path,
+        timeout=5.0,
+        check_same_thread=False,
+        cached_statements=CONFIG.db_cached_statements,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA cache_size=-{CONFIG.db_cache_kb}")
+    conn.execute(f"PRAGMA mmap_size={CONFIG.db_mmap_mb * 1024 * 1024}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+
+def close_pool() -> None:
+    while True:
+        try:
+            conn = _pool.get_nowait()
+        except queue.Empty:
+            return
+        conn.close()
+
+
 @contextmanager
 def db_conn():
-    conn = sqlite3.connect(CONFIG.db_path)
+    start = time.perf_counter()
     try:
-        yield conn
+        with _checkout() as conn:
+            yield conn
     finally:
+        DB_SECONDS.observe(time.perf_counter() - start)
+
+
+@contextmanager
+def _checkout():
+    if not CONFIG.db_pool:
+        conn = sqlite3.connect(CONFIG.db_path)
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        conn = _connect()
+    try:
+        yield conn
+    except BaseException:
+        conn.close()
+        raise
+    # Match the old close() semantics: anything left uncommitted is dropped.
+    if conn.in_transaction:
+        conn.rollback()
+    if _pool.qsize() < CONFIG.db_pool_size:
+        _pool.put(conn)
+    else:
         conn.close()
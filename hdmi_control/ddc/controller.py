@@ -6,7 +6,11 @@ from typing import Callable
 
 from ..state import DdcState, now_iso
 from ..config import CONFIG
+from ..drm import list_displays
+from ..metrics import DDC_COALESCED, DDC_QUEUE_DEPTH, DDC_RETRIES
+from ..trace import traced
 from .ddcutil import DdcUtil, DdcUtilError
+from .ramp import MAX_DURATION_MS, Ramp, plan_ramp
 
 
 @dataclass
@@ -16,16 +20,27 @@ class DdcCommandResult:
     duration_ms: int | None
 
 
+RAMP_CODES = {"10": "brightness", "12": "contrast"}
+
+
 class DdcController:
     def __init__(self, state: DdcState, on_update: Callable[[], None], lock: threading.Lock | None = None):
         self.state = state
         self.on_update = on_update
         self.ddcutil = DdcUtil()
+        self.drm_path: str | None = None
         self._state_lock = lock
         self._lock = threading.Lock()
         self._pending: dict[str, int] = {}
+        self._batch_done: list[Callable[[dict[str, DdcCommandResult]], None]] = []
+        self._warm_requested = False
+        self._ramps: dict[str, Ramp] = {}
+        # Smoothed time of one successful VCP command on the current display.
+        self._latency_ms: float | None = None
+        self.on_ramp: Callable[[dict], None] | None = None
         self._wake = threading.Condition(self._lock)
         self._stop = False
+        self._suspended = False
         self._thread = threading.Thread(target=self._worker, daemon=True)
         self._target_args: list[str] = []
         self._preferred: dict[str, str | None] = {
@@ -33,10 +48,15 @@ class DdcController:
             "bus": None,
             "display_index": None,
         }
+        DDC_QUEUE_DEPTH.set_function(lambda: len(self._pending))
 
     def set_on_update(self, on_update: Callable[[], None]) -> None:
         self.on_update = on_update
 
+    def set_on_ramp(self, on_ramp: Callable[[dict], None]) -> None:
+        """`on_ramp(info)` is called when a ramp is done, cancelled or merged into a new one."""
+        self.on_ramp = on_ramp
+
     def start(self) -> None:
         self._thread.start()
 
@@ -45,18 +65,123 @@ class DdcController:
             self._stop = True
             self._wake.notify_all()
 
+    def suspend(self, reason: str) -> None:
+        """Hold DDC writes while the display is gone.
+
+        Writes keep coalescing in the queue and the latest value per code is
+        sent after `resume()`, instead of each one timing out on a dead bus.
+        """
+        with self._lock:
+            self._suspended = True
+        def _apply_suspend():
+            self.state.status = "unavailable"
+            self.state.lastError = reason
+        self._with_state_lock(_apply_suspend)
+        self.on_update()
+
+    def resume(self) -> None:
+        with self._lock:
+            self._suspended = False
+            self._wake.notify_all()
+
+    def is_suspended(self) -> bool:
+        with self._lock:
+            return self._suspended
+
     def set_brightness(self, value: int) -> None:
         self._enqueue("10", value)
 
     def set_contrast(self, value: int) -> None:
         self._enqueue("12", value)
 
-    def rescan(self) -> None:
+    def latency_ms(self) -> float:
+        return self._latency_ms if self._latency_ms is not None else float(CONFIG.ddc_ramp_latency_ms)
+
+    def ramp(self, code: str, target: int, duration_ms: float, curve: str = "linear") -> dict:
+        """Fade a VCP value to `target` over `duration_ms`; the worker does the writes.
+
+        Steps are planned from the measured command latency so the bus is
+        never oversubscribed. A new ramp on a code that is already ramping
+        starts from where the old one got to; an interactive write to the
+        code (`set_*`, `set_many`) cancels it. Returns the ramp's info.
+        """
+        key = RAMP_CODES.get(code)
+        if key is None:
+            raise ValueError("ramps support VCP 10 (brightness) and 12 (contrast)")
+        if not self.state.supported.get(key):
+            raise ValueError(f"{key.capitalize()} unsupported")
+        if not 0 <= duration_ms <= MAX_DURATION_MS:
+            raise ValueError(f"durationMs must be between 0 and {MAX_DURATION_MS}")
+        max_val = self.state.values[key].get("max") or 100
+        target = max(0, min(int(target), int(max_val)))
+        with self._lock:
+            running = self._ramps.get(code)
+            start = running.last if running and running.last is not None else self.state.values[key].get("cur")
+            if start is None:
+                raise ValueError(f"current {key} is unknown; rescan first")
+            share = len(self._ramps) + (0 if running else 1)
+            steps = plan_ramp(int(start), target, duration_ms, self.latency_ms(), curve, share)
+            ramp = Ramp(code, int(start), target, duration_ms, curve, time.monotonic(), time.time(), steps)
+            if steps:
+                self._ramps[code] = ramp
+            else:
+                self._ramps.pop(code, None)
+            self._wake.notify_all()
+        if running:
+            self._ramp_ended(running, "merged")
+        return dict(ramp.info(), status="running" if steps else "done")
+
+    def ramps(self) -> list[dict]:
+        with self._lock:
+            return [dict(ramp.info(), status="running") for ramp in self._ramps.values()]
+
+    def _ramp_ended(self, ramp: Ramp, status: str) -> None:
+        if self.on_ramp:
+            self.on_ramp(dict(ramp.info(), status=status))
+
+    def set_many(self, values: dict[str, int],
+                 on_done: Callable[[dict[str, DdcCommandResult]], None] | None = None) -> None:
+        """Queue several VCP writes so the worker sends them in one cycle.
+
+        Separate `set_*` calls can straddle a worker cycle and reach the
+        monitor a coalesce window apart. `on_done` gets the result per code
+        once the cycle that carries these writes has finished.
+        """
+        if not values:
+            if on_done:
+                on_done({})
+            return
+        with self._lock:
+            cancelled = [self._ramps.pop(code) for code in values if code in self._ramps]
+            for code, value in values.items():
+                if code in self._pending:
+                    DDC_COALESCED.inc(code=code)
+                self._pending[code] = value
+            if on_done:
+                self._batch_done.append(on_done)
+            self._wake.notify_all()
+        for ramp in cancelled:
+            self._ramp_ended(ramp, "cancelled")
+
+    def warm(self) -> None:
+        """Ask the worker for one cheap read ahead of a scheduled change.
+
+        Wakes the monitor's DDC/CI handler and refreshes the current
+        values, so the writes that follow do not pay that first-access cost.
+        Skipped when writes are already queued, since those wake it anyway.
+        """
+        with self._lock:
+            self._warm_requested = True
+            self._wake.notify_all()
+
+    @traced("DdcController.rescan", "ddc")
+    def rescan(self) -> bool:
+        """Pick the display and read its capabilities; True when a display answered."""
         try:
-            displays, ms = self.ddcutil.detect()
+            displays, ms = self._inventory()
             if not displays:
                 self._set_error("No displays detected")
-                return
+                return False
             display = self._select_display(displays)
             self._with_state_lock(lambda: setattr(self.state, "display", display))
             self._select_target(display)
@@ -78,6 +203,8 @@ class DdcController:
             except DdcUtilError:
                 contrast_err = "Contrast unsupported"
                 self._with_state_lock(lambda: self._set_supported("contrast", False))
+            # get_vcp costs about what a set_vcp does: seed the ramp planner with it.
+            self._latency_ms = float(max(ms_b, ms_c)) if max(ms_b, ms_c) else None
             def _apply_scan():
                 self.state.supported["vcp"] = [
                     "0x10" if bright and bright.cur is not None else None,
@@ -97,8 +224,21 @@ class DdcController:
                 self.state.lastCommandMs = max(ms_b, ms_c, ms)
             self._with_state_lock(_apply_scan)
             self.on_update()
+            return True
         except DdcUtilError as exc:
             self._set_error(str(exc))
+            return False
+
+    def _inventory(self) -> tuple[list[dict], int]:
+        # sysfs has every connector's EDID and DDC bus without any I2C
+        # traffic. detect is only needed when no connector exposes a ddc
+        # link, or when the preference is a ddcutil display number.
+        by_index = self._preferred["display_index"] and not (self._preferred["bus"] or self._preferred["connector"])
+        if not by_index:
+            displays = [d for d in list_displays(self.drm_path) if d.get("bus")]
+            if displays:
+                return displays, 0
+        return self.ddcutil.detect()
 
     def _select_target(self, display: dict) -> None:
         target = CONFIG.ddc_target
@@ -152,23 +292,71 @@ class DdcController:
 
     def _enqueue(self, code: str, value: int) -> None:
         with self._lock:
+            # An interactive write wins over a ramp on the same code.
+            cancelled = self._ramps.pop(code, None)
+            if code in self._pending:
+                DDC_COALESCED.inc(code=code)
             self._pending[code] = value
             self._wake.notify_all()
+        if cancelled:
+            self._ramp_ended(cancelled, "cancelled")
 
     def _worker(self) -> None:
         while True:
             with self._lock:
                 if self._stop:
                     return
-                if not self._pending:
-                    self._wake.wait(timeout=0.1)
+                now = time.monotonic()
+                # Ramp steps that came due; a ramp that fell behind jumps to
+                # its latest due value instead of queueing the ones it missed.
+                due = {}
+                if not self._suspended:
+                    for code, ramp in self._ramps.items():
+                        value = ramp.due(now)
+                        if value is not None:
+                            due[code] = (ramp, value)
+                if (not self._pending and not self._warm_requested and not due) or self._suspended:
+                    waits = [ramp.next_in(now) for ramp in self._ramps.values()]
+                    self._wake.wait(timeout=min([0.1] + [w for w in waits if w is not None]))
                     continue
-                self._wake.wait(timeout=CONFIG.ddc_coalesce_ms / 1000.0)
+                if self._pending:
+                    self._wake.wait(timeout=CONFIG.ddc_coalesce_ms / 1000.0)
                 pending = dict(self._pending)
                 self._pending.clear()
-            for code, value in pending.items():
-                self._apply(code, value)
+                for code, (ramp, value) in due.items():
+                    if self._ramps.get(code) is ramp:
+                        pending.setdefault(code, value)
+                finished = [ramp for ramp, _ in due.values() if ramp.finished and self._ramps.get(ramp.code) is ramp]
+                for ramp in finished:
+                    del self._ramps[ramp.code]
+                callbacks, self._batch_done = self._batch_done, []
+                warm, self._warm_requested = self._warm_requested, False
+            if warm and not pending:
+                self._read_back()
+            results = {code: self._apply(code, value) for code, value in pending.items()}
+            for callback in callbacks:
+                callback(results)
+            for ramp in finished:
+                self._ramp_ended(ramp, "done")
 
+    @traced("DdcController._read_back", "ddc")
+    def _read_back(self) -> None:
+        code, key = ("10", "brightness") if self.state.supported.get("brightness") else ("12", "contrast")
+        if not self.state.supported.get(key):
+            return
+        try:
+            value, duration_ms = self.ddcutil.get_vcp(code, self._target_args)
+        except DdcUtilError:
+            return
+        def _apply_read():
+            if value.cur is not None:
+                self.state.values[key]["cur"] = value.cur
+            self.state.lastOkAt = now_iso()
+            self.state.lastCommandMs = duration_ms
+        self._with_state_lock(_apply_read)
+        self.on_update()
+
+    @traced("DdcController._apply", "ddc")
     def _apply(self, code: str, value: int) -> DdcCommandResult:
         if code == "10" and not self.state.supported.get("brightness"):
             return DdcCommandResult(False, "Brightness unsupported", None)
@@ -177,15 +365,21 @@ class DdcController:
         max_val = 100
         if code == "10":
             max_val = self.state.values["brightness"].get("max") or 100
-        if code == "12":
+        elif code == "12":
             max_val = self.state.values["contrast"].get("max") or 100
+        else:
+            # Other codes come from a profile's extraVcp; VCP values are 16 bit.
+            max_val = 0xFFFF
         value = max(0, min(int(value), int(max_val)))
         retries = CONFIG.ddc_retry_count + 1
         last_error = None
         duration_ms = None
-        for _ in range(retries):
+        for attempt in range(retries):
+            if attempt:
+                DDC_RETRIES.inc(code=code)
             try:
                 duration_ms = self.ddcutil.set_vcp(code, value, self._target_args)
+                self._observe_latency(duration_ms)
                 def _apply_ok():
                     if code == "10":
                         self.state.values["brightness"]["cur"] = value
@@ -204,6 +398,14 @@ class DdcController:
         self._set_error(last_error or "DDC failure")
         return DdcCommandResult(False, last_error, duration_ms)
 
+    def _observe_latency(self, duration_ms: int | None) -> None:
+        if not duration_ms:
+            return
+        if self._latency_ms is None:
+            self._latency_ms = float(duration_ms)
+        else:
+            self._latency_ms = 0.8 * self._latency_ms + 0.2 * duration_ms
+
     def _set_error(self, message: str) -> None:
         def _apply_error():
             self.state.status = "degraded" if self.state.display else "unavailable"
@@ -2,6 +2,8 @@ import subprocess
 import time
 from .parser import parse_getvcp, parse_detect, VcpValue
 from ..config import CONFIG
+from ..metrics import DDC_COMMAND_SECONDS, DDC_FAILURES
+from ..trace import span
 
 
 class DdcUtilError(RuntimeError):
@@ -15,13 +17,19 @@ class DdcUtil:
     def _run(self, args: list[str], timeout_ms: int | None = None) -> str:
         timeout = (timeout_ms or CONFIG.ddc_timeout_ms) / 1000.0
         cmd = [self.path] + args
+        op, code = _labels(args)
+        start = time.perf_counter()
         try:
-            start = time.perf_counter()
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+            with span("ddcutil", "ddc", op=op, code=code):
+                result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
             duration_ms = int((time.perf_counter() - start) * 1000)
         except subprocess.TimeoutExpired as exc:
+            DDC_COMMAND_SECONDS.observe(time.perf_counter() - start, op=op, code=code)
+            DDC_FAILURES.inc(op=op, code=code)
             raise DdcUtilError(f"ddcutil timeout after {timeout_ms}ms") from exc
+        DDC_COMMAND_SECONDS.observe(time.perf_counter() - start, op=op, code=code)
         if result.returncode != 0:
+            DDC_FAILURES.inc(op=op, code=code)
             raise DdcUtilError(result.stderr.strip() or result.stdout.strip() or "ddcutil error")
         return result.stdout.strip(), duration_ms
 
@@ -59,3 +67,9 @@ class DdcUtil:
     def set_vcp(self, code: str, value: int, target_args: list[str]) -> int:
         _, ms = self._run(["setvcp", code, str(value)] + target_args)
         return ms
+
+
+def _labels(args: list[str]) -> tuple[str, str]:
+    op = args[0] if args else ""
+    code = args[1].upper() if op in ("getvcp", "setvcp") and len(args) > 1 else ""
+    return op, code
@@ -0,0 +1,120 @@
+from __future__ import annotations
+from dataclasses import dataclass, field
+
+# Easing curves over [0, 1]. "ease" is smoothstep.
+CURVES = {
+    "linear": lambda x: x,
+    "ease": lambda x: x * x * (3 - 2 * x),
+    "ease-in": lambda x: x * x,
+    "ease-out": lambda x: 1 - (1 - x) * (1 - x),
+}
+
+# Leave the bus some slack beyond the measured command time, and never
+# plan writes closer together than this however fast the monitor is.
+HEADROOM = 1.25
+MIN_INTERVAL_MS = 40.0
+MAX_DURATION_MS = 3_600_000
+SOFTWARE_POINTS = 32
+
+
+def curve_value(curve: str, fraction: float) -> float:
+    if curve not in CURVES:
+        raise ValueError(f"curve must be one of {', '.join(CURVES)}")
+    return CURVES[curve](min(1.0, max(0.0, fraction)))
+
+
+def plan_ramp(start: int, target: int, duration_ms: float, latency_ms: float, curve: str = "linear",
+              bus_share: int = 1) -> list[tuple[float, int]]:
+    """Plan the writes of a ramp as (offset ms, value) pairs.
+
+    Writes are spaced at least one measured command time (plus HEADROOM)
+    apart, times the number of ramps sharing the bus, so the queue never
+    grows. There are never more writes than integer values between start
+    and target, consecutive equal values are dropped, and the last write
+    lands on `target` at `duration_ms`.
+    """
+    curve_value(curve, 0.0)
+    span = abs(target - start)
+    if span == 0:
+        return []
+    if duration_ms <= 0:
+        return [(0.0, target)]
+    interval = max(MIN_INTERVAL_MS, latency_ms * HEADROOM * max(1, bus_share))
+    steps = max(1, min(span, int(duration_ms // interval)))
+    plan: list[tuple[float, int]] = []
+    last = start
+    for n in range(1, steps + 1):
+        value = target if n == steps else round(start + (target - start) * curve_value(curve, n / steps))
+        if value == last:
+            continue
+        plan.append((duration_ms * n / steps, value))
+        last = value
+    return plan
+
+
+def software_points(start: float, target: float, duration_ms: float, curve: str) -> list[list[float]]:
+    """Keyframes [offset ms, level] for the renderer's matching software ramp.
+
+    The renderer interpolates linearly between them, so it follows the
+    same curve as the DDC writes without having to know the curve.
+    """
+    return [[round(duration_ms * n / SOFTWARE_POINTS, 1),
+             round(start + (target - start) * curve_value(curve, n / SOFTWARE_POINTS), 4)]
+            for n in range(SOFTWARE_POINTS + 1)]
+
+
+def software_level(points: list[list[float]], elapsed_ms: float) -> float:
+    """Level of a software ramp `elapsed_ms` after it started."""
+    if elapsed_ms <= points[0][0]:
+        return points[0][1]
+    for (t0, v0), (t1, v1) in zip(points, points[1:]):
+        if elapsed_ms <= t1:
+            return v0 + (v1 - v0) * (elapsed_ms - t0) / ((t1 - t0) or 1.0)
+    return points[-1][1]
+
+
+@dataclass
+class Ramp:
+    code: str
+    start: int
+    target: int
+    duration_ms: float
+    curve: str
+    started: float
+    started_at: float
+    steps: list[tuple[float, int]] = field(default_factory=list)
+    index: int = 0
+    last: int | None = None
+
+    def due(self, now: float) -> int | None:
+        """Value to write at monotonic `now`, skipping steps the bus fell behind on."""
+        elapsed_ms = (now - self.started) * 1000.0
+        value = None
+        while self.index < len(self.steps) and self.steps[self.index][0] <= elapsed_ms:
+            value = self.steps[self.index][1]
+            self.index += 1
+        if value is not None:
+            self.last = value
+        return value
+
+    def next_in(self, now: float) -> float | None:
+        if self.index >= len(self.steps):
+            return None
+        return max(0.0, self.started + self.steps[self.index][0] / 1000.0 - now)
+
+    @property
+    def finished(self) -> bool:
+        return self.index >= len(self.steps)
+
+    def info(self) -> dict:
+        return {
+            "code": self.code,
+            "from": self.start,
+            "to": self.target,
+            "durationMs": self.duration_ms,
+            "curve": self.curve,
+            "startAt": self.started_at,
+            "steps": len(self.steps),
+            "written": self.index,
+            "intervalMs": round(self.steps[0][0], 1) if self.steps else None,
+        }
@@ -1,17 +1,20 @@
 import os
 
+from .config import CONFIG
 
-DRM_PATH = "/sys/class/drm"
 
+DRM_PATH = CONFIG.drm_sysfs_path
 
-def list_connectors() -> list[dict]:
+
+def list_connectors(path: str | None = None) -> list[dict]:
+    path = path or DRM_PATH
     connectors = []
-    if not os.path.isdir(DRM_PATH):
+    if not os.path.isdir(path):
         return connectors
-    for name in os.listdir(DRM_PATH):
+    for name in os.listdir(path):
         if "-" not in name:
             continue
-        status_path = os.path.join(DRM_PATH, name, "status")
+        status_path = os.path.join(path, name, "status")
         if not os.path.exists(status_path):
             continue
         try:
@@ -26,3 +29,101 @@ def list_connectors() -> list[dict]:
         })
     connectors.sort(key=lambda c: c["name"])
     return connectors
+
+
+EDID_HEADER = b"\x00\xff\xff\xff\xff\xff\xff\x00"
+
+
+def parse_edid(data: bytes) -> dict | None:
+    """Decode the identity and preferred mode from an EDID base block.
+
+    Returns None for empty or malformed data (disconnected connectors expose
+    an empty edid file).
+    """
+    if len(data) < 128 or data[:8] != EDID_HEADER:
+        return None
+    vendor = (data[8] << 8) | data[9]
+    manufacturer = "".join(chr(((vendor >> shift) & 0x1F) + 64) for shift in (10, 5, 0))
+    info = {
+        "manufacturer": manufacturer,
+        "product": data[10] | (data[11] << 8),
+        "serial": int.from_bytes(data[12:16], "little") or None,
+        "year": 1990 + data[17] if data[17] else None,
+        "name": None,
+        "serial_text": None,
+        "preferred_mode": None,
+        "checksum_ok": sum(data[:128]) % 256 == 0,
+    }
+    for offset in (54, 72, 90, 108):
+        block = data[offset:offset + 18]
+        pixel_clock = block[0] | (block[1] << 8)
+        if pixel_clock:
+            if info["preferred_mode"] is None:
+                info["preferred_mode"] = _detailed_timing(block, pixel_clock)
+            continue
+        tag = block[3]
+        if tag in (0xFC, 0xFF):
+            text = block[5:18].split(b"\n", 1)[0].decode("ascii", "replace").strip()
+            info["name" if tag == 0xFC else "serial_text"] = text or None
+    return info
+
+
+def _detailed_timing(block: bytes, pixel_clock: int) -> dict:
+    h_active = block[2] | ((block[4] & 0xF0) << 4)
+    h_blank = block[3] | ((block[4] & 0x0F) << 8)
+    v_active = block[5] | ((block[7] & 0xF0) << 4)
+    v_blank = block[6] | ((block[7] & 0x0F) << 8)
+    total = (h_active + h_blank) * (v_active + v_blank)
+    refresh = pixel_clock * 10_000 / total if total else 0.0
+    return {
+        "width": h_active,
+        "height": v_active,
+        "refresh": round(refresh, 2),
+        "interlaced": bool(block[17] & 0x80),
+    }
+
+
+def read_edid(name: str, path: str | None = None) -> dict | None:
+    try:
+        with open(os.path.join(path or DRM_PATH, name, "edid"), "rb") as f:
+            return parse_edid(f.read())
+    except OSError:
+        return None
+
+
+def connector_bus(name: str, path: str | None = None) -> str | None:
+    """I2C bus number behind the connector's `ddc` symlink, e.g. "3" for /dev/i2c-3."""
+    link = os.path.join(path or DRM_PATH, name, "ddc")
+    if not os.path.exists(link):
+        return None
+    target = os.path.basename(os.path.realpath(link))
+    if target.startswith("i2c-") and target[4:].isdigit():
+        return target[4:]
+    return None
+
+
+def list_displays(path: str | None = None) -> list[dict]:
+    """Connected connectors with their EDID identity and DDC bus.
+
+    Everything comes from sysfs, so no I2C traffic is involved. Entries use
+    the same keys as `parse_detect` (connector, bus, model, serial) so they
+    can stand in for `ddcutil detect` results.
+    """
+    displays = []
+    for connector in list_connectors(path):
+        if not connector["connected"]:
+            continue
+        edid = read_edid(connector["name"], path)
+        display = {
+            "connector": connector["name"],
+            "bus": connector_bus(connector["name"], path),
+            "edid": edid,
+            "source": "sysfs",
+        }
+        if edid:
+            display["model"] = edid["name"] or f"{edid['manufacturer']} {edid['product']:04X}"
+            serial = edid["serial_text"] or (str(edid["serial"]) if edid["serial"] else None)
+            if serial:
+                display["serial"] = serial
+        displays.append(display)
+    return displays
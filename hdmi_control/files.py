@@ -0,0 +1,33 @@
+"""Temp files and directories that are renamed into place as stored ones.
+
+`tempfile.mkstemp` and `mkdtemp` create entries only their owner can
+read, and a rename keeps that mode. Stored images, thumbnails and tiles
+must get the mode a plain `open()` or `os.makedirs` would give them: a
+proxy serving them with X-Sendfile often runs as another user.
+"""
+import os
+import tempfile
+
+
+def _read_umask() -> int:
+    # os.umask can only be read by setting it; do that once, at import.
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+UMASK = _read_umask()
+
+
+def mkstemp(dir: str, suffix: str) -> tuple[int, str]:
+    """Like `tempfile.mkstemp`, but with the umask-derived file mode."""
+    fd, path = tempfile.mkstemp(dir=dir, suffix=suffix)
+    os.fchmod(fd, 0o666 & ~UMASK)
+    return fd, path
+
+
+def mkdtemp(dir: str, suffix: str) -> str:
+    """Like `tempfile.mkdtemp`, but with the umask-derived directory mode."""
+    path = tempfile.mkdtemp(dir=dir, suffix=suffix)
+    os.chmod(path, 0o777 & ~UMASK)
+    return path
@@ -0,0 +1,104 @@
+from __future__ import annotations
+import threading
+from typing import Callable
+
+from .config import CONFIG
+from .drm import list_connectors
+
+
+class ConnectorWatcher:
+    """Reports DRM connector status changes.
+
+    With pyudev installed and the real sysfs tree in use, the watcher wakes
+    on kernel "drm" change events and re-reads connector status. Otherwise
+    (or between events) it polls every `poll_ms`. sysfs attributes do not
+    raise inotify events, so polling is the fallback; pointing
+    DRM_SYSFS_PATH at a fake tree exercises the same path in tests.
+
+    `on_change` receives a list of dicts with name, status, connected and
+    previous (None for connectors that just appeared).
+    """
+
+    def __init__(
+        self,
+        on_change: Callable[[list[dict]], None],
+        path: str | None = None,
+        poll_ms: int | None = None,
+        use_udev: bool | None = None,
+    ):
+        self.on_change = on_change
+        self.path = path or CONFIG.drm_sysfs_path
+        self._interval = (poll_ms or CONFIG.hotplug_poll_ms) / 1000.0
+        self._use_udev = (self.path == "/sys/class/drm") if use_udev is None else use_udev
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._stop = False
+        self._known: dict[str, str] = {}
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+
+    def start(self) -> None:
+        # See StatePersister.start: create_app() may run more than once.
+        with self._lock:
+            if self._thread.ident is not None:
+                return
+            self._known = {c["name"]: c["status"] for c in list_connectors(self.path)}
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stop = True
+            self._wake.notify_all()
+
+    def connectors(self) -> list[dict]:
+        return list_connectors(self.path)
+
+    def check_now(self) -> list[dict]:
+        """Compare current connector status with the last seen and report changes."""
+        current = {c["name"]: c["status"] for c in list_connectors(self.path)}
+        changes = []
+        for name, status in current.items():
+            previous = self._known.get(name)
+            if previous != status:
+                changes.append({"name": name, "status": status, "connected": status == "connected", "previous": previous})
+        for name, previous in self._known.items():
+            if name not in current:
+                changes.append({"name": name, "status": "removed", "connected": False, "previous": previous})
+        self._known = current
+        if changes:
+            try:
+                self.on_change(changes)
+            except Exception:
+                pass
+        return changes
+
+    def _worker(self) -> None:
+        monitor = self._udev_monitor() if self._use_udev else None
+        while True:
+            with self._lock:
+                if self._stop:
+                    return
+                if monitor is None:
+                    self._wake.wait(timeout=self._interval)
+                    if self._stop:
+                        return
+            if monitor is not None:
+                # Any drm event (or the poll timeout) triggers a re-read;
+                # the event itself does not say which connector changed.
+                try:
+                    monitor.poll(timeout=self._interval)
+                except Exception:
+                    monitor = None
+            self.check_now()
+
+    def _udev_monitor(self):
+        try:
+            import pyudev
+        except ImportError:
+            return None
+        try:
+            monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+            monitor.filter_by("drm")
+            monitor.start()
+            return monitor
+        except Exception:
+            return None
@@ -1,79 +1,677 @@
 import os
+import sys
 import json
-import magic
-from io import BytesIO
+import shutil
+import time
+import hashlib
+import tarfile
+import zipfile
+import argparse
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from datetime import datetime
-from PIL import Image
-import ulid
+from typing import Callable
 
 from .config import CONFIG
-from .db import db_conn
+from .db import db_conn, new_id
+from .blocking import offloaded
+from .files import mkstemp
+from .metrics import UPLOAD_SECONDS
+from .imaging import pil_image, sniff_mime
+from .thumbs import ensure_thumb, delete_thumbs, THUMB_SIZES
+from .tiles import build_pyramid, delete_tiles, should_tile
 
 
 IMAGE_DIR = os.path.join(CONFIG.data_dir, "images")
+BLOB_DIR = os.path.join(IMAGE_DIR, "blobs")
+CHUNK_SIZE = 1024 * 1024
+SNIFF_BYTES = 8192
+EXIF_ORIENTATION = 0x0112
+SPOOL_SUFFIX = ".import"
+SPOOL_MAX_AGE_S = 3600
 
 
 def ensure_dirs() -> None:
     os.makedirs(IMAGE_DIR, exist_ok=True)
 
 
-def list_images() -> list[dict]:
+LIST_COLUMNS = ["id", "original_name", "mime_type", "width", "height", "size_bytes", "created_at", "status", "sha256", "frame_count", "duration_ms"]
+BLOB_COLUMNS = ["sha256", "storage_path", "mime_type", "width", "height", "orientation", "size_bytes", "ref_count", "frame_count", "duration_ms"]
+LIST_LIMIT_DEFAULT = 60
+LIST_LIMIT_MAX = 500
+
+
+@offloaded
+def list_images(
+    after: str | None = None,
+    limit: int = LIST_LIMIT_DEFAULT,
+    mime_type: str | None = None,
+    name_prefix: str | None = None,
+    min_width: int | None = None,
+    min_height: int | None = None,
+    max_width: int | None = None,
+    max_height: int | None = None,
+) -> tuple[list[dict], str | None]:
+    """Return one page of images, newest first, and the cursor for the next page.
+
+    ULIDs sort by creation time, so the id doubles as the keyset cursor.
+    """
+    limit = max(1, min(int(limit), LIST_LIMIT_MAX))
+    clauses = []
+    params: list = []
+    if after:
+        clauses.append("id < ?")
+        params.append(after)
+    if mime_type:
+        clauses.append("mime_type = ?")
+        params.append(mime_type)
+    if name_prefix:
+        # Range scan instead of LIKE so the original_name index is usable.
+        clauses.append("original_name >= ? AND original_name < ?")
+        params.extend([name_prefix, name_prefix[:-1] + chr(ord(name_prefix[-1]) + 1)])
+    for column, op, value in (
+        ("width", ">=", min_width),
+        ("height", ">=", min_height),
+        ("width", "<=", max_width),
+        ("height", "<=", max_height),
+    ):
+        if value is not None:
+            clauses.append(f"{column} {op} ?")
+            params.append(int(value))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    sql = f"SELECT {', '.join(LIST_COLUMNS)} FROM images {where} ORDER BY id DESC LIMIT ?"
+    params.append(limit + 1)
     with db_conn() as conn:
-        rows = conn.execute("SELECT * FROM images ORDER BY created_at DESC").fetchall()
-    columns = ["id", "original_name", "storage_path", "mime_type", "width", "height", "size_bytes", "created_at"]
-    return [dict(zip(columns, row)) for row in rows]
+        rows = conn.execute(sql, params).fetchall()
+    items = [dict(zip(LIST_COLUMNS, row)) for row in rows[:limit]]
+    next_cursor = items[-1]["id"] if len(rows) > limit else None
+    return items, next_cursor
+
+
+@offloaded
+def get_image(image_id: str) -> dict | None:
+    with db_conn() as conn:
+        row = conn.execute(f"SELECT {', '.join(LIST_COLUMNS)} FROM images WHERE id = ?", (image_id,)).fetchone()
+    if not row:
+        return None
+    return dict(zip(LIST_COLUMNS, row))
 
 
 def add_image(file_storage) -> dict:
+    """Stream an upload to disk and register it.
+
+    Files are stored once per SHA-256 in `blobs`; uploading content that is
+    already stored only adds an image row and bumps the blob's ref count.
+    Only the header is parsed here; thumbnails and other derivatives are
+    produced later by `process_image` on a worker thread.
+    """
     ensure_dirs()
-    raw = file_storage.read()
-    size = len(raw)
-    if size > CONFIG.upload_max_mb * 1024 * 1024:
-        raise ValueError("File too large")
-    mime = magic.from_buffer(raw, mime=True)
+    original_name = file_storage.filename or ""
+    ext = os.path.splitext(original_name)[1] or ".img"
+    start = time.perf_counter()
+    tmp_path, size, sha256, head = _receive(file_storage.stream)
+    received = time.perf_counter()
+    UPLOAD_SECONDS.observe(received - start, stage="receive")
+    try:
+        return _store_upload(tmp_path, size, sha256, head, original_name, ext)
+    finally:
+        UPLOAD_SECONDS.observe(time.perf_counter() - received, stage="store")
+
+
+@offloaded
+def _store_upload(tmp_path: str, size: int, sha256: str, head: bytes, original_name: str, ext: str) -> dict:
+    try:
+        known = get_blob(sha256)
+        meta = None
+        if known is None or not os.path.exists(known["storage_path"]):
+            meta = _probe_upload(tmp_path, head)
+        image_id = new_id()
+        now = datetime.utcnow().isoformat() + "Z"
+        with db_conn() as conn:
+            # The lookup, the file move and the ref increment share one write
+            # lock, so a concurrent delete_image cannot drop the blob between
+            # them.
+            conn.execute("BEGIN IMMEDIATE")
+            blob = _blob_row(conn, sha256)
+            deduplicated = blob is not None and os.path.exists(blob["storage_path"])
+            if not deduplicated:
+                if meta is None:
+                    # Its file went away since the first look.
+                    meta = _probe_upload(tmp_path, head)
+                blob = dict(meta, sha256=sha256, storage_path=blob_path(sha256, ext), size_bytes=size)
+                os.makedirs(os.path.dirname(blob["storage_path"]), exist_ok=True)
+                os.replace(tmp_path, blob["storage_path"])
+                # Rows still pointing at a lost file get the new one.
+                conn.execute("UPDATE images SET storage_path = ? WHERE sha256 = ?", (blob["storage_path"], sha256))
+            status = "processing"
+            if deduplicated:
+                row = conn.execute("SELECT status FROM images WHERE sha256 = ? AND status = 'ready' LIMIT 1", (sha256,)).fetchone()
+                status = "ready" if row else "processing"
+            _insert_image(conn, image_id, original_name, blob, status, now)
+            conn.commit()
+    finally:
+        # Only a duplicate (or a failed upload) still has its temp file.
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return {
+        "id": image_id,
+        "original_name": original_name,
+        "storage_path": blob["storage_path"],
+        "mime_type": blob["mime_type"],
+        "width": blob["width"],
+        "height": blob["height"],
+        "size_bytes": blob["size_bytes"],
+        "created_at": now,
+        "status": status,
+        "sha256": sha256,
+        "frame_count": blob["frame_count"],
+        "duration_ms": blob["duration_ms"],
+        "deduplicated": deduplicated,
+    }
+
+
+def _probe_upload(tmp_path: str, head: bytes) -> dict:
+    mime = sniff_mime(head)
     if not mime.startswith("image/"):
         raise ValueError("Invalid image type")
-    image = Image.open(BytesIO(raw))
-    image.load()
-    image_id = str(ulid.new())
-    ext = os.path.splitext(file_storage.filename or "")[1] or ".img"
-    storage_path = os.path.join(IMAGE_DIR, f"{image_id}{ext}")
-    with open(storage_path, "wb") as f:
-        f.write(raw)
-    now = datetime.utcnow().isoformat() + "Z"
-    with db_conn() as conn:
-        conn.execute(
-            "INSERT INTO images (id, original_name, storage_path, mime_type, width, height, size_bytes, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-            (image_id, file_storage.filename or "", storage_path, mime, image.width, image.height, size, now),
-        )
-        conn.commit()
+    width, height, orientation, frame_count, duration_ms = probe_image(tmp_path)
     return {
-        "id": image_id,
-        "original_name": file_storage.filename or "",
-        "storage_path": storage_path,
         "mime_type": mime,
-        "width": image.width,
-        "height": image.height,
-        "size_bytes": size,
-        "created_at": now,
+        "width": width,
+        "height": height,
+        "orientation": orientation,
+        "frame_count": frame_count,
+        "duration_ms": duration_ms,
     }
 
 
+def _insert_image(conn, image_id: str, original_name: str, blob: dict, status: str, now: str, source: tuple[str, str] | None = None) -> None:
+    import_source, source_key = source or (None, None)
+    frame_count = blob.get("frame_count") or 1
+    duration_ms = blob.get("duration_ms")
+    conn.execute(
+        "INSERT INTO blobs (sha256, storage_path, mime_type, width, height, orientation, size_bytes, ref_count, created_at, frame_count, duration_ms) VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?, ?, ?) "
+        "ON CONFLICT(sha256) DO UPDATE SET ref_count = ref_count + 1, storage_path = excluded.storage_path",
+        (blob["sha256"], blob["storage_path"], blob["mime_type"], blob["width"], blob["height"], blob["orientation"], blob["size_bytes"], now, frame_count, duration_ms),
+    )
+    conn.execute(
+        "INSERT INTO images (id, original_name, storage_path, mime_type, width, height, size_bytes, created_at, sha256, status, orientation, import_source, source_key, frame_count, duration_ms) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (image_id, original_name, blob["storage_path"], blob["mime_type"], blob["width"], blob["height"], blob["size_bytes"], now, blob["sha256"], status, blob["orientation"], import_source, source_key, frame_count, duration_ms),
+    )
+
+
+def blob_path(sha256: str, ext: str) -> str:
+    return os.path.join(BLOB_DIR, sha256[:2], f"{sha256}{ext.lower()}")
+
+
+@offloaded
+def get_blob(sha256: str) -> dict | None:
+    with db_conn() as conn:
+        return _blob_row(conn, sha256)
+
+
+def _blob_row(conn, sha256: str) -> dict | None:
+    row = conn.execute(f"SELECT {', '.join(BLOB_COLUMNS)} FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+    return dict(zip(BLOB_COLUMNS, row)) if row else None
+
+
+def _receive(stream) -> tuple[str, int, str, bytes]:
+    """Copy `stream` into a temp file in IMAGE_DIR in fixed-size chunks.
+
+    Returns the temp path, byte count, SHA-256 hex digest and the first
+    SNIFF_BYTES for MIME detection.
+    """
+    max_bytes = CONFIG.upload_max_mb * 1024 * 1024
+    digest = hashlib.sha256()
+    head = b""
+    size = 0
+    fd, tmp_path = mkstemp(dir=IMAGE_DIR, suffix=".upload")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValueError("File too large")
+                if len(head) < SNIFF_BYTES:
+                    head += chunk[:SNIFF_BYTES - len(head)]
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, size, digest.hexdigest(), head
+
+
+@offloaded
+def probe_image(path: str) -> tuple[int, int, int, int, int | None]:
+    """Read width, height, EXIF orientation and animation length without decoding pixels.
+
+    Width and height are reported as displayed, i.e. swapped for
+    orientations that rotate by 90 degrees. For animated GIF, WebP and APNG
+    files the frame count and total duration come from walking the frame
+    headers; still images report one frame and no duration.
+    """
+    Image = pil_image()
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+            orientation = image.getexif().get(EXIF_ORIENTATION, 1) or 1
+            frame_count, duration_ms = _probe_frames(image)
+    except (OSError, SyntaxError, EOFError, Image.DecompressionBombError) as exc:
+        raise ValueError("Invalid image") from exc
+    if orientation in (5, 6, 7, 8):
+        width, height = height, width
+    return width, height, int(orientation), frame_count, duration_ms
+
+
+def _probe_frames(image) -> tuple[int, int | None]:
+    if not getattr(image, "is_animated", False):
+        return 1, None
+    frame_count = image.n_frames
+    duration_ms = 0
+    for index in range(frame_count):
+        image.seek(index)
+        duration_ms += frame_duration_ms(image.info.get("duration"))
+    return frame_count, duration_ms
+
+
+def frame_duration_ms(value) -> int:
+    """Per-frame delay as browsers play it: missing or <= 10 ms means 100 ms."""
+    try:
+        duration = int(value or 0)
+    except (TypeError, ValueError):
+        duration = 0
+    return duration if duration > 10 else 100
+
+
+def process_image(image_id: str, cache_key: str, storage_path: str, progress: Callable[[str, float], None] | None = None, tiles: str = "auto") -> None:
+    """Produce the derivatives for a freshly uploaded image and mark it ready.
+
+    `tiles` chooses whether to build a tiled pyramid: "1", "0" or "auto"
+    (images of TILE_MIN_MEGAPIXELS or more).
+    """
+    report = progress or (lambda stage, fraction: None)
+    try:
+        for index, size in enumerate(THUMB_SIZES):
+            report("thumbnails", index / len(THUMB_SIZES))
+            ensure_thumb(cache_key, storage_path, size)
+        report("thumbnails", 1.0)
+        with pil_image().open(storage_path) as image:
+            width, height = image.size
+        if should_tile(width, height, tiles):
+            build_pyramid(cache_key, storage_path, lambda fraction: report("tiles", fraction))
+    except Exception:
+        set_image_status(image_id, "failed")
+        raise
+    set_image_status(image_id, "ready")
+
+
+@offloaded
+def set_image_status(image_id: str, status: str) -> None:
+    with db_conn() as conn:
+        conn.execute("UPDATE images SET status = ? WHERE id = ?", (status, image_id))
+        conn.commit()
+
+
+@offloaded
 def delete_image(image_id: str) -> None:
+    orphan = None
     with db_conn() as conn:
-        row = conn.execute("SELECT storage_path FROM images WHERE id = ?", (image_id,)).fetchone()
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT storage_path, sha256 FROM images WHERE id = ?", (image_id,)).fetchone()
         if not row:
             return
-        storage_path = row[0]
+        storage_path, sha256 = row
         conn.execute("DELETE FROM images WHERE id = ?", (image_id,))
+        if sha256:
+            conn.execute("UPDATE blobs SET ref_count = ref_count - 1 WHERE sha256 = ?", (sha256,))
+            remaining = conn.execute("SELECT ref_count FROM blobs WHERE sha256 = ?", (sha256,)).fetchone()
+            if remaining is None or remaining[0] <= 0:
+                conn.execute("DELETE FROM blobs WHERE sha256 = ?", (sha256,))
+                orphan = sha256
+        else:
+            # Rows from before content addressing own their file outright.
+            orphan = image_id
         conn.commit()
+    if orphan is None:
+        return
+    if not sha256:
+        _remove_files(storage_path, orphan)
+        return
+    # Files go only after the delete has committed, and only if no upload of
+    # the same bytes has re-created the blob since; that upload owns them.
+    with db_conn() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        if _blob_row(conn, sha256) is None:
+            _remove_files(storage_path, orphan)
+        conn.commit()
+
+
+def _remove_files(storage_path: str | None, key: str) -> None:
     if storage_path and os.path.exists(storage_path):
         os.remove(storage_path)
+    delete_thumbs(key)
+    delete_tiles(key)
 
 
 def get_image_path(image_id: str) -> str | None:
+    blob = get_image_blob(image_id)
+    return blob["storage_path"] if blob else None
+
+
+@offloaded
+def get_image_blob(image_id: str) -> dict | None:
+    """Return storage details for an image.
+
+    `cache_key` is the content hash, shared by every image with the same
+    bytes, or the image id for rows stored before content addressing.
+    """
     with db_conn() as conn:
-        row = conn.execute("SELECT storage_path FROM images WHERE id = ?", (image_id,)).fetchone()
+        row = conn.execute("SELECT storage_path, sha256, mime_type, size_bytes FROM images WHERE id = ?", (image_id,)).fetchone()
     if not row:
         return None
-    return row[0]
+    storage_path, sha256, mime_type, size_bytes = row
+    return {
+        "storage_path": storage_path,
+        "sha256": sha256,
+        "cache_key": sha256 or image_id,
+        "mime_type": mime_type,
+        "size_bytes": size_bytes,
+    }
+
+
+def resolve_import_source(source, root: str) -> str:
+    """Resolve a remotely requested import source inside `root`.
+
+    `source` is taken relative to `root`; symlinks are resolved first, so
+    nothing outside the root can be read through them.
+    """
+    if not isinstance(source, str) or not source:
+        raise ValueError("source missing")
+    root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(root, source))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError("source must be inside IMPORT_ROOT")
+    if not os.path.exists(path):
+        raise ValueError("source not found")
+    return path
+
+
+def import_images(
+    source: str,
+    mirror: bool = False,
+    workers: int | None = None,
+    batch_size: int | None = None,
+    progress: Callable[[dict], None] | None = None,
+) -> dict:
+    """Ingest every image in a directory, zip or tar archive.
+
+    Files are hashed, sniffed, probed and thumbnailed in a process pool
+    while the source is still being walked; rows are inserted in batched
+    transactions. Files already imported from the same source with the same
+    content are skipped. With `mirror`, images previously imported from
+    this source whose files are gone are deleted.
+    """
+    ensure_dirs()
+    _sweep_spooled()
+    source_id = os.path.abspath(source)
+    batch_size = batch_size or CONFIG.import_batch_size
+    workers = workers or CONFIG.import_workers
+    report = progress or (lambda summary: None)
+    summary = {"source": source_id, "scanned": 0, "imported": 0, "deduplicated": 0, "unchanged": 0, "invalid": 0, "deleted": 0, "errors": []}
+    with db_conn() as conn:
+        previous = {
+            key: (image_id, sha256)
+            for image_id, key, sha256 in conn.execute("SELECT id, source_key, sha256 FROM images WHERE import_source = ?", (source_id,))
+        }
+    seen: set[str] = set()
+    replaced: list[str] = []
+    rows: list[tuple[str, str, dict, str]] = []
+    stored: dict[str, dict] = {}
+    # Spooled archive members not yet stored or removed.
+    spooled: set[str] = set()
+
+    def flush() -> None:
+        if not rows:
+            return
+        now = datetime.utcnow().isoformat() + "Z"
+        with db_conn() as conn:
+            for image_id, name, blob, key in rows:
+                _insert_image(conn, image_id, name, blob, "ready", now, (source_id, key))
+            conn.commit()
+        rows.clear()
+        stored.clear()
+
+    def finish(key: str, path: str, owned: bool, meta: dict | None, error: str | None) -> None:
+        summary["scanned"] += 1
+        try:
+            if error or meta is None:
+                summary["invalid"] += 1
+                if error and len(summary["errors"]) < 20:
+                    summary["errors"].append({"file": key, "error": error})
+                return
+            sha256 = meta["sha256"]
+            prior = previous.get(key)
+            if prior and prior[1] == sha256:
+                summary["unchanged"] += 1
+                return
+            if prior:
+                replaced.append(prior[0])
+            blob = stored.get(sha256) or get_blob(sha256)
+            if blob and os.path.exists(blob["storage_path"]):
+                summary["deduplicated"] += 1
+            else:
+                blob = dict(meta, storage_path=blob_path(sha256, os.path.splitext(key)[1] or ".img"))
+                _store_file(path, blob["storage_path"], move=owned)
+                owned = False
+                summary["imported"] += 1
+            stored[sha256] = blob
+            rows.append((new_id(), os.path.basename(key), blob, key))
+            if len(rows) >= batch_size:
+                flush()
+        finally:
+            if owned and os.path.exists(path):
+                os.remove(path)
+            spooled.discard(path)
+            if summary["scanned"] % 50 == 0:
+                report(dict(summary))
+
+    window = max(1, workers) * 4
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(context.Lock(),)) as pool:
+            in_flight: dict = {}
+
+            def drain(futures) -> None:
+                for future in futures:
+                    key, path, owned = in_flight.pop(future)
+                    try:
+                        meta, error = future.result(), None
+                    except Exception as exc:
+                        meta, error = None, str(exc)
+                    if meta is not None and "error" in meta:
+                        meta, error = None, meta["error"]
+                    finish(key, path, owned, meta, error)
+
+            for key, path, owned in _iter_source(source):
+                if owned:
+                    spooled.add(path)
+                seen.add(key)
+                in_flight[pool.submit(_scan_file, path)] = (key, path, owned)
+                if len(in_flight) >= window:
+                    done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                    drain(done)
+            drain(list(in_flight))
+    finally:
+        # A failing source or pool leaves members that were never finished.
+        for path in spooled:
+            if os.path.exists(path):
+                os.remove(path)
+    flush()
+
+    stale = replaced
+    if mirror:
+        stale = stale + [image_id for key, (image_id, _) in previous.items() if key not in seen]
+    for image_id in stale:
+        delete_image(image_id)
+    summary["deleted"] = len(stale)
+    report(dict(summary))
+    return summary
+
+
+# Set in each import worker: building a pyramid decodes the whole source,
+# so only one worker at a time may do it.
+_tile_lock = None
+
+
+def _init_worker(tile_lock) -> None:
+    global _tile_lock
+    _tile_lock = tile_lock
+
+
+def _scan_file(path: str) -> dict:
+    """Process-pool worker: hash, sniff, probe and thumbnail one file."""
+    digest = hashlib.sha256()
+    head = b""
+    size = 0
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            if len(head) < SNIFF_BYTES:
+                head += chunk[:SNIFF_BYTES - len(head)]
+            size += len(chunk)
+            digest.update(chunk)
+    mime = sniff_mime(head)
+    if not mime.startswith("image/"):
+        return {"error": f"not an image ({mime})"}
+    try:
+        width, height, orientation, frame_count, duration_ms = probe_image(path)
+    except ValueError as exc:
+        return {"error": str(exc)}
+    sha256 = digest.hexdigest()
+    for thumb_size in THUMB_SIZES:
+        ensure_thumb(sha256, path, thumb_size)
+    if should_tile(width, height):
+        with _tile_lock or contextlib.nullcontext():
+            build_pyramid(sha256, path)
+    return {
+        "sha256": sha256,
+        "mime_type": mime,
+        "width": width,
+        "height": height,
+        "orientation": orientation,
+        "size_bytes": size,
+        "frame_count": frame_count,
+        "duration_ms": duration_ms,
+    }
+
+
+def _iter_source(source: str):
+    """Yield (key, path, owned) for every candidate file in `source`.
+
+    `key` is the path relative to the source root. Archive members are
+    extracted one at a time into temp files that the caller owns.
+    """
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d != "__MACOSX")
+            for name in sorted(files):
+                if name.startswith("."):
+                    continue
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, source), path, False
+    elif zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or _hidden_member(info.filename):
+                    continue
+                with archive.open(info) as member:
+                    yield os.path.normpath(info.filename), _spool(member), True
+    elif tarfile.is_tarfile(source):
+        # Stream mode reads the archive front to back without seeking.
+        with tarfile.open(source, "r|*") as archive:
+            for info in archive:
+                if not info.isfile() or _hidden_member(info.name):
+                    continue
+                member = archive.extractfile(info)
+                if member is None:
+                    continue
+                with member:
+                    yield os.path.normpath(info.name), _spool(member), True
+    else:
+        raise ValueError(f"Unsupported import source: {source}")
+
+
+def _hidden_member(name: str) -> bool:
+    parts = [part for part in name.split("/") if part not in ("", ".")]
+    return any(part.startswith(".") or part == "__MACOSX" for part in parts)
+
+
+def _spool(stream) -> str:
+    fd, tmp_path = mkstemp(dir=IMAGE_DIR, suffix=SPOOL_SUFFIX)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(stream, out, CHUNK_SIZE)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path
+
+
+def _sweep_spooled() -> None:
+    # Spool files left by an import that was killed outright.
+    cutoff = time.time() - SPOOL_MAX_AGE_S
+    for entry in os.scandir(IMAGE_DIR):
+        if entry.name.endswith(SPOOL_SUFFIX) and entry.is_file() and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
+
+
+def _store_file(path: str, dest: str, move: bool) -> None:
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    if move:
+        os.replace(path, dest)
+        return
+    fd, tmp_path = mkstemp(dir=os.path.dirname(dest), suffix=".import")
+    os.close(fd)
+    try:
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m hdmi_control.images")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="bulk import a directory, zip or tar archive")
+    importer.add_argument("source")
+    importer.add_argument("--mirror", action="store_true", help="delete images whose source file is gone")
+    importer.add_argument("--workers", type=int, default=None)
+    importer.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    from .db import init_db
+    init_db()
+
+    def progress(summary: dict) -> None:
+        print(f"\r{summary['scanned']} scanned, {summary['imported']} imported, {summary['deduplicated']} duplicate, {summary['unchanged']} unchanged, {summary['invalid']} invalid", end="", file=sys.stderr, flush=True)
+
+    summary = import_images(args.source, mirror=args.mirror, workers=args.workers, batch_size=args.batch_size, progress=progress)
+    print(file=sys.stderr)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    # Run through the package module so process-pool workers unpickle
+    # `hdmi_control.images._scan_file` rather than a `__main__` copy.
+    from hdmi_control.images import main as _main
+    _main()
@@ -0,0 +1,20 @@
+"""Pillow and libmagic, loaded on first use.
+
+Both are slow to import (PIL pulls in NumPy) and only uploads, thumbnails
+and tiles need them, so the server does not pay for them at startup.
+"""
+from .config import CONFIG
+
+
+def pil_image():
+    """The `PIL.Image` module, with the app's decompression limit applied."""
+    from PIL import Image
+    # Pillow raises DecompressionBombError above twice this; tiled ingest is
+    # meant for images well past its default limit.
+    Image.MAX_IMAGE_PIXELS = CONFIG.max_image_megapixels * 1_000_000 // 2
+    return Image
+
+
+def sniff_mime(head: bytes) -> str:
+    import magic
+    return magic.from_buffer(head, mime=True)
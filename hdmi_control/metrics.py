@@ -0,0 +1,188 @@
+from __future__ import annotations
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def _format_labels(self, key: tuple, extra: dict | None = None) -> str:
+        pairs = list(zip(self.labels, key)) + list((extra or {}).items())
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> list[str]:
+        return []
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {value:g}" for key, value in sorted(items)]
+
+
+class Gauge(_Metric):
+    """Gauge that is either set explicitly or read from a callback at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = (), fn: Callable[[], float] | None = None):
+        super().__init__(name, help_text, labels)
+        self._values: dict[tuple, float] = {}
+        self._fn = fn
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._fn = fn
+
+    def _samples(self) -> list[str]:
+        if self._fn is not None:
+            try:
+                return [f"{self.name} {float(self._fn()):g}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {value:g}" for key, value in sorted(items)]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., +Inf count, sum]
+        self._values: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._values.items()]
+        lines = []
+        for key, series in sorted(items):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': f'{bound:g}'})} {cumulative:g}")
+            cumulative += series[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': '+Inf'})} {cumulative:g}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {series[-1]:g}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative:g}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help_text: str, labels: tuple[str, ...] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help_text, labels))
+
+
+def gauge(name: str, help_text: str, labels: tuple[str, ...] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, help_text, labels))
+
+
+def histogram(name: str, help_text: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help_text, labels, buckets))
+
+
+# Shared collectors. Modules import the ones they feed.
+DDC_COMMAND_SECONDS = histogram("screeny_ddc_command_seconds", "ddcutil invocation latency.", ("op", "code"))
+DDC_RETRIES = counter("screeny_ddc_retries_total", "DDC writes retried after a failure.", ("code",))
+DDC_FAILURES = counter("screeny_ddc_failures_total", "ddcutil invocations that failed or timed out.", ("op", "code"))
+DDC_COALESCED = counter("screeny_ddc_coalesced_total", "Queued DDC writes replaced by a newer value before being sent.", ("code",))
+DDC_QUEUE_DEPTH = gauge("screeny_ddc_queue_depth", "DDC writes waiting in the controller queue.")
+BROADCAST_EVENTS = counter("screeny_broadcast_events_total", "Socket.IO events delivered to clients.", ("event",))
+BROADCAST_SKIPPED = counter("screeny_broadcast_skipped_total", "Deliveries postponed because the client was still draining.")
+BROADCAST_PAYLOAD_BYTES = histogram("screeny_broadcast_payload_bytes", "Serialized size of broadcast payloads.", ("event",), SIZE_BUCKETS)
+DB_SECONDS = histogram("screeny_db_seconds", "Time a SQLite connection was held per operation.")
+CACHE_REQUESTS = counter("screeny_cache_requests_total", "Cache lookups by cache and result.", ("cache", "result"))
+UPLOAD_SECONDS = histogram("screeny_upload_seconds", "Upload handling time by stage.", ("stage",))
+RENDERER_FRAME_SECONDS = histogram("screeny_renderer_frame_seconds", "Renderer frame stage timings relayed from the renderer.", ("stage",))
+PROFILE_APPLY_SECONDS = histogram("screeny_profile_apply_seconds", "Profile apply time by phase; total runs until the renderer shows the result.", ("phase",))
+RENDERER_FPS = gauge("screeny_renderer_fps", "Frames per second last reported by the renderer.")
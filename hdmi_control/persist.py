@@ -0,0 +1,82 @@
+from __future__ import annotations
+import threading
+import time
+from typing import Callable
+
+from .config import CONFIG
+from .app_state import set_state_values
+
+
+class StatePersister:
+    """Write-behind store for app_state keys.
+
+    `mark` only records the newest value for a key. A background thread
+    writes every dirty key in one transaction once the debounce window has
+    elapsed since the first unsaved change, so bursts of slider events cost
+    a single commit.
+    """
+
+    def __init__(self, write: Callable[[dict[str, dict]], None] = set_state_values, debounce_ms: int | None = None):
+        self._write = write
+        self._debounce = (debounce_ms if debounce_ms is not None else CONFIG.persist_debounce_ms) / 1000.0
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._dirty: dict[str, dict] = {}
+        self._stop = False
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+
+    def start(self) -> None:
+        # create_app() may run more than once in a process (tests, reloads);
+        # a thread can only be started once.
+        with self._lock:
+            if self._thread.ident is None:
+                self._thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stop = True
+            self._wake.notify_all()
+        self.flush()
+
+    def mark(self, key: str, value: dict) -> None:
+        with self._lock:
+            self._dirty[key] = value
+            self._wake.notify_all()
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            with self._lock:
+                dirty = self._dirty
+                self._dirty = {}
+            if not dirty:
+                return
+            try:
+                self._write(dirty)
+            except Exception:
+                # Keep the values so the next flush retries them, unless
+                # newer values were marked in the meantime.
+                with self._lock:
+                    for key, value in dirty.items():
+                        self._dirty.setdefault(key, value)
+                raise
+
+    def _worker(self) -> None:
+        while True:
+            with self._lock:
+                while not self._dirty and not self._stop:
+                    self._wake.wait()
+                if self._stop:
+                    return
+                deadline = time.monotonic() + self._debounce
+                while not self._stop:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._wake.wait(timeout=remaining)
+                if self._stop:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                time.sleep(self._debounce)
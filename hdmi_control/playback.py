@@ -0,0 +1,231 @@
+from __future__ import annotations
+import threading
+import time
+from typing import Callable
+
+
+class PlaylistPlayer:
+    """Advances through a playlist on wall-clock deadlines.
+
+    Each slide's start time is the previous slide's end time, not the moment
+    the worker woke up, so the schedule does not drift. Every change calls
+    `on_change` with the playback info (see `info()`), or None once playback
+    is stopped. The info carries the next slide and its start time so the
+    renderer can prepare it ahead of the switch.
+
+    Control methods may be called from any thread; `on_change` runs outside
+    the player's lock.
+    """
+
+    # If the worker falls further behind than this (suspended host, paused
+    # process), restart timing from now instead of skipping slides.
+    MAX_CATCH_UP = 1.0
+
+    def __init__(self, on_change: Callable[[dict | None], None]):
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._stop = False
+        self._playlist: dict | None = None
+        self._index = 0
+        self._status = "stopped"
+        self._started_at: float | None = None
+        self._ends_at: float | None = None
+        self._remaining: float | None = None
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+
+    def start(self) -> None:
+        # See StatePersister.start: create_app() may run more than once.
+        with self._lock:
+            if self._thread.ident is None:
+                self._thread.start()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._stop = True
+            self._wake.notify_all()
+
+    def playlist_id(self) -> str | None:
+        with self._lock:
+            return self._playlist["id"] if self._playlist else None
+
+    def info(self) -> dict | None:
+        with self._lock:
+            return self._info_locked()
+
+    def play(self, playlist: dict, index: int = 0) -> dict:
+        if not playlist.get("items"):
+            raise ValueError("playlist is empty")
+        with self._lock:
+            self._playlist = playlist
+            self._status = "playing"
+            self._begin_locked(index % len(playlist["items"]), time.time())
+            info = self._info_locked()
+        self._notify(info)
+        return info
+
+    def update(self, playlist: dict) -> None:
+        """Swap in edited items for the playing playlist, keeping the position."""
+        with self._lock:
+            if not self._playlist or self._playlist["id"] != playlist["id"]:
+                return
+            if not playlist.get("items"):
+                self._stop_locked()
+                info = None
+            else:
+                self._playlist = playlist
+                self._index = min(self._index, len(playlist["items"]) - 1)
+                info = self._info_locked()
+        self._notify(info)
+
+    def pause(self) -> dict | None:
+        with self._lock:
+            if self._status == "playing":
+                self._remaining = max(0.0, self._ends_at - time.time())
+                self._ends_at = None
+                self._status = "paused"
+                self._wake.notify_all()
+            info = self._info_locked()
+        self._notify(info)
+        return info
+
+    def resume(self) -> dict | None:
+        with self._lock:
+            if self._status == "paused":
+                now = time.time()
+                duration = self._duration_locked(self._index)
+                self._ends_at = now + (self._remaining if self._remaining is not None else duration)
+                self._started_at = self._ends_at - duration
+                self._remaining = None
+                self._status = "playing"
+                self._wake.notify_all()
+            elif self._status == "ended":
+                self._status = "playing"
+                self._begin_locked(0, time.time())
+            info = self._info_locked()
+        self._notify(info)
+        return info
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._playlist is None:
+                return
+            self._stop_locked()
+        self._notify(None)
+
+    def next(self) -> dict | None:
+        return self._step(1)
+
+    def previous(self) -> dict | None:
+        return self._step(-1)
+
+    def goto(self, index: int) -> dict | None:
+        with self._lock:
+            if self._playlist is None:
+                return None
+            count = len(self._playlist["items"])
+            if not 0 <= index < count:
+                raise ValueError("index out of range")
+            self._goto_locked(index)
+            info = self._info_locked()
+        self._notify(info)
+        return info
+
+    def _step(self, delta: int) -> dict | None:
+        with self._lock:
+            if self._playlist is None:
+                return None
+            self._goto_locked((self._index + delta) % len(self._playlist["items"]))
+            info = self._info_locked()
+        self._notify(info)
+        return info
+
+    def _goto_locked(self, index: int) -> None:
+        if self._status == "ended":
+            self._status = "playing"
+        self._begin_locked(index, time.time())
+        if self._status == "paused":
+            self._remaining = self._duration_locked(index)
+            self._ends_at = None
+
+    def _begin_locked(self, index: int, start: float) -> None:
+        self._index = index
+        self._started_at = start
+        self._ends_at = start + self._duration_locked(index)
+        self._remaining = None
+        self._wake.notify_all()
+
+    def _stop_locked(self) -> None:
+        self._playlist = None
+        self._status = "stopped"
+        self._started_at = self._ends_at = self._remaining = None
+        self._wake.notify_all()
+
+    def _duration_locked(self, index: int) -> float:
+        return self._playlist["items"][index]["durationMs"] / 1000.0
+
+    def _next_index_locked(self) -> int | None:
+        count = len(self._playlist["items"])
+        if self._index + 1 < count:
+            return self._index + 1
+        return 0 if self._playlist.get("loop", True) else None
+
+    def _info_locked(self) -> dict | None:
+        if self._playlist is None:
+            return None
+        item = self._playlist["items"][self._index]
+        upcoming = None
+        next_index = self._next_index_locked() if self._status != "ended" else None
+        if next_index is not None:
+            next_item = self._playlist["items"][next_index]
+            upcoming = {
+                "index": next_index,
+                "imageId": next_item["imageId"],
+                "render": next_item.get("render") or {},
+                "startsAt": self._ends_at,
+            }
+        # Times are Unix seconds so the renderer can schedule against them.
+        return {
+            "id": self._playlist["id"],
+            "name": self._playlist.get("name"),
+            "status": self._status,
+            "index": self._index,
+            "count": len(self._playlist["items"]),
+            "imageId": item["imageId"],
+            "render": item.get("render") or {},
+            "startedAt": self._started_at,
+            "endsAt": self._ends_at,
+            "next": upcoming,
+        }
+
+    def _advance_locked(self) -> dict | None:
+        next_index = self._next_index_locked()
+        if next_index is None:
+            self._status = "ended"
+            self._ends_at = None
+            return self._info_locked()
+        now = time.time()
+        start = self._ends_at if now - self._ends_at < self.MAX_CATCH_UP else now
+        self._begin_locked(next_index, start)
+        return self._info_locked()
+
+    def _notify(self, info: dict | None) -> None:
+        try:
+            self.on_change(info)
+        except Exception:
+            pass
+
+    def _worker(self) -> None:
+        while True:
+            with self._lock:
+                if self._stop:
+                    return
+                if self._status != "playing" or self._ends_at is None:
+                    self._wake.wait()
+                    continue
+                delay = self._ends_at - time.time()
+                if delay > 0:
+                    self._wake.wait(timeout=delay)
+                    continue
+                info = self._advance_locked()
+            self._notify(info)
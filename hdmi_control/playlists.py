@@ -0,0 +1,92 @@
+import json
+from datetime import datetime
+from .db import db_conn, new_id
+from .blocking import offloaded
+
+
+DEFAULT_DURATION_MS = 10000
+MIN_DURATION_MS = 500
+RENDER_SECTIONS = ("transform", "color", "output")
+
+
+def normalize_items(items) -> list[dict]:
+    """Validate playlist items and fill in defaults.
+
+    Each item is {"imageId", "durationMs", "render"}; `render` holds
+    per-slide overrides for the transform/color/output sections.
+    """
+    if not isinstance(items, list):
+        raise ValueError("items must be a list")
+    normalized = []
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get("imageId"), str) or not item["imageId"]:
+            raise ValueError("each item needs an imageId")
+        try:
+            duration = int(item.get("durationMs", DEFAULT_DURATION_MS))
+        except (TypeError, ValueError):
+            raise ValueError("durationMs must be an integer") from None
+        if duration < MIN_DURATION_MS:
+            raise ValueError(f"durationMs must be at least {MIN_DURATION_MS}")
+        render = item.get("render") or {}
+        if not isinstance(render, dict) or any(k not in RENDER_SECTIONS or not isinstance(v, dict) for k, v in render.items()):
+            raise ValueError("render overrides must map transform/color/output to objects")
+        normalized.append({"imageId": item["imageId"], "durationMs": duration, "render": render})
+    return normalized
+
+
+def _row_to_playlist(row) -> dict:
+    return {
+        "id": row[0],
+        "name": row[1],
+        "items": json.loads(row[2]),
+        "loop": bool(row[3]),
+        "created_at": row[4],
+        "updated_at": row[5],
+    }
+
+
+@offloaded
+def list_playlists() -> list[dict]:
+    with db_conn() as conn:
+        rows = conn.execute("SELECT id, name, items_json, loop, created_at, updated_at FROM playlists ORDER BY updated_at DESC").fetchall()
+    return [_row_to_playlist(row) for row in rows]
+
+
+@offloaded
+def create_playlist(name: str, items: list[dict], loop: bool = True) -> dict:
+    playlist_id = new_id()
+    now = datetime.utcnow().isoformat() + "Z"
+    with db_conn() as conn:
+        conn.execute(
+            "INSERT INTO playlists (id, name, items_json, loop, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (playlist_id, name, json.dumps(items), int(loop), now, now),
+        )
+        conn.commit()
+    return {"id": playlist_id, "name": name, "items": items, "loop": loop, "created_at": now, "updated_at": now}
+
+
+@offloaded
+def update_playlist(playlist_id: str, name: str | None, items: list[dict] | None, loop: bool | None) -> None:
+    now = datetime.utcnow().isoformat() + "Z"
+    with db_conn() as conn:
+        if name is not None:
+            conn.execute("UPDATE playlists SET name = ?, updated_at = ? WHERE id = ?", (name, now, playlist_id))
+        if items is not None:
+            conn.execute("UPDATE playlists SET items_json = ?, updated_at = ? WHERE id = ?", (json.dumps(items), now, playlist_id))
+        if loop is not None:
+            conn.execute("UPDATE playlists SET loop = ?, updated_at = ? WHERE id = ?", (int(loop), now, playlist_id))
+        conn.commit()
+
+
+@offloaded
+def delete_playlist(playlist_id: str) -> None:
+    with db_conn() as conn:
+        conn.execute("DELETE FROM playlists WHERE id = ?", (playlist_id,))
+        conn.commit()
+
+
+@offloaded
+def get_playlist(playlist_id: str) -> dict | None:
+    with db_conn() as conn:
+        row = conn.execute("SELECT id, name, items_json, loop, created_at, updated_at FROM playlists WHERE id = ?", (playlist_id,)).fetchone()
+    return _row_to_playlist(row) if row else None
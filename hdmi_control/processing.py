@@ -0,0 +1,62 @@
+from __future__ import annotations
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+from .config import CONFIG
+from .images import process_image
+from .metrics import UPLOAD_SECONDS
+
+
+class ImageProcessor:
+    """Bounded worker pool for post-upload image work.
+
+    Progress is reported through `on_progress` as dicts with imageId, stage,
+    progress (0..1) and status ("processing", "ready" or "failed").
+    """
+
+    def __init__(self, on_progress: Callable[[dict], None] | None = None, workers: int | None = None):
+        self.on_progress = on_progress or (lambda event: None)
+        self._executor = ThreadPoolExecutor(max_workers=workers or CONFIG.image_workers, thread_name_prefix="image-proc")
+        self._lock = threading.Lock()
+        self._active: dict[str, Future] = {}
+
+    def set_on_progress(self, on_progress: Callable[[dict], None]) -> None:
+        self.on_progress = on_progress
+
+    def submit(self, image_id: str, cache_key: str, storage_path: str, tiles: str = "auto") -> Future:
+        with self._lock:
+            future = self._executor.submit(self._run, image_id, cache_key, storage_path, tiles)
+            self._active[image_id] = future
+        return future
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._active)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, image_id: str, cache_key: str, storage_path: str, tiles: str) -> None:
+        def report(stage: str, fraction: float) -> None:
+            self._emit(image_id, stage, fraction, "processing")
+        start = time.perf_counter()
+        try:
+            process_image(image_id, cache_key, storage_path, report, tiles)
+            UPLOAD_SECONDS.observe(time.perf_counter() - start, stage="process")
+            self._emit(image_id, "done", 1.0, "ready")
+        except Exception as exc:
+            self._emit(image_id, "done", 1.0, "failed", str(exc))
+        finally:
+            with self._lock:
+                self._active.pop(image_id, None)
+
+    def _emit(self, image_id: str, stage: str, fraction: float, status: str, error: str | None = None) -> None:
+        event = {"imageId": image_id, "stage": stage, "progress": round(fraction, 3), "status": status}
+        if error:
+            event["error"] = error
+        try:
+            self.on_progress(event)
+        except Exception:
+            pass
@@ -0,0 +1,81 @@
+import itertools
+import threading
+import time
+from typing import Callable
+
+
+class ProfileApplies:
+    """Tracks profile applies from the request until the renderer shows the result.
+
+    An apply asks the renderer to pre-render its target frame ("render.prepare"
+    with a token from `begin`), waits for the "render.ready" acknowledgement,
+    writes the DDC batch, then commits and broadcasts the new state. The
+    renderer answers "render.presented" with the same token once the frame is
+    on screen; that closes the apply and `on_finished` gets its timings in ms.
+    """
+
+    MAX_OPEN = 8
+
+    def __init__(self, on_finished: Callable[[dict], None]):
+        self.on_finished = on_finished
+        self.last: dict | None = None
+        self._lock = threading.Lock()
+        self._tokens = itertools.count(1)
+        self._open: dict[str, dict] = {}
+
+    def begin(self) -> str:
+        token = str(next(self._tokens))
+        with self._lock:
+            self._open[token] = {"ready": threading.Event(), "presented": None, "timing": None}
+            while len(self._open) > self.MAX_OPEN:
+                # The renderer never answered these; forget the oldest.
+                self._open.pop(next(iter(self._open)))
+        return token
+
+    def ready(self, token: str) -> None:
+        with self._lock:
+            entry = self._open.get(token)
+        if entry:
+            entry["ready"].set()
+
+    def wait_ready(self, token: str, timeout: float) -> bool:
+        with self._lock:
+            entry = self._open.get(token)
+        return bool(entry) and entry["ready"].wait(timeout)
+
+    def presented(self, token: str) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            entry = self._open.get(token)
+            if not entry:
+                return
+            entry["presented"] = now
+            if entry["timing"] is None:
+                # Presented before the commit: the target frame was already
+                # on screen, so the commit itself is the final appearance.
+                return
+            del self._open[token]
+        self._finish(entry["timing"], now)
+
+    def committed(self, token: str | None, timing: dict) -> None:
+        """Record the commit; `timing` carries "started" (perf_counter) and phase times.
+
+        Without a token (no renderer connected) the apply ends here.
+        """
+        now = time.perf_counter()
+        with self._lock:
+            entry = self._open.get(token) if token else None
+            if entry is not None and entry["presented"] is None:
+                entry["timing"] = timing
+                return
+            if entry is not None:
+                del self._open[token]
+        timing["presented"] = entry is not None
+        self._finish(timing, now)
+
+    def _finish(self, timing: dict, end: float) -> None:
+        started = timing.pop("started")
+        timing.setdefault("presented", True)
+        timing["totalMs"] = round((end - started) * 1000.0, 1)
+        self.last = timing
+        self.on_finished(timing)
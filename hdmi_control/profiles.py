@@ -1,9 +1,97 @@
 import json
+import threading
+from dataclasses import dataclass, field
 from datetime import datetime
-from ulid import ULID
-from .db import db_conn
+from .db import db_conn, new_id
+from .blocking import offloaded
+from .metrics import CACHE_REQUESTS
 
 
+RENDER_SECTIONS = ("transform", "color", "output")
+DDC_CODES = {"brightness": "10", "contrast": "12"}
+
+
+@dataclass(frozen=True)
+class CompiledProfile:
+    """A profile in the form `_apply_profile` uses, with no SQLite or JSON work left.
+
+    `vcp` maps VCP codes ("10", "12", ...) to the values written in one
+    batch; `render` holds the sections merged over the current render state.
+    """
+    id: str
+    vcp: dict = field(default_factory=dict)
+    render: dict = field(default_factory=dict)
+    image_id: str | None = None
+
+
+def vcp_code(code) -> str:
+    """Normalise "0x10", "10" or 16 to the controller's "10" form."""
+    if isinstance(code, int):
+        value = code
+    else:
+        text = str(code).strip().lower()
+        value = int(text[2:] if text.startswith("0x") else text, 16)
+    if not 0 <= value <= 0xFF:
+        raise ValueError(f"invalid VCP code: {code!r}")
+    return f"{value:02X}"
+
+
+def compile_profile(profile_id: str, data: dict) -> CompiledProfile:
+    ddc = data.get("ddc") or {}
+    vcp = {}
+    for code, value in (ddc.get("extraVcp") or {}).items():
+        try:
+            vcp[vcp_code(code)] = int(value)
+        except (TypeError, ValueError):
+            continue
+    for name, code in DDC_CODES.items():
+        if ddc.get(name) is not None:
+            vcp[code] = int(ddc[name])
+    render = data.get("render") or {}
+    return CompiledProfile(
+        id=profile_id,
+        vcp=vcp,
+        render={section: render[section] for section in RENDER_SECTIONS if section in render},
+        image_id=data.get("activeImageId"),
+    )
+
+
+# Compiled profiles by id. Updates and deletes drop the entry; the
+# generation stops a load that raced with one from caching stale data.
+_compiled: dict[str, CompiledProfile] = {}
+_compiled_lock = threading.Lock()
+_generation = 0
+
+
+def get_compiled(profile_id: str) -> CompiledProfile | None:
+    with _compiled_lock:
+        compiled = _compiled.get(profile_id)
+        generation = _generation
+    if compiled is not None:
+        CACHE_REQUESTS.inc(cache="profile", result="hit")
+        return compiled
+    CACHE_REQUESTS.inc(cache="profile", result="miss")
+    profile = get_profile(profile_id)
+    if not profile:
+        return None
+    compiled = compile_profile(profile_id, profile["data"])
+    with _compiled_lock:
+        if generation == _generation:
+            _compiled[profile_id] = compiled
+    return compiled
+
+
+def invalidate_compiled(profile_id: str | None = None) -> None:
+    global _generation
+    with _compiled_lock:
+        _generation += 1
+        if profile_id is None:
+            _compiled.clear()
+        else:
+            _compiled.pop(profile_id, None)
+
+
+@offloaded
 def list_profiles() -> list[dict]:
     with db_conn() as conn:
         rows = conn.execute("SELECT id, name, data_json, is_default, created_at, updated_at FROM profiles ORDER BY updated_at DESC").fetchall()
@@ -20,8 +108,9 @@ def list_profiles() -> list[dict]:
     return profiles
 
 
+@offloaded
 def create_profile(name: str, data: dict) -> dict:
-    profile_id = str(ULID())
+    profile_id = new_id()
     now = datetime.utcnow().isoformat() + "Z"
     with db_conn() as conn:
         conn.execute(
@@ -32,6 +121,7 @@ def create_profile(name: str, data: dict) -> dict:
     return {"id": profile_id, "name": name, "data": data, "is_default": False}
 
 
+@offloaded
 def update_profile(profile_id: str, name: str | None, data: dict | None) -> None:
     now = datetime.utcnow().isoformat() + "Z"
     with db_conn() as conn:
@@ -40,14 +130,18 @@ def update_profile(profile_id: str, name: str | None, data: dict | None) -> None
         if data is not None:
             conn.execute("UPDATE profiles SET data_json = ?, updated_at = ? WHERE id = ?", (json.dumps(data), now, profile_id))
         conn.commit()
+    invalidate_compiled(profile_id)
 
 
+@offloaded
 def delete_profile(profile_id: str) -> None:
     with db_conn() as conn:
         conn.execute("DELETE FROM profiles WHERE id = ?", (profile_id,))
         conn.commit()
+    invalidate_compiled(profile_id)
 
 
+@offloaded
 def set_default_profile(profile_id: str) -> None:
     with db_conn() as conn:
         conn.execute("UPDATE profiles SET is_default = 0")
@@ -55,6 +149,7 @@ def set_default_profile(profile_id: str) -> None:
         conn.commit()
 
 
+@offloaded
 def get_profile(profile_id: str) -> dict | None:
     with db_conn() as conn:
         row = conn.execute("SELECT id, name, data_json, is_default, created_at, updated_at FROM profiles WHERE id = ?", (profile_id,)).fetchone()
@@ -70,6 +165,7 @@ def get_profile(profile_id: str) -> dict | None:
     }
 
 
+@offloaded
 def load_default_or_last() -> str | None:
     with db_conn() as conn:
         row = conn.execute("SELECT id FROM profiles WHERE is_default = 1 LIMIT 1").fetchone()
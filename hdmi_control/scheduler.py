@@ -0,0 +1,117 @@
+from __future__ import annotations
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Callable
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileScheduler:
+    """Applies profiles when their schedule rules fire.
+
+    Keeps the next fire time of every enabled schedule. `lead` seconds
+    before a fire it calls `on_warm(schedule)` so the target frame and the
+    DDC link are ready, then `on_fire(schedule)` on time. `reload` replaces
+    the schedules after any change; fire times are computed by
+    `next_fire(rule, after)` with aware datetimes.
+
+    Times are wall clock. The worker wakes at least every MAX_SLEEP so a
+    clock step (NTP on a Pi without an RTC) is noticed, and a fire missed
+    by more than MISSED_GRACE is skipped rather than applied late.
+    """
+
+    MAX_SLEEP = 60.0
+    MISSED_GRACE = 300.0
+
+    def __init__(self, on_warm: Callable[[dict], None], on_fire: Callable[[dict], None], lead: float,
+                 next_fire: Callable[[dict, datetime], datetime | None]):
+        self.on_warm = on_warm
+        self.on_fire = on_fire
+        self.lead = lead
+        self.next_fire = next_fire
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._stop = False
+        # schedule id -> {"schedule", "at" (Unix seconds), "warmed"}
+        self._plan: dict[str, dict] = {}
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+
+    def start(self) -> None:
+        # See StatePersister.start: create_app() may run more than once.
+        with self._lock:
+            if self._thread.ident is None:
+                self._thread.start()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._stop = True
+            self._wake.notify_all()
+
+    def reload(self, schedules: list[dict]) -> None:
+        now = time.time()
+        plan = {}
+        for schedule in schedules:
+            if not schedule.get("enabled", True):
+                continue
+            at = self._next_after(schedule, now)
+            if at is not None:
+                plan[schedule["id"]] = {"schedule": schedule, "at": at, "warmed": False}
+        with self._lock:
+            self._plan = plan
+            self._wake.notify_all()
+
+    def upcoming(self) -> dict[str, float]:
+        """Next fire time (Unix seconds) per enabled schedule id."""
+        with self._lock:
+            return {schedule_id: entry["at"] for schedule_id, entry in self._plan.items()}
+
+    def _next_after(self, schedule: dict, after: float) -> float | None:
+        try:
+            at = self.next_fire(schedule["rule"], datetime.fromtimestamp(after).astimezone())
+        except ValueError:
+            return None
+        return at.timestamp() if at else None
+
+    def _worker(self) -> None:
+        while True:
+            warm = []
+            fire = []
+            with self._lock:
+                if self._stop:
+                    return
+                now = time.time()
+                wait = self.MAX_SLEEP
+                for schedule_id, entry in list(self._plan.items()):
+                    if entry["at"] <= now:
+                        if now - entry["at"] <= self.MISSED_GRACE:
+                            fire.append(entry["schedule"])
+                        at = self._next_after(entry["schedule"], max(now, entry["at"]))
+                        if at is None:
+                            del self._plan[schedule_id]
+                            continue
+                        entry.update(at=at, warmed=False)
+                    if not entry["warmed"] and entry["at"] - self.lead <= now:
+                        entry["warmed"] = True
+                        warm.append(entry["schedule"])
+                    if not entry["warmed"]:
+                        wait = min(wait, entry["at"] - self.lead - now)
+                    wait = min(wait, entry["at"] - now)
+                if not warm and not fire:
+                    self._wake.wait(timeout=max(0.0, wait))
+                    continue
+            # Callbacks run outside the lock; they may reload the scheduler.
+            for schedule in fire:
+                self._call(self.on_fire, schedule)
+            for schedule in warm:
+                self._call(self.on_warm, schedule)
+
+    def _call(self, callback: Callable[[dict], None], schedule: dict) -> None:
+        # A failing apply (locked database, emit error) must not end the
+        # worker, or no schedule would fire again until a restart.
+        try:
+            callback(schedule)
+        except Exception:
+            logger.exception("schedule %s failed", schedule.get("id"))
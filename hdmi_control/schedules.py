@@ -0,0 +1,205 @@
+import json
+import math
+from datetime import date, datetime, time, timedelta, timezone
+from .db import db_conn, new_id
+from .blocking import offloaded
+
+
+SUN_EVENTS = ("sunrise", "sunset")
+MAX_OFFSET_MIN = 720
+CRON_FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day", 1, 31), ("month", 1, 12), ("weekday", 0, 7))
+# How far ahead next_fire looks: long enough for Feb 29 crons and polar winters.
+SEARCH_DAYS = 4 * 366
+
+
+def parse_cron(expr: str) -> list[set[int]]:
+    """Parse a five-field cron expression (minute hour day month weekday).
+
+    Fields take *, numbers, a-b ranges, /n steps and comma lists. Weekday
+    0 and 7 are both Sunday.
+    """
+    parts = expr.split() if isinstance(expr, str) else []
+    if len(parts) != 5:
+        raise ValueError("cron expression needs five fields: minute hour day month weekday")
+    fields = []
+    for text, (name, low, high) in zip(parts, CRON_FIELDS):
+        values = set()
+        for item in text.split(","):
+            base, _, step_text = item.partition("/")
+            try:
+                step = int(step_text) if step_text else 1
+                if base == "*":
+                    start, end = low, high
+                elif "-" in base:
+                    start, end = (int(n) for n in base.split("-", 1))
+                else:
+                    start = end = int(base)
+                    if step_text:
+                        end = high
+            except ValueError:
+                raise ValueError(f"invalid cron {name}: {item!r}") from None
+            if step < 1 or not low <= start <= end <= high:
+                raise ValueError(f"invalid cron {name}: {item!r}")
+            values.update(range(start, end + 1, step))
+        if name == "weekday" and 7 in values:
+            values.discard(7)
+            values.add(0)
+        fields.append(values)
+    return fields
+
+
+def normalize_rule(rule) -> dict:
+    """Validate a schedule rule.
+
+    {"type": "cron", "expr": "0 22 * * *"} fires at local times like cron.
+    {"type": "sun", "event": "sunrise"|"sunset", "offsetMin": -30} fires
+    relative to the sun at the configured coordinates.
+    """
+    if not isinstance(rule, dict):
+        raise ValueError("rule must be an object")
+    if rule.get("type") == "cron":
+        expr = " ".join(str(rule.get("expr", "")).split())
+        parse_cron(expr)
+        return {"type": "cron", "expr": expr}
+    if rule.get("type") == "sun":
+        if rule.get("event") not in SUN_EVENTS:
+            raise ValueError("sun rules need event sunrise or sunset")
+        try:
+            offset = int(rule.get("offsetMin", 0))
+        except (TypeError, ValueError):
+            raise ValueError("offsetMin must be an integer") from None
+        if abs(offset) > MAX_OFFSET_MIN:
+            raise ValueError(f"offsetMin must be within ±{MAX_OFFSET_MIN}")
+        return {"type": "sun", "event": rule["event"], "offsetMin": offset}
+    raise ValueError("rule type must be cron or sun")
+
+
+def sun_times(day: date, latitude: float, longitude: float) -> tuple[datetime, datetime] | None:
+    """Sunrise and sunset (UTC) on `day`, or None when the sun does not cross the horizon.
+
+    Uses the standard sunrise equation; good to a minute or two, which is
+    plenty for switching a screen's profile and needs no network.
+    """
+    midnight = datetime.combine(day, time(0), tzinfo=timezone.utc)
+    julian = midnight.timestamp() / 86400.0 + 2440587.5
+    n = math.ceil(julian - 2451545.0 + 0.0008)
+    mean_noon = n - longitude / 360.0
+    anomaly = math.radians((357.5291 + 0.98560028 * mean_noon) % 360)
+    center = 1.9148 * math.sin(anomaly) + 0.02 * math.sin(2 * anomaly) + 0.0003 * math.sin(3 * anomaly)
+    ecliptic = math.radians((math.degrees(anomaly) + center + 180 + 102.9372) % 360)
+    transit = 2451545.0 + mean_noon + 0.0053 * math.sin(anomaly) - 0.0069 * math.sin(2 * ecliptic)
+    declination = math.asin(math.sin(ecliptic) * math.sin(math.radians(23.4397)))
+    lat = math.radians(latitude)
+    cos_hour = (math.sin(math.radians(-0.833)) - math.sin(lat) * math.sin(declination)) / (math.cos(lat) * math.cos(declination))
+    if not -1.0 <= cos_hour <= 1.0:
+        return None
+    half_day = math.degrees(math.acos(cos_hour)) / 360.0
+
+    def to_datetime(jd: float) -> datetime:
+        return datetime.fromtimestamp((jd - 2440587.5) * 86400.0, tz=timezone.utc)
+
+    return to_datetime(transit - half_day), to_datetime(transit + half_day)
+
+
+def next_fire(rule: dict, after: datetime, latitude: float | None = None, longitude: float | None = None) -> datetime | None:
+    """The first time strictly after `after` (an aware datetime) that `rule` fires."""
+    local_after = after.astimezone()
+    if rule["type"] == "cron":
+        minutes, hours, days, months, weekdays = parse_cron(rule["expr"])
+        # Cron's rule: when both day fields are restricted, either may match.
+        any_day = len(days) == 31
+        any_weekday = len(weekdays) == 7
+        start = local_after.replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        for _ in range(SEARCH_DAYS):
+            weekday = (day.weekday() + 1) % 7
+            if any_day or any_weekday:
+                day_ok = day.day in days and weekday in weekdays
+            else:
+                day_ok = day.day in days or weekday in weekdays
+            if day.month in months and day_ok:
+                for hour in sorted(hours):
+                    for minute in sorted(minutes):
+                        candidate = datetime.combine(day, time(hour, minute))
+                        if candidate >= start:
+                            return candidate.astimezone()
+            day += timedelta(days=1)
+        return None
+    if latitude is None or longitude is None:
+        raise ValueError("sun rules need LATITUDE and LONGITUDE to be configured")
+    offset = timedelta(minutes=rule.get("offsetMin", 0))
+    index = 0 if rule["event"] == "sunrise" else 1
+    day = local_after.date() - timedelta(days=1)
+    for _ in range(SEARCH_DAYS):
+        times = sun_times(day, latitude, longitude)
+        if times:
+            candidate = times[index] + offset
+            if candidate > after:
+                return candidate.astimezone()
+        day += timedelta(days=1)
+    return None
+
+
+def _row_to_schedule(row) -> dict:
+    return {
+        "id": row[0],
+        "name": row[1],
+        "profileId": row[2],
+        "rule": json.loads(row[3]),
+        "enabled": bool(row[4]),
+        "created_at": row[5],
+        "updated_at": row[6],
+    }
+
+
+SELECT_COLUMNS = "SELECT id, name, profile_id, rule_json, enabled, created_at, updated_at FROM schedules"
+
+
+@offloaded
+def list_schedules() -> list[dict]:
+    with db_conn() as conn:
+        rows = conn.execute(f"{SELECT_COLUMNS} ORDER BY name").fetchall()
+    return [_row_to_schedule(row) for row in rows]
+
+
+@offloaded
+def create_schedule(name: str, profile_id: str, rule: dict, enabled: bool = True) -> dict:
+    schedule_id = new_id()
+    now = datetime.utcnow().isoformat() + "Z"
+    with db_conn() as conn:
+        conn.execute(
+            "INSERT INTO schedules (id, name, profile_id, rule_json, enabled, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (schedule_id, name, profile_id, json.dumps(rule), int(enabled), now, now),
+        )
+        conn.commit()
+    return {"id": schedule_id, "name": name, "profileId": profile_id, "rule": rule, "enabled": enabled,
+            "created_at": now, "updated_at": now}
+
+
+@offloaded
+def update_schedule(schedule_id: str, name: str | None, profile_id: str | None, rule: dict | None, enabled: bool | None) -> None:
+    now = datetime.utcnow().isoformat() + "Z"
+    with db_conn() as conn:
+        if name is not None:
+            conn.execute("UPDATE schedules SET name = ?, updated_at = ? WHERE id = ?", (name, now, schedule_id))
+        if profile_id is not None:
+            conn.execute("UPDATE schedules SET profile_id = ?, updated_at = ? WHERE id = ?", (profile_id, now, schedule_id))
+        if rule is not None:
+            conn.execute("UPDATE schedules SET rule_json = ?, updated_at = ? WHERE id = ?", (json.dumps(rule), now, schedule_id))
+        if enabled is not None:
+            conn.execute("UPDATE schedules SET enabled = ?, updated_at = ? WHERE id = ?", (int(enabled), now, schedule_id))
+        conn.commit()
+
+
+@offloaded
+def delete_schedule(schedule_id: str) -> None:
+    with db_conn() as conn:
+        conn.execute("DELETE FROM schedules WHERE id = ?", (schedule_id,))
+        conn.commit()
+
+
+@offloaded
+def get_schedule(schedule_id: str) -> dict | None:
+    with db_conn() as conn:
+        row = conn.execute(f"{SELECT_COLUMNS} WHERE id = ?", (schedule_id,)).fetchone()
+    return _row_to_schedule(row) if row else None
@@ -10,7 +10,17 @@ class SleepStatus:
     output: str | None
 
 
-def apply_sleep_prevention() -> SleepStatus:
+SLEEP_MODES = ("auto", "x11", "console")
+FB_BLANK_PATH = "/sys/class/graphics/fb0/blank"
+
+
+def apply_sleep_prevention(mode: str = "auto") -> SleepStatus:
+    if mode not in SLEEP_MODES:
+        return SleepStatus(False, f"unknown sleep mode: {mode}")
+    outputs = []
+    if mode == "console":
+        error = _console_prevention(outputs)
+        return SleepStatus(error is None, error or ("\n".join(outputs) if outputs else None))
     env = os.environ.copy()
     env.setdefault("DISPLAY", ":0")
     env.setdefault("XAUTHORITY", f"/home/{getpass.getuser()}/.Xauthority")
@@ -21,35 +31,50 @@ def apply_sleep_prevention() -> SleepStatus:
         ["xset", "s", "reset"],
         ["xset", "dpms", "force", "on"],
     ]
-    outputs = []
     for cmd in cmds:
         try:
             result = subprocess.run(cmd, capture_output=True, text=True, check=True, env=env)
             if result.stdout:
                 outputs.append(result.stdout.strip())
         except Exception as exc:
+            if mode == "x11":
+                return SleepStatus(False, str(exc))
             # Fallback for console/KMS setups
-            try:
-                result = subprocess.run(
-                    ["setterm", "-blank", "0", "-powerdown", "0", "-powersave", "off"],
-                    capture_output=True,
-                    text=True,
-                    check=True,
-                )
-                if result.stdout:
-                    outputs.append(result.stdout.strip())
-            except Exception:
-                pass
-            try:
-                result = subprocess.run(
-                    ["vcgencmd", "display_power", "1"],
-                    capture_output=True,
-                    text=True,
-                    check=True,
-                )
-                if result.stdout:
-                    outputs.append(result.stdout.strip())
-                return SleepStatus(True, "\n".join(outputs) if outputs else None)
-            except Exception:
+            if _console_prevention(outputs) is not None:
                 return SleepStatus(False, str(exc))
+            return SleepStatus(True, "\n".join(outputs) if outputs else None)
     return SleepStatus(True, "\n".join(outputs) if outputs else None)
+
+
+def _console_prevention(outputs: list[str]) -> str | None:
+    """Keep the console and the framebuffer from blanking; returns an error or None."""
+    try:
+        result = subprocess.run(
+            ["setterm", "-blank", "0", "-powerdown", "0", "-powersave", "off"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        if result.stdout:
+            outputs.append(result.stdout.strip())
+    except Exception:
+        pass
+    try:
+        # The renderer may be drawing straight to the framebuffer; make sure
+        # the kernel has not blanked it.
+        with open(FB_BLANK_PATH, "w", encoding="utf-8") as f:
+            f.write("0")
+    except OSError:
+        pass
+    try:
+        result = subprocess.run(
+            ["vcgencmd", "display_power", "1"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        if result.stdout:
+            outputs.append(result.stdout.strip())
+    except Exception as exc:
+        return str(exc)
+    return None
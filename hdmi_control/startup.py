@@ -0,0 +1,93 @@
+from __future__ import annotations
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+
+def process_age() -> float:
+    """Seconds since this process was started, from /proc; 0.0 when unavailable."""
+    try:
+        with open("/proc/self/stat", encoding="ascii") as f:
+            # The command name may contain spaces; fields resume after ")".
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime", encoding="ascii") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class Startup:
+    """Times the server's startup and runs the slow parts in the background.
+
+    Phases are recorded in ms. `mark(name)` records the time since the
+    process started, so "boot" covers the interpreter and module imports.
+    `phase(name)` times a block. `run_background(chains, on_ready)` runs
+    each chain of (name, step) pairs on its own thread, steps of a chain in
+    order, and calls `on_ready()` once every chain is done; until then the
+    status is "initializing". A step that raises is recorded in `errors`
+    and its chain carries on.
+    """
+
+    def __init__(self):
+        self.origin = time.monotonic() - process_age()
+        self._lock = threading.Lock()
+        self.phases: dict[str, float] = {}
+        self.errors: dict[str, str] = {}
+        self._running = 0
+        self.ready_ms: float | None = None
+
+    def _since_origin_ms(self) -> float:
+        return round((time.monotonic() - self.origin) * 1000.0, 1)
+
+    def mark(self, name: str) -> None:
+        with self._lock:
+            self.phases[name] = self._since_origin_ms()
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases[name] = round((time.perf_counter() - started) * 1000.0, 1)
+
+    def run_background(self, chains: list[list[tuple[str, Callable[[], None]]]], on_ready: Callable[[], None]) -> None:
+        with self._lock:
+            self._running = len(chains)
+        if not chains:
+            self._chain_done(on_ready)
+            return
+        for chain in chains:
+            threading.Thread(target=self._run_chain, args=(chain, on_ready), daemon=True).start()
+
+    def _run_chain(self, chain: list[tuple[str, Callable[[], None]]], on_ready: Callable[[], None]) -> None:
+        for name, step in chain:
+            try:
+                with self.phase(name):
+                    step()
+            except Exception as exc:
+                with self._lock:
+                    self.errors[name] = str(exc)
+        with self._lock:
+            self._running -= 1
+            last = self._running <= 0
+        if last:
+            self._chain_done(on_ready)
+
+    def _chain_done(self, on_ready: Callable[[], None]) -> None:
+        with self._lock:
+            self.ready_ms = self._since_origin_ms()
+        on_ready()
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "status": "ready" if self.ready_ms is not None else "initializing",
+                "phases": dict(self.phases),
+                "readyMs": self.ready_ms,
+                "errors": dict(self.errors),
+            }
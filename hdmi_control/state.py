@@ -46,6 +46,8 @@ class RenderState:
         "background": "#000000",
         "interpolation": "linear",
         "fullscreen": True,
+        # Software dimming applied by the renderer; 1.0 leaves frames as they are.
+        "dim": 1.0,
     })
 
 
@@ -53,6 +55,9 @@ class RenderState:
 class SystemState:
     activeProfileId: str | None = None
     activeImageId: str | None = None
+    playlist: dict | None = None
+    # Keyframes the renderer follows while a DDC ramp also dims in software.
+    softwareRamp: dict | None = None
     ddc: DdcState = field(default_factory=DdcState)
     render: RenderState = field(default_factory=RenderState)
     meta: dict = field(default_factory=lambda: {"version": 1, "updatedAt": now_iso()})
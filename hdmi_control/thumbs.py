@@ -0,0 +1,76 @@
+import os
+
+from .config import CONFIG
+from .blocking import offloaded
+from .files import mkstemp
+from .imaging import pil_image
+from .metrics import CACHE_REQUESTS
+
+
+THUMB_DIR = os.path.join(CONFIG.data_dir, "images", "thumbs")
+THUMB_SIZES = (128, 256, 512)
+DEFAULT_THUMB_SIZE = 256
+
+
+def pick_size(requested: int | None) -> int:
+    """Snap a requested edge length to the smallest configured size that covers it."""
+    if not requested:
+        return DEFAULT_THUMB_SIZE
+    for size in THUMB_SIZES:
+        if size >= requested:
+            return size
+    return THUMB_SIZES[-1]
+
+
+def thumb_etag(key: str, size: int) -> str:
+    return f"{key}-{size}"
+
+
+def thumb_path(key: str, size: int) -> str:
+    return os.path.join(THUMB_DIR, f"{key}_{size}.jpg")
+
+
+@offloaded
+def ensure_thumb(key: str, source_path: str, size: int) -> tuple[str, bool]:
+    """Return the cached thumbnail path, generating it on a miss.
+
+    The second element is True when the thumbnail was already on disk.
+    """
+    path = thumb_path(key, size)
+    if os.path.exists(path):
+        CACHE_REQUESTS.inc(cache="thumb", result="hit")
+        return path, True
+    CACHE_REQUESTS.inc(cache="thumb", result="miss")
+    generate_thumb(source_path, path, size)
+    return path, False
+
+
+def generate_thumb(source_path: str, dest_path: str, size: int) -> None:
+    from PIL import ImageOps
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    with pil_image().open(source_path) as image:
+        # For JPEGs this picks a DCT scale so the decoder never produces the
+        # full-resolution bitmap; other formats ignore it.
+        image.draft("RGB", (size, size))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        # Write to a temp file and rename so concurrent requests never serve
+        # a partially written thumbnail.
+        fd, tmp_path = mkstemp(dir=os.path.dirname(dest_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                image.save(f, format="JPEG", quality=85)
+            os.replace(tmp_path, dest_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def delete_thumbs(key: str) -> None:
+    for size in THUMB_SIZES:
+        path = thumb_path(key, size)
+        if os.path.exists(path):
+            os.remove(path)
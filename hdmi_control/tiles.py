@@ -0,0 +1,184 @@
+import json
+import os
+import shutil
+from typing import Callable
+
+from .config import CONFIG
+from .blocking import offloaded
+from .files import mkdtemp
+from .imaging import pil_image
+
+
+TILE_DIR = os.path.join(CONFIG.data_dir, "images", "tiles")
+MANIFEST = "manifest.json"
+TILE_QUALITY = 90
+EXIF_ORIENTATION = 0x0112
+# libjpeg can decode at down to 1/8 scale, i.e. three pyramid levels.
+JPEG_DRAFT_LEVELS = 3
+# Modes `Image.reduce` handles; anything else is converted to RGB first.
+REDUCE_MODES = ("L", "LA", "RGB", "RGBA")
+
+
+def tile_dir(key: str) -> str:
+    return os.path.join(TILE_DIR, key)
+
+
+def tile_path(key: str, level: int, col: int, row: int) -> str:
+    return os.path.join(tile_dir(key), str(level), f"{col}_{row}.jpg")
+
+
+def tile_etag(key: str, level: int, col: int, row: int) -> str:
+    return f"{key}-t{level}-{col}-{row}"
+
+
+def should_tile(width: int, height: int, mode: str = "auto") -> bool:
+    """`mode` is "1" (always), "0" (never) or "auto" (above TILE_MIN_MEGAPIXELS)."""
+    if mode == "1":
+        return True
+    if mode == "0":
+        return False
+    return width * height >= CONFIG.tile_min_megapixels * 1_000_000
+
+
+@offloaded
+def load_manifest(key: str) -> dict | None:
+    try:
+        with open(os.path.join(tile_dir(key), MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+@offloaded
+def build_pyramid(key: str, source_path: str, progress: Callable[[float], None] | None = None) -> dict:
+    """Cut the image into TILE_SIZE tiles at every zoom level.
+
+    Level 0 is full resolution and each further level halves it until the
+    whole image fits in one tile. Only one decoded copy of the source is
+    held at a time: tiles are cropped from it in bands, and EXIF
+    orientation and RGB conversion are applied per tile. JPEG levels are
+    decoded straight at half, quarter and eighth scale (`draft`) once the
+    previous level is released; other levels come from `reduce`. Tiles are
+    written to a temp directory that replaces the previous pyramid in one
+    rename, so readers never see half a pyramid.
+    """
+    size = CONFIG.tile_size
+    report = progress or (lambda fraction: None)
+    os.makedirs(TILE_DIR, exist_ok=True)
+    work = mkdtemp(dir=TILE_DIR, suffix=".tmp")
+    try:
+        with pil_image().open(source_path) as image:
+            jpeg = image.format == "JPEG"
+            orientation = image.getexif().get(EXIF_ORIENTATION, 1)
+            source_size = image.size
+        method = _orientation_methods().get(orientation)
+        swap = orientation in (5, 6, 7, 8)
+        manifest = None
+        level = 0
+        image = None
+        # Each level has a quarter of the previous one's pixels.
+        total = sum(0.25 ** n for n in range(16))
+        done = 0.0
+        while True:
+            if image is None or (jpeg and level <= JPEG_DRAFT_LEVELS):
+                image = None
+                image = _decode_level(source_path, source_size, level if jpeg else 0)
+            else:
+                image = image.reduce(2)
+            width, height = (image.height, image.width) if swap else image.size
+            if manifest is None:
+                manifest = {"width": width, "height": height, "tileSize": size, "format": "jpg", "levels": []}
+            cols = (width + size - 1) // size
+            rows = (height + size - 1) // size
+            os.makedirs(os.path.join(work, str(level)))
+            for row in range(rows):
+                # One band of tile rows at a time, in source coordinates.
+                band_box = _source_box((0, row * size, width, min(height, (row + 1) * size)), image.size, orientation)
+                band = image.crop(band_box)
+                for col in range(cols):
+                    box = _source_box((col * size, row * size, min(width, (col + 1) * size), min(height, (row + 1) * size)),
+                                      image.size, orientation)
+                    tile = band.crop((box[0] - band_box[0], box[1] - band_box[1], box[2] - band_box[0], box[3] - band_box[1]))
+                    if method is not None:
+                        tile = tile.transpose(method)
+                    if tile.mode != "RGB":
+                        tile = tile.convert("RGB")
+                    tile.save(os.path.join(work, str(level), f"{col}_{row}.jpg"), format="JPEG", quality=TILE_QUALITY)
+                del band
+            manifest["levels"].append({"level": level, "width": width, "height": height, "cols": cols, "rows": rows})
+            done += 0.25 ** level
+            report(min(1.0, done / total))
+            if width <= size and height <= size:
+                break
+            level += 1
+        image = None
+        with open(os.path.join(work, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        dest = tile_dir(key)
+        if os.path.exists(dest):
+            shutil.rmtree(dest)
+        os.replace(work, dest)
+    except BaseException:
+        shutil.rmtree(work, ignore_errors=True)
+        raise
+    report(1.0)
+    return manifest
+
+
+def _decode_level(source_path: str, source_size: tuple[int, int], level: int):
+    """Decode the source, unrotated, at 1 / 2**level scale.
+
+    JPEG is decoded at up to an eighth of its size by libjpeg itself
+    (`draft`); any remaining factor is applied with `reduce`.
+    """
+    scale = 1 << level
+    # Not a context manager: closing would free the decoded pixels. Pillow
+    # closes the file itself once a single-frame image is loaded.
+    image = pil_image().open(source_path)
+    if level:
+        image.draft(image.mode, ((source_size[0] + scale - 1) // scale, (source_size[1] + scale - 1) // scale))
+    image.load()
+    factor = scale // max(1, round(source_size[0] / image.width))
+    if image.mode not in REDUCE_MODES:
+        image = image.convert("RGB")
+    if factor > 1:
+        image = image.reduce(factor)
+    return image
+
+
+def _orientation_methods() -> dict:
+    Image = pil_image()
+    return {
+        2: Image.Transpose.FLIP_LEFT_RIGHT,
+        3: Image.Transpose.ROTATE_180,
+        4: Image.Transpose.FLIP_TOP_BOTTOM,
+        5: Image.Transpose.TRANSPOSE,
+        6: Image.Transpose.ROTATE_270,
+        7: Image.Transpose.TRANSVERSE,
+        8: Image.Transpose.ROTATE_90,
+    }
+
+
+def _source_box(box: tuple[int, int, int, int], source_size: tuple[int, int], orientation: int) -> tuple[int, int, int, int]:
+    """Map a box in displayed (EXIF-oriented) pixels to the stored image."""
+    sw, sh = source_size
+    x0, y0, x1, y1 = box
+    corners = [_source_point(x, y, sw, sh, orientation) for x, y in ((x0, y0), (x1, y1))]
+    us, vs = [c[0] for c in corners], [c[1] for c in corners]
+    return min(us), min(vs), max(us), max(vs)
+
+
+def _source_point(x: int, y: int, sw: int, sh: int, orientation: int) -> tuple[int, int]:
+    return {
+        2: (sw - x, y),
+        3: (sw - x, sh - y),
+        4: (x, sh - y),
+        5: (y, x),
+        6: (y, sh - x),
+        7: (sw - y, sh - x),
+        8: (sw - y, x),
+    }.get(orientation, (x, y))
+
+
+def delete_tiles(key: str) -> None:
+    shutil.rmtree(tile_dir(key), ignore_errors=True)
@@ -0,0 +1,176 @@
+from __future__ import annotations
+import functools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Any, Callable
+
+from .config import CONFIG
+
+
+logger = logging.getLogger(__name__)
+
+
+class Tracer:
+    """Span recorder backed by a fixed-size ring buffer.
+
+    Spans are only kept while tracing is enabled; the slow-op log works
+    independently and records any span over `slow_ms`. With both off a span
+    is a single attribute check.
+    """
+
+    def __init__(self, capacity: int | None = None, slow_ms: float | None = None, enabled: bool | None = None):
+        self.enabled = CONFIG.trace_enabled if enabled is None else enabled
+        self.slow_ms = CONFIG.trace_slow_ms if slow_ms is None else slow_ms
+        self._events: deque = deque(maxlen=capacity or CONFIG.trace_buffer_size)
+        self._slow: deque = deque(maxlen=200)
+        self._pid = os.getpid()
+
+    def set_enabled(self, enabled: bool) -> None:
+        self.enabled = enabled
+
+    def clear(self) -> None:
+        self._events.clear()
+
+    @contextmanager
+    def span(self, name: str, cat: str = "app", **args):
+        if not self.enabled and not self.slow_ms:
+            yield
+            return
+        wall = time.time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, cat, wall, time.perf_counter() - start, args)
+
+    def record(self, name: str, cat: str, wall: float, seconds: float, args: dict | None = None,
+               pid: Any = None, tid: Any = None) -> None:
+        if self.enabled:
+            # deque.append is atomic, so no lock is needed on the hot path.
+            self._events.append((name, cat, wall, seconds, pid or self._pid, tid or threading.get_ident(), args or None))
+        if self.slow_ms and seconds * 1000.0 >= self.slow_ms:
+            entry = {"name": name, "cat": cat, "at": wall, "ms": round(seconds * 1000.0, 2)}
+            if args:
+                entry["args"] = args
+            self._slow.append(entry)
+            logger.warning("slow %s %s took %.1f ms %s", cat, name, seconds * 1000.0, args or "")
+
+    def slow_ops(self) -> list[dict]:
+        return list(self._slow)
+
+    def chrome_trace(self) -> dict:
+        """Return buffered spans in the Chrome trace event format (chrome://tracing, Perfetto)."""
+        events = []
+        for name, cat, wall, seconds, pid, tid, args in list(self._events):
+            event = {
+                "name": name,
+                "cat": cat,
+                "ph": "X",
+                "ts": int(wall * 1_000_000),
+                "dur": max(1, int(seconds * 1_000_000)),
+                "pid": pid,
+                "tid": tid,
+            }
+            if args:
+                event["args"] = args
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+class SamplingProfiler:
+    """Samples every thread's stack at a fixed interval for a bounded window.
+
+    Uses sys._current_frames(), so it sees OS threads only; under gevent or
+    eventlet all greenlets show up as the hub thread.
+    """
+
+    MAX_SECONDS = 60.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._started_at: float | None = None
+        self._seconds = 0.0
+        self._interval = 0.0
+
+    def start(self, seconds: float, interval_ms: float) -> bool:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return False
+            self._stacks = Counter()
+            self._samples = 0
+            self._seconds = max(0.1, min(float(seconds), self.MAX_SECONDS))
+            self._interval = max(1.0, float(interval_ms)) / 1000.0
+            self._started_at = time.time()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            return True
+
+    def running(self) -> bool:
+        thread = self._thread
+        return bool(thread and thread.is_alive())
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        deadline = time.monotonic() + self._seconds
+        while time.monotonic() < deadline:
+            frames = sys._current_frames()
+            stacks = [_collapse(frame) for ident, frame in frames.items() if ident != own]
+            del frames
+            with self._lock:
+                self._stacks.update(stacks)
+                self._samples += 1
+            time.sleep(self._interval)
+
+    def result(self, limit: int = 100) -> dict:
+        with self._lock:
+            top = self._stacks.most_common(limit)
+            return {
+                "running": self.running(),
+                "startedAt": self._started_at,
+                "seconds": self._seconds,
+                "intervalMs": round(self._interval * 1000.0, 2),
+                "samples": self._samples,
+                "stacks": [{"stack": stack, "count": count} for stack, count in top],
+            }
+
+    def collapsed(self) -> str:
+        """Folded stacks ("a;b;c count" per line) for flamegraph tools."""
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in self._stacks.most_common())
+
+
+def _collapse(frame) -> str:
+    # Walk the frames directly; traceback.extract_stack would also read
+    # source lines for every sample.
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+tracer = Tracer()
+profiler = SamplingProfiler()
+
+
+def span(name: str, cat: str = "app", **args):
+    return tracer.span(name, cat, **args)
+
+
+def traced(name: str, cat: str = "app") -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name, cat):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,194 @@
+"""Animated GIF/WebP/APNG playback from a ring of screen-ready frames.
+
+Each frame is decoded, colour-corrected and transformed once by the
+caller's `render` function and kept as raw bytes ready for display. If
+every frame fits in the memory budget, the whole animation is rendered up
+front and loops from memory. Longer animations stream instead: a decoder
+thread keeps a bounded ring of upcoming frames full and decodes the file
+again on every loop.
+
+Playback follows each frame's own duration. When the display falls
+behind, late frames are skipped rather than shown late, and the decoder
+skips rendering frames that are already overdue.
+"""
+import bisect
+import io
+import queue
+import threading
+import time
+from typing import Callable
+
+from PIL import Image, ImageSequence
+
+# Browsers treat delays of 10 ms or less as 100 ms; so does the server's
+# duration metadata.
+DEFAULT_FRAME_MS = 100
+
+
+def is_animated(image_bytes: bytes) -> bool:
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            return bool(getattr(image, "is_animated", False)) and image.n_frames > 1
+    except Exception:
+        return False
+
+
+def frame_seconds(value) -> float:
+    try:
+        duration = int(value or 0)
+    except (TypeError, ValueError):
+        duration = 0
+    return (duration if duration > 10 else DEFAULT_FRAME_MS) / 1000.0
+
+
+class AnimationClip:
+    """Screen-ready frames of one animation plus its playback clock.
+
+    `render(image)` turns a decoded RGB frame into a screen-sized PIL image.
+    Frames are (size, mode, bytes) tuples like `FramePreparer` produces.
+    Call `start()` when the clip goes on screen, then `frame_at(now)` to get
+    the frame to show (None when it has not changed) and `next_change(now)`
+    for how long to sleep. `close()` stops the decoder thread.
+    """
+
+    POLL = 0.005
+
+    def __init__(self, image_bytes: bytes, render: Callable[[Image.Image], Image.Image], budget_bytes: int):
+        self.image_bytes = image_bytes
+        self.render = render
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            self.frame_count = image.n_frames
+            # GIF/APNG loop count: 0 (or missing) means forever.
+            self.loops = int(image.info.get("loop", 0) or 0)
+            self.durations = []
+            for index in range(self.frame_count):
+                image.seek(index)
+                self.durations.append(frame_seconds(image.info.get("duration")))
+        self.total = sum(self.durations)
+        self._ends = []
+        elapsed = 0.0
+        for duration in self.durations:
+            elapsed += duration
+            self._ends.append(elapsed)
+
+        first = self._render(next(self._decode()))
+        self.first = first
+        frame_bytes = len(first[2])
+        self.capacity = max(2, budget_bytes // max(1, frame_bytes))
+        self.streaming = self.frame_count > self.capacity
+        self.skipped = 0
+        self._started: float | None = None
+        self._shown: int | None = None
+        self._stop = threading.Event()
+        if self.streaming:
+            self._frames = None
+            self._ring: queue.Queue | None = None
+            self._current = None
+        else:
+            self._frames = [first] + [self._render(frame) for frame in self._decode(start=1)]
+
+    def start(self, now: float | None = None) -> None:
+        self._started = time.perf_counter() if now is None else now
+        self._shown = None
+        if self.streaming:
+            # A clip can go on screen again (after a replug, or when a
+            # playlist comes back to it), so every showing gets its own
+            # decoder thread and ring; the previous one is told to stop.
+            self._stop.set()
+            self._stop = threading.Event()
+            self._ring = queue.Queue(maxsize=self.capacity)
+            self._current = None
+            threading.Thread(target=self._stream, args=(self._stop, self._ring), daemon=True).start()
+
+    def close(self) -> None:
+        self._stop.set()
+
+    def position(self, now: float) -> tuple[int, float]:
+        """(loop number, seconds into that loop) at `now`."""
+        elapsed = max(0.0, now - (self._started if self._started is not None else now))
+        cycle = int(elapsed // self.total)
+        if self.loops and cycle >= self.loops:
+            return self.loops - 1, self.total
+        return cycle, elapsed - cycle * self.total
+
+    def index_at(self, offset: float) -> int:
+        return min(self.frame_count - 1, bisect.bisect_right(self._ends, offset))
+
+    def frame_at(self, now: float):
+        cycle, offset = self.position(now)
+        ordinal = cycle * self.frame_count + self.index_at(offset)
+        if ordinal == self._shown:
+            return None
+        if self._shown is not None and ordinal > self._shown + 1:
+            self.skipped += ordinal - self._shown - 1
+        if self.streaming:
+            frame = self._take(ordinal)
+            if frame is None:
+                # The decoder has not produced it yet; keep the last frame.
+                return None
+        else:
+            frame = self._frames[ordinal % self.frame_count]
+        self._shown = ordinal
+        return frame
+
+    def next_change(self, now: float) -> float | None:
+        """Seconds until the next frame is due, or None once a finite animation has ended."""
+        cycle, offset = self.position(now)
+        if self.loops and cycle == self.loops - 1 and offset >= self.total:
+            return None
+        index = self.index_at(offset)
+        if cycle * self.frame_count + index != self._shown:
+            # Due but not decoded yet (streaming); check again shortly.
+            return self.POLL
+        return max(0.0, self._ends[index] - offset)
+
+    def _take(self, ordinal: int):
+        # Ring entries are (ordinal, frame) in order; drop the ones already
+        # overdue and keep the one that is due now.
+        while True:
+            if self._current is not None and self._current[0] >= ordinal:
+                return self._current[1] if self._current[0] == ordinal else None
+            if self._ring is None:
+                return None
+            try:
+                self._current = self._ring.get_nowait()
+            except queue.Empty:
+                return None
+
+    def _stream(self, stop: threading.Event, ring: queue.Queue) -> None:
+        cycle = 0
+        while not stop.is_set():
+            for index, frame in enumerate(self._decode()):
+                ordinal = cycle * self.frame_count + index
+                if self._overdue(ordinal):
+                    # Keep decoding (GIF frames build on the previous one)
+                    # but do not spend time rendering a frame nobody sees.
+                    continue
+                rendered = self._render(frame)
+                while not stop.is_set():
+                    try:
+                        ring.put((ordinal, rendered), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            cycle += 1
+            if self.loops and cycle >= self.loops:
+                return
+
+    def _overdue(self, ordinal: int) -> bool:
+        if self._started is None:
+            return False
+        cycle, offset = self.position(time.perf_counter())
+        return ordinal < cycle * self.frame_count + self.index_at(offset)
+
+    def _decode(self, start: int = 0):
+        with Image.open(io.BytesIO(self.image_bytes)) as image:
+            for index, frame in enumerate(ImageSequence.Iterator(image)):
+                if index >= start:
+                    yield frame.convert("RGB")
+
+    def _render(self, frame: Image.Image):
+        out = self.render(frame)
+        return out.size, out.mode, out.tobytes()
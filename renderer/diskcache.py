@@ -0,0 +1,99 @@
+"""Size bound for the renderer's on-disk caches.
+
+The caches live on the SD card and would otherwise grow with every image
+ever shown. `DiskBudget` keeps a running total of a cache directory's
+size and, once it passes the limit, deletes entries least recently used
+first. Use is tracked through mtime: readers `touch` an entry on every
+hit. The directory is walked once on first use and again only to evict,
+so the per-hit cost is one utime call.
+"""
+import os
+import threading
+from typing import Callable, Iterable
+
+
+def touch(path: str) -> None:
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+class DiskBudget:
+    """Evicts files under `directory` once they total more than `max_bytes`.
+
+    `entry_of(path)` maps a file to the entry it belongs to, so companion
+    files (a body and its ETag) are evicted together; by default every
+    file is its own entry. With `recursive` False only the top level is
+    counted, leaving subdirectories to their own budgets.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, entry_of: Callable[[str], str] | None = None,
+                 recursive: bool = True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.entry_of = entry_of or (lambda path: path)
+        self.recursive = recursive
+        self._lock = threading.Lock()
+        self._bytes: int | None = None
+        self.evicted = 0
+
+    def added(self, nbytes: int, keep: Iterable[str] = ()) -> None:
+        """Account for `nbytes` just written and evict if over budget, sparing `keep` entries."""
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = sum(size for _, size, _ in self._files())
+            else:
+                self._bytes += nbytes
+            if self._bytes > self.max_bytes:
+                self._evict({self.entry_of(path) for path in keep})
+
+    def _files(self) -> list[tuple[str, int, float]]:
+        files = []
+        if self.recursive:
+            walker = os.walk(self.directory)
+        else:
+            walker = [(self.directory, [], os.listdir(self.directory) if os.path.isdir(self.directory) else [])]
+        for root, _, names in walker:
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if os.path.isfile(path):
+                    files.append((path, st.st_size, st.st_mtime))
+        return files
+
+    def _evict(self, keep: set[str]) -> None:
+        entries: dict[str, list] = {}
+        total = 0
+        for path, size, mtime in self._files():
+            entry = entries.setdefault(self.entry_of(path), [0.0, 0, []])
+            entry[0] = max(entry[0], mtime)
+            entry[1] += size
+            entry[2].append(path)
+            total += size
+        for key, (_, size, paths) in sorted(entries.items(), key=lambda item: item[1][0]):
+            if total <= self.max_bytes:
+                break
+            if key in keep:
+                continue
+            for path in paths:
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self._prune(os.path.dirname(path))
+            total -= size
+            self.evicted += 1
+        self._bytes = total
+
+    def _prune(self, directory: str) -> None:
+        # Drop directories left empty (a tiled image's level folders).
+        while self.recursive and directory != self.directory and directory.startswith(self.directory):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                return
+            directory = os.path.dirname(directory)
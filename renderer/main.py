@@ -1,23 +1,43 @@
 import io
 import json
+import math
 import os
 import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
 
-try:
-    import pygame
-except Exception:
-    pygame = None
-
 import socketio
 from PIL import Image, ImageEnhance, ImageOps
 
+from renderer import transitions
+from renderer.animation import AnimationClip, is_animated
+from renderer.output import DimmedOutput, open_output
+from renderer.diskcache import DiskBudget, touch
+from renderer.tiles import TileCache
+
 
 @dataclass
 class RendererConfig:
     server_url: str = os.getenv("SERVER_URL", "http://127.0.0.1:5000")
     poll_interval: float = float(os.getenv("POLL_INTERVAL", "1.0"))
+    cache_dir: str = os.getenv("RENDERER_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "screeny"))
+    memory_cache_items: int = int(os.getenv("RENDERER_MEMORY_CACHE_ITEMS", "10"))
+    cache_mb: int = int(os.getenv("RENDERER_CACHE_MB", "1024"))
+    telemetry_interval: float = float(os.getenv("RENDERER_TELEMETRY_INTERVAL", "5.0"))
+    transition: str = os.getenv("RENDERER_TRANSITION", "crossfade")
+    transition_ms: int = int(os.getenv("RENDERER_TRANSITION_MS", "500"))
+    transition_fps: float = float(os.getenv("RENDERER_TRANSITION_FPS", "30"))
+    animation_budget_mb: int = int(os.getenv("RENDERER_ANIMATION_BUDGET_MB", "128"))
+    tile_cache_mb: int = int(os.getenv("RENDERER_TILE_CACHE_MB", "96"))
+    tile_disk_mb: int = int(os.getenv("RENDERER_TILE_DISK_MB", "512"))
+    tile_workers: int = int(os.getenv("RENDERER_TILE_WORKERS", "4"))
+    output: str = os.getenv("RENDERER_OUTPUT", "auto")
+    fb_device: str = os.getenv("RENDERER_FB_DEVICE", "/dev/fb0")
+    fb_geometry: str = os.getenv("RENDERER_FB_GEOMETRY", "")
+    fb_tty: str = os.getenv("RENDERER_FB_TTY", "/dev/tty0")
 
 
 def fetch_json(url: str) -> dict:
@@ -26,23 +46,191 @@ def fetch_json(url: str) -> dict:
         return json.loads(resp.read().decode("utf-8"))
 
 
-def resolve_image_url(server_url: str, image_id: str) -> str | None:
-    data = fetch_json(f"{server_url}/api/images")
-    for item in data:
-        if item["id"] == image_id:
-            return f"{server_url}/api/images/{image_id}/file"
-    return None
-
-
-def fetch_image_bytes(url: str) -> bytes | None:
-    import urllib.request
+class ImageCache:
+    """Disk-backed image cache that revalidates with the server.
+
+    Each entry is stored as <key>.bin with its ETag in <key>.etag. Cached
+    entries are revalidated with If-None-Match, so an unchanged image costs
+    a 304. Interrupted downloads are kept as <key>.part, with the ETag they
+    started under in <key>.part.etag, and resumed with Range/If-Range; the
+    body's ETag is only replaced once a download is complete. If the server
+    is unreachable, the cached copy is used. The directory is kept under
+    `max_bytes`, evicting the least recently used images.
+    """
+
+    SUFFIXES = (".part.etag", ".etag", ".part", ".bin")
+
+    def __init__(self, cache_dir: str, memory_items: int = 10, max_bytes: int = 1024 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.memory_items = memory_items
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self.counts: dict[str, int] = {}
+        # Only the top level: tiles keep their own budget in a subdirectory.
+        self.budget = DiskBudget(cache_dir, max_bytes, entry_of=self._entry_of, recursive=False)
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get(self, key: str, url: str) -> bytes | None:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self._count("memory")
+            return self._memory[key]
+        data = self._fetch(key, url)
+        if data is not None:
+            self._memory[key] = data
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+        return data
+
+    def take_counts(self) -> dict[str, int]:
+        counts, self.counts = self.counts, {}
+        return counts
+
+    def _count(self, result: str) -> None:
+        self.counts[result] = self.counts.get(result, 0) + 1
+
+    def _paths(self, key: str) -> tuple[str, str, str, str]:
+        base = os.path.join(self.cache_dir, "".join(c for c in key if c.isalnum() or c in "-_"))
+        return base + ".bin", base + ".etag", base + ".part", base + ".part.etag"
+
+    @classmethod
+    def _entry_of(cls, path: str) -> str:
+        for suffix in cls.SUFFIXES:
+            if path.endswith(suffix):
+                return path[:-len(suffix)]
+        return path
+
+    def _fetch(self, key: str, url: str) -> bytes | None:
+        import urllib.error
+        import urllib.request
+        body_path, etag_path, part_path, part_etag_path = self._paths(key)
+        etag = _read_text(etag_path)
+        part_etag = _read_text(part_etag_path)
+        headers = {}
+        if etag and os.path.exists(body_path):
+            headers["If-None-Match"] = etag
+        elif part_etag and os.path.exists(part_path):
+            headers["Range"] = f"bytes={os.path.getsize(part_path)}-"
+            headers["If-Range"] = part_etag
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=10) as resp:
+                new_etag = resp.headers.get("ETag")
+                if resp.status == 206 and "Range" in headers:
+                    mode = "ab"
+                    new_etag = new_etag or part_etag
+                else:
+                    mode = "wb"
+                    # The validator for resuming this download, not the body's.
+                    if new_etag:
+                        _write_text(part_etag_path, new_etag)
+                    elif os.path.exists(part_etag_path):
+                        os.remove(part_etag_path)
+                written = 0
+                with open(part_path, mode) as out:
+                    while True:
+                        chunk = resp.read(256 * 1024)
+                        if not chunk:
+                            break
+                        out.write(chunk)
+                        written += len(chunk)
+                # read() in chunks returns short rather than raising when
+                # the connection drops; keep the part for resuming instead.
+                expected = resp.headers.get("Content-Length")
+                if expected is not None and written != int(expected):
+                    raise OSError(f"short download: {written} of {expected} bytes")
+            os.replace(part_path, body_path)
+            if new_etag:
+                _write_text(etag_path, new_etag)
+            elif os.path.exists(etag_path):
+                os.remove(etag_path)
+            if os.path.exists(part_etag_path):
+                os.remove(part_etag_path)
+            self._count("resumed" if mode == "ab" else "miss")
+            self.budget.added(written, keep=[body_path])
+        except urllib.error.HTTPError as exc:
+            if exc.code != 304:
+                return None
+            self._count("revalidated")
+        except Exception:
+            if os.path.exists(body_path):
+                self._count("offline")
+        if not os.path.exists(body_path):
+            return None
+        touch(body_path)
+        with open(body_path, "rb") as f:
+            return f.read()
+
+
+def _read_text(path: str) -> str | None:
     try:
-        with urllib.request.urlopen(url, timeout=2) as resp:
-            return resp.read()
-    except Exception:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
         return None
 
 
+def _write_text(path: str, value: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(value)
+
+
+class Telemetry:
+    """Collects per-frame stage spans and reports them to the server.
+
+    Spans are buffered as [stage, wall-clock start, seconds] and sent as one
+    `renderer.telemetry` event per interval, so reporting never adds a round
+    trip to the frame path. The server turns them into metrics and, when
+    tracing is on, trace events.
+    """
+
+    MAX_SPANS = 512
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._spans: list[list] = []
+        self._frames = 0
+        self._since = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        wall = time.time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, wall, time.perf_counter() - start)
+
+    def record(self, name: str, wall: float, seconds: float) -> None:
+        if len(self._spans) < self.MAX_SPANS:
+            self._spans.append([name, round(wall, 6), round(seconds, 6)])
+
+    def frame(self) -> None:
+        self._frames += 1
+
+    def maybe_send(self, feed: "StateFeed", *caches) -> None:
+        now = time.perf_counter()
+        elapsed = now - self._since
+        if elapsed < self.interval:
+            return
+        payload = {
+            "fps": round(self._frames / elapsed, 2),
+            "pid": os.getpid(),
+            "spans": self._spans,
+            "cache": _merge_counts(cache.take_counts() for cache in caches),
+        }
+        self._spans = []
+        self._frames = 0
+        self._since = now
+        feed.emit("renderer.telemetry", payload)
+
+
+def _merge_counts(counts) -> dict[str, int]:
+    merged: dict[str, int] = {}
+    for part in counts:
+        for key, value in part.items():
+            merged[key] = merged.get(key, 0) + value
+    return merged
+
+
 def apply_color(image: Image.Image, color: dict) -> Image.Image:
     brightness = float(color.get("brightness", 0.0))
     contrast = float(color.get("contrast", 1.0))
@@ -72,7 +260,187 @@ def apply_color(image: Image.Image, color: dict) -> Image.Image:
     return image
 
 
-def apply_transform(image: Image.Image, transform: dict, screen_size: tuple[int, int], interpolation: str) -> Image.Image:
+RIGHT_ANGLE_TRANSPOSE = {90: Image.Transpose.ROTATE_90, 180: Image.Transpose.ROTATE_180, 270: Image.Transpose.ROTATE_270}
+
+
+def _resample(interpolation: str) -> int:
+    if interpolation == "nearest":
+        return Image.NEAREST
+    if interpolation == "cubic":
+        return Image.BICUBIC
+    return Image.BILINEAR
+
+
+def parse_color(value: str, default: tuple[int, int, int] = (0, 0, 0)) -> tuple[int, int, int]:
+    if isinstance(value, str) and value.startswith("#") and len(value) == 7:
+        try:
+            return tuple(int(value[i:i + 2], 16) for i in (1, 3, 5))
+        except ValueError:
+            return default
+    return default
+
+
+def _mat_mul(a: tuple, b: tuple) -> tuple:
+    """Product of two 2x3 affine matrices (a applied after b)."""
+    a0, a1, a2, a3, a4, a5 = a
+    b0, b1, b2, b3, b4, b5 = b
+    return (
+        a0 * b0 + a1 * b3, a0 * b1 + a1 * b4, a0 * b2 + a1 * b5 + a2,
+        a3 * b0 + a4 * b3, a3 * b1 + a4 * b4, a3 * b2 + a4 * b5 + a5,
+    )
+
+
+def _mat_inv(m: tuple) -> tuple:
+    a, b, c, d, e, f = m
+    det = a * e - b * d
+    return (e / det, -b / det, (b * f - c * e) / det, -d / det, a / det, (c * d - a * f) / det)
+
+
+def _mat_apply(m: tuple, x: float, y: float) -> tuple[float, float]:
+    return m[0] * x + m[1] * y + m[2], m[3] * x + m[4] * y + m[5]
+
+
+def compile_transform(transform: dict, image_size: tuple[int, int], screen_size: tuple[int, int]) -> dict:
+    """Compile the render transform into one source-to-screen affine matrix.
+
+    The steps match `apply_transform_stepwise`: crop, rotate counter-clockwise
+    around the crop centre onto an expanded canvas, flip, scale for the mode,
+    centre on screen, then shift by pan (fractions of the screen size).
+    Returns the matrix plus the crop box and rotation for the fast paths.
+    """
+    img_w, img_h = image_size
+    screen_w, screen_h = screen_size
+    crop = transform.get("crop") or {}
+    x = max(0.0, min(1.0, float(crop.get("x", 0.0))))
+    y = max(0.0, min(1.0, float(crop.get("y", 0.0))))
+    w = max(0.01, min(1.0, float(crop.get("w", 1.0))))
+    h = max(0.01, min(1.0, float(crop.get("h", 1.0))))
+    box = (int(img_w * x), int(img_h * y), int(img_w * min(1.0, x + w)), int(img_h * min(1.0, y + h)))
+    crop_w = max(1, box[2] - box[0])
+    crop_h = max(1, box[3] - box[1])
+
+    rotation = int(transform.get("rotationDeg", 0)) % 360
+    theta = math.radians(rotation)
+    cos_t, sin_t = math.cos(theta), math.sin(theta)
+    if rotation % 90 == 0:
+        cos_t, sin_t = round(cos_t), round(sin_t)
+    rot_w = abs(crop_w * cos_t) + abs(crop_h * sin_t)
+    rot_h = abs(crop_w * sin_t) + abs(crop_h * cos_t)
+
+    m = (1.0, 0.0, -box[0] - crop_w / 2.0, 0.0, 1.0, -box[1] - crop_h / 2.0)
+    m = _mat_mul((cos_t, sin_t, rot_w / 2.0, -sin_t, cos_t, rot_h / 2.0), m)
+    if transform.get("flipH"):
+        m = _mat_mul((-1.0, 0.0, rot_w, 0.0, 1.0, 0.0), m)
+    if transform.get("flipV"):
+        m = _mat_mul((1.0, 0.0, 0.0, 0.0, -1.0, rot_h), m)
+
+    mode = transform.get("mode", "fit")
+    if mode == "stretch":
+        sx, sy = screen_w / rot_w, screen_h / rot_h
+    elif mode == "one_to_one":
+        sx = sy = 1.0
+    elif mode == "custom":
+        sx = sy = max(0.01, float(transform.get("scale", 1.0)))
+    elif mode == "fill":
+        sx = sy = max(screen_w / rot_w, screen_h / rot_h)
+    else:
+        sx = sy = min(screen_w / rot_w, screen_h / rot_h)
+    # Snap the output to whole pixels so right-angle frames stay crisp and
+    # land exactly where the stepwise pipeline put them.
+    out_w, out_h = max(1, int(rot_w * sx)), max(1, int(rot_h * sy))
+    sx, sy = out_w / rot_w, out_h / rot_h
+    pan = transform.get("pan") or {}
+    offset_x = (screen_w - out_w) // 2 + round(float(pan.get("x", 0.0)) * screen_w)
+    offset_y = (screen_h - out_h) // 2 + round(float(pan.get("y", 0.0)) * screen_h)
+    m = _mat_mul((sx, 0.0, offset_x, 0.0, sy, offset_y), m)
+    return {
+        "matrix": m,
+        "box": box,
+        "rotation": rotation,
+        "scale": (sx, sy),
+        "rect": (offset_x, offset_y, offset_x + out_w, offset_y + out_h),
+    }
+
+
+def apply_transform(
+    image: Image.Image,
+    transform: dict,
+    screen_size: tuple[int, int],
+    interpolation: str,
+    background: tuple[int, int, int] = (0, 0, 0),
+) -> Image.Image:
+    """Render `image` into a screen-sized frame with a single resampling pass.
+
+    Right-angle rotations resize only the visible part of the crop straight
+    to its on-screen size (resize keeps proper antialiasing when shrinking)
+    and then orient it with lossless transposes on the small result. Other
+    angles go through one AFFINE transform, after an integer `reduce` when
+    shrinking by more than 2x so the bilinear taps do not alias.
+    """
+    screen_w, screen_h = screen_size
+    compiled = compile_transform(transform, image.size, screen_size)
+    resample = _resample(interpolation)
+    frame_rect = compiled["rect"]
+    left = max(0, int(round(frame_rect[0])))
+    top = max(0, int(round(frame_rect[1])))
+    right = min(screen_w, int(round(frame_rect[2])))
+    bottom = min(screen_h, int(round(frame_rect[3])))
+    if right <= left or bottom <= top:
+        return Image.new(image.mode, screen_size, background)
+
+    if compiled["rotation"] % 90 == 0:
+        inverse = _mat_inv(compiled["matrix"])
+        corners = [_mat_apply(inverse, px, py) for px, py in ((left, top), (right, bottom))]
+        # Clamp away float error at the image edges; resize rejects boxes
+        # even slightly outside the source.
+        source_box = (
+            max(0.0, min(c[0] for c in corners)), max(0.0, min(c[1] for c in corners)),
+            min(float(image.width), max(c[0] for c in corners)), min(float(image.height), max(c[1] for c in corners)),
+        )
+        size = (right - left, bottom - top)
+        if compiled["rotation"] in (90, 270):
+            size = (size[1], size[0])
+        if size == (round(source_box[2] - source_box[0]), round(source_box[3] - source_box[1])) and all(
+                float(v).is_integer() for v in source_box):
+            part = image.crop(tuple(int(v) for v in source_box))
+        else:
+            part = image.resize(size, resample=resample, box=source_box)
+        if compiled["rotation"]:
+            part = part.transpose(RIGHT_ANGLE_TRANSPOSE[compiled["rotation"]])
+        if transform.get("flipH"):
+            part = part.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+        if transform.get("flipV"):
+            part = part.transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+        if part.size == screen_size:
+            return part
+        frame = Image.new(image.mode, screen_size, background)
+        frame.paste(part, (left, top))
+        return frame
+
+    matrix = compiled["matrix"]
+    source = image
+    factor = int(1.0 / min(compiled["scale"]))
+    if factor >= 2:
+        box = compiled["box"]
+        source = image.reduce(factor, box=box)
+        # Reduced pixel (u, v) covers source (box + factor * (u, v)).
+        matrix = _mat_mul(matrix, (factor, 0.0, box[0], 0.0, factor, box[1]))
+    elif compiled["box"] != (0, 0) + image.size:
+        # Rotated corners outside the crop must show background, not the
+        # neighbouring source pixels.
+        box = compiled["box"]
+        source = image.crop(box)
+        matrix = _mat_mul(matrix, (1.0, 0.0, box[0], 0.0, 1.0, box[1]))
+    return source.transform(screen_size, Image.AFFINE, data=_mat_inv(matrix), resample=resample,
+                            fillcolor=background)
+
+
+def apply_transform_stepwise(image: Image.Image, transform: dict, screen_size: tuple[int, int], interpolation: str) -> Image.Image:
+    """Previous step-by-step pipeline, kept as the reference for tests and benchmarks.
+
+    Returns the transformed image at its own size (not composited onto the
+    screen) and ignores pan.
+    """
     crop = transform.get("crop", {"x": 0.0, "y": 0.0, "w": 1.0, "h": 1.0})
     if crop:
         x = max(0.0, min(1.0, float(crop.get("x", 0.0))))
@@ -100,12 +468,7 @@ def apply_transform(image: Image.Image, transform: dict, screen_size: tuple[int,
     screen_w, screen_h = screen_size
     img_w, img_h = image.size
 
-    if interpolation == "nearest":
-        resample = Image.NEAREST
-    elif interpolation == "cubic":
-        resample = Image.BICUBIC
-    else:
-        resample = Image.BILINEAR
+    resample = _resample(interpolation)
 
     if mode == "stretch":
         return image.resize((screen_w, screen_h), resample=resample)
@@ -127,14 +490,284 @@ def apply_transform(image: Image.Image, transform: dict, screen_size: tuple[int,
     return image.resize((max(1, new_w), max(1, new_h)), resample=resample)
 
 
+def merge_render(base: dict, override: dict | None) -> dict:
+    """Overlay a playlist item's render sections on the global render state."""
+    merged = {section: dict(values) if isinstance(values, dict) else values for section, values in base.items()}
+    for section, values in (override or {}).items():
+        if isinstance(values, dict):
+            merged[section] = dict(merged.get(section) or {}, **values)
+    return merged
+
+
+def render_frame(image_bytes: bytes, render: dict, screen_size: tuple[int, int], telemetry: "Telemetry | None" = None) -> Image.Image:
+    """Decode, colour-correct and transform one image into a screen-sized frame."""
+    def stage(name):
+        return telemetry.stage(name) if telemetry else _null_stage()
+
+    with stage("decode"):
+        image = ImageOps.exif_transpose(Image.open(io.BytesIO(image_bytes))).convert("RGB")
+    return render_image(image, render, screen_size, telemetry)
+
+
+def render_image(image: Image.Image, render: dict, screen_size: tuple[int, int], telemetry: "Telemetry | None" = None) -> Image.Image:
+    """Colour-correct and transform a decoded RGB image into a screen-sized frame."""
+    def stage(name):
+        return telemetry.stage(name) if telemetry else _null_stage()
+
+    output = render.get("output", {})
+    background = parse_color(output.get("background", "#000000"))
+    with stage("color"):
+        image = apply_color(image, render.get("color", {}))
+    with stage("transform"):
+        return apply_transform(image, render.get("transform", {}), screen_size, output.get("interpolation", "linear"), background)
+
+
+def render_tiled(manifest: dict, tiles: TileCache, image_id: str, render: dict, screen_size: tuple[int, int],
+                 telemetry: "Telemetry | None" = None) -> Image.Image:
+    """Compose a screen-sized frame from the visible tiles of a pyramid.
+
+    Picks the coarsest level that still has at least one source pixel per
+    screen pixel, loads only the tiles under the viewport, and resamples
+    that mosaic once with the same matrix `apply_transform` uses. Memory
+    and time depend on the screen size, not on the source size.
+    """
+    def stage(name):
+        return telemetry.stage(name) if telemetry else _null_stage()
+
+    output = render.get("output", {})
+    background = parse_color(output.get("background", "#000000"))
+    screen_w, screen_h = screen_size
+    compiled = compile_transform(render.get("transform", {}), (manifest["width"], manifest["height"]), screen_size)
+    rect = compiled["rect"]
+    left, top = max(0, int(math.floor(rect[0]))), max(0, int(math.floor(rect[1])))
+    right, bottom = min(screen_w, int(math.ceil(rect[2]))), min(screen_h, int(math.ceil(rect[3])))
+    if right <= left or bottom <= top:
+        return Image.new("RGB", screen_size, background)
+
+    inverse = _mat_inv(compiled["matrix"])
+    corners = [_mat_apply(inverse, x, y) for x, y in ((left, top), (right, top), (left, bottom), (right, bottom))]
+    crop = compiled["box"]
+    x0 = max(crop[0], math.floor(min(c[0] for c in corners)))
+    y0 = max(crop[1], math.floor(min(c[1] for c in corners)))
+    x1 = min(crop[2], math.ceil(max(c[0] for c in corners)))
+    y1 = min(crop[3], math.ceil(max(c[1] for c in corners)))
+    if x1 <= x0 or y1 <= y0:
+        return Image.new("RGB", screen_size, background)
+
+    levels = manifest["levels"]
+    factor = 1.0 / min(compiled["scale"])
+    level = min(len(levels) - 1, int(math.floor(math.log2(factor)))) if factor >= 2 else 0
+    f = 2 ** level
+    size = manifest["tileSize"]
+    lx0, ly0 = x0 // f, y0 // f
+    lx1 = min(levels[level]["width"], -(-x1 // f))
+    ly1 = min(levels[level]["height"], -(-y1 // f))
+    positions = [(col, row) for row in range(ly0 // size, (ly1 - 1) // size + 1)
+                 for col in range(lx0 // size, (lx1 - 1) // size + 1)]
+    with stage("tiles"):
+        found = tiles.tiles(image_id, level, positions)
+        mosaic = Image.new("RGB", (lx1 - lx0, ly1 - ly0), background)
+        for (col, row), tile in found.items():
+            mosaic.paste(tile, (col * size - lx0, row * size - ly0))
+    with stage("color"):
+        mosaic = apply_color(mosaic, render.get("color", {}))
+    # Mosaic pixel (u, v) is full-resolution pixel ((lx0 + u) * f, (ly0 + v) * f).
+    matrix = _mat_mul(compiled["matrix"], (f, 0.0, lx0 * f, 0.0, f, ly0 * f))
+    with stage("transform"):
+        return mosaic.transform(screen_size, Image.AFFINE, data=_mat_inv(matrix),
+                                resample=_resample(output.get("interpolation", "linear")), fillcolor=background)
+
+
+@contextmanager
+def _null_stage():
+    yield
+
+
+def slide_plan(state: dict, screen_size: tuple[int, int]) -> tuple[tuple, tuple | None]:
+    """Return (current, upcoming) slides for a state snapshot.
+
+    A slide is (key, image_id, render, starts_at); the key identifies the
+    rendered frame, so equal keys never render twice. `upcoming` is only set
+    while a playlist is playing and knows when its next slide starts.
+    """
+    base = state.get("render", {})
+    playlist = state.get("playlist") or {}
+    render = merge_render(base, playlist.get("render")) if playlist else base
+    image_id = state.get("activeImageId")
+    current = (_slide_key(image_id, render, screen_size), image_id, render, None)
+    upcoming = None
+    following = playlist.get("next")
+    if playlist.get("status") == "playing" and following and following.get("startsAt"):
+        next_render = merge_render(base, following.get("render"))
+        upcoming = (_slide_key(following["imageId"], next_render, screen_size), following["imageId"], next_render,
+                    float(following["startsAt"]))
+    return current, upcoming
+
+
+# Transition settings change how a frame arrives and "dim" is applied on
+# output, so neither makes it a different frame.
+FRAME_NEUTRAL_KEYS = ("transition", "transitionMs", "dim")
+
+
+def _slide_key(image_id: str | None, render: dict, screen_size: tuple[int, int]) -> tuple:
+    output = {k: v for k, v in (render.get("output") or {}).items() if k not in FRAME_NEUTRAL_KEYS}
+    return image_id, json.dumps(dict(render, output=output), sort_keys=True), tuple(screen_size)
+
+
+def transition_for(render: dict, config: RendererConfig) -> tuple[str, float]:
+    """Transition kind and seconds for a slide; render.output overrides the config."""
+    output = render.get("output") or {}
+    kind = output.get("transition", config.transition)
+    try:
+        seconds = float(output.get("transitionMs", config.transition_ms)) / 1000.0
+    except (TypeError, ValueError):
+        seconds = config.transition_ms / 1000.0
+    if kind not in transitions.KINDS or not transitions.available():
+        kind = "cut"
+    return kind, seconds
+
+
+def play_transition(output, buffers: "transitions.TransitionBuffers", transition: "transitions.Transition",
+                    fps: float, telemetry: Telemetry) -> None:
+    """Show a transition at up to `fps`, dropping frames rather than running long.
+
+    Each step blends into `buffers.output` and hands that buffer straight
+    to the output.
+    """
+    interval = 1.0 / max(1.0, fps)
+    frame = (buffers.size, "RGB", buffers.output)
+    wall = time.time()
+    start = time.perf_counter()
+    while True:
+        step = time.perf_counter()
+        running = transition.frame(step)
+        output.show(frame)
+        telemetry.record("transition_step", time.time(), time.perf_counter() - step)
+        if not running:
+            break
+        time.sleep(max(0.0, interval - (time.perf_counter() - step)))
+    telemetry.record("transition", wall, time.perf_counter() - start)
+
+
+class FramePreparer:
+    """Fetches and renders frames on a single background thread.
+
+    `prepare` starts rendering a slide into a back buffer; `take` returns
+    the finished frame as (size, mode, bytes), waiting for it if needed.
+    Animated images come back as an `AnimationClip` instead. The two most
+    recently requested keys are kept, so a profile's pre-rendered frame
+    survives the playlist preparing its next slide. The single worker also
+    keeps ImageCache access on one thread.
+
+    While the server is still cutting a large image's pyramid, the slide is
+    rendered from its 512 px thumbnail instead of decoding the original;
+    `upgraded(key)` retries such slides and reports when the full frame is
+    ready.
+    """
+
+    KEEP = 2
+    PENDING_RECHECK_S = 2.0
+
+    def __init__(self, cache: ImageCache, server_url: str, telemetry: "Telemetry", animation_budget: int = 0,
+                 tiles: TileCache | None = None):
+        self.cache = cache
+        self.server_url = server_url
+        self.telemetry = telemetry
+        self.animation_budget = animation_budget
+        self.tiles = tiles
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prepare")
+        self._futures: OrderedDict[tuple, object] = OrderedDict()
+        # Keys rendered from a thumbnail: key -> (image_id, render, recheck at).
+        self._provisional: dict[tuple, tuple[str, dict, float]] = {}
+        self._upgrades: dict[tuple, object] = {}
+
+    def prepare(self, key: tuple, image_id: str | None, render: dict, on_done=None) -> None:
+        """Start rendering `key` unless it is already done or under way.
+
+        `on_done(future)` runs on the worker thread once the frame is ready.
+        """
+        future = self._futures.get(key)
+        if future is None:
+            future = self._executor.submit(self._render, key, image_id, render)
+            self._futures[key] = future
+            while len(self._futures) > self.KEEP:
+                dropped_key, dropped = self._futures.popitem(last=False)
+                dropped.cancel()
+                self._provisional.pop(dropped_key, None)
+                self._upgrades.pop(dropped_key, None)
+        else:
+            self._futures.move_to_end(key)
+        if on_done is not None:
+            future.add_done_callback(on_done)
+
+    def take(self, key: tuple, image_id: str | None, render: dict):
+        self.prepare(key, image_id, render)
+        try:
+            return self._futures[key].result()
+        except Exception:
+            return None
+
+    def upgraded(self, key: tuple) -> bool:
+        """True once a slide shown from its thumbnail has its full frame ready to take."""
+        future = self._upgrades.get(key)
+        if future is None:
+            entry = self._provisional.get(key)
+            if entry is not None and time.monotonic() >= entry[2]:
+                self._upgrades[key] = self._executor.submit(self._render, key, entry[0], entry[1])
+            return False
+        if not future.done():
+            return False
+        del self._upgrades[key]
+        if key in self._provisional:
+            # Still being tiled; _render scheduled the next check.
+            return False
+        self._futures[key] = future
+        return True
+
+    def _render(self, key: tuple, image_id: str | None, render: dict):
+        if not image_id:
+            return None
+        screen_size = key[2]
+        manifest = self.tiles.manifest(image_id) if self.tiles else None
+        if manifest:
+            # Tiled images are never downloaded or decoded whole.
+            self._provisional.pop(key, None)
+            frame = render_tiled(manifest, self.tiles, image_id, render, screen_size, self.telemetry)
+            return frame.size, frame.mode, frame.tobytes()
+        if self.tiles and self.tiles.pending(image_id):
+            # Decoding the original is what the pyramid is there to avoid.
+            self._provisional[key] = (image_id, render, time.monotonic() + self.PENDING_RECHECK_S)
+            with self.telemetry.stage("fetch"):
+                thumb = self.cache.get(f"{image_id}-thumb512", f"{self.server_url}/api/images/{image_id}/thumb?size=512")
+            if not thumb:
+                return None
+            frame = render_frame(thumb, render, screen_size, self.telemetry)
+            return frame.size, frame.mode, frame.tobytes()
+        self._provisional.pop(key, None)
+        with self.telemetry.stage("fetch"):
+            image_bytes = self.cache.get(image_id, f"{self.server_url}/api/images/{image_id}/file")
+        if not image_bytes:
+            return None
+        if is_animated(image_bytes):
+            with self.telemetry.stage("animation_load"):
+                return AnimationClip(image_bytes, lambda image: render_image(image, render, screen_size), self.animation_budget)
+        frame = render_frame(image_bytes, render, screen_size, self.telemetry)
+        return frame.size, frame.mode, frame.tobytes()
+
+
 class StateFeed:
     def __init__(self, server_url: str):
         self.server_url = server_url
         self.state = {}
         self.lock = threading.Lock()
+        self.changed = threading.Event()
         self.connected = False
+        self.mode_changed = False
+        self.prepare_request = None
         self.sio = socketio.Client(reconnection=True, reconnection_attempts=0)
         self.sio.on("state.snapshot", self._on_snapshot)
+        self.sio.on("render.prepare", self._on_prepare)
+        self.sio.on("display.hotplug", self._on_hotplug)
         self.sio.on("connect", self._on_connect)
         self.sio.on("disconnect", self._on_disconnect)
 
@@ -152,6 +785,8 @@ class StateFeed:
 
     def _on_connect(self):
         self.connected = True
+        # Lets the server send pre-render requests to renderers only.
+        self.emit("renderer.hello", {"pid": os.getpid()})
 
     def _on_disconnect(self):
         self.connected = False
@@ -159,82 +794,171 @@ class StateFeed:
     def _on_snapshot(self, payload):
         with self.lock:
             self.state = payload.get("state", {})
+        self.changed.set()
+
+    def _on_hotplug(self, payload):
+        # A disconnect leaves nothing to reopen onto; only a connector coming
+        # up can bring a new mode.
+        changes = (payload or {}).get("changes") or []
+        if not any(change.get("connected") for change in changes):
+            return
+        with self.lock:
+            self.mode_changed = True
+        self.changed.set()
+
+    def _on_prepare(self, payload):
+        with self.lock:
+            self.prepare_request = payload
+        self.changed.set()
+
+    def take_prepare(self) -> dict | None:
+        """The latest "render.prepare" request (a profile about to be applied), once."""
+        with self.lock:
+            request, self.prepare_request = self.prepare_request, None
+            return request
+
+    def take_mode_change(self) -> bool:
+        with self.lock:
+            changed, self.mode_changed = self.mode_changed, False
+            return changed
+
+    def wait(self, timeout: float) -> None:
+        """Sleep until a new snapshot arrives or the timeout passes."""
+        if self.changed.wait(timeout):
+            self.changed.clear()
 
     def get_state(self) -> dict:
         with self.lock:
             return dict(self.state)
 
+    def emit(self, event: str, payload: dict) -> None:
+        if not self.connected:
+            return
+        try:
+            self.sio.emit(event, payload)
+        except Exception:
+            pass
+
 
 def render_loop(config: RendererConfig) -> None:
     feed = StateFeed(config.server_url)
     feed.start()
 
-    if pygame is None:
-        print("pygame not installed; running headless renderer")
+    output = open_output(config.output, config.fb_device, config.fb_geometry, config.fb_tty)
+    if output is not None:
+        output = DimmedOutput(output)
+    if output is None:
+        print("no display output available; running headless renderer")
         while True:
             time.sleep(config.poll_interval)
         return
 
-    pygame.init()
-    screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-    pygame.display.set_caption("Screeny Renderer")
-    clock = pygame.time.Clock()
+    image_cache = ImageCache(config.cache_dir, config.memory_cache_items, config.cache_mb * 1024 * 1024)
+    telemetry = Telemetry(config.telemetry_interval)
+    tile_cache = TileCache(config.server_url, config.cache_dir, config.tile_cache_mb * 1024 * 1024, config.tile_workers,
+                           config.tile_disk_mb * 1024 * 1024)
+    preparer = FramePreparer(image_cache, config.server_url, telemetry, config.animation_budget_mb * 1024 * 1024, tile_cache)
+    shown_key = None
+    shown_frame = None
+    clip = None
+    buffers = None
+    awaiting = None
 
-    image_id = None
-    image_url = None
-    image_bytes = None
-    image_cache: dict[str, bytes] = {}
-
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+    try:
+        while True:
+            frame_wall = time.time()
+            frame_start = time.perf_counter()
+            if output.closed():
                 return
 
-        state = feed.get_state()
-        if not state:
-            time.sleep(0.1)
-            continue
-
-        new_image_id = state.get("activeImageId")
-        if new_image_id != image_id:
-            image_id = new_image_id
-            if image_id:
-                image_url = resolve_image_url(config.server_url, image_id)
-                if image_id in image_cache:
-                    image_bytes = image_cache[image_id]
-                else:
-                    image_bytes = fetch_image_bytes(image_url) if image_url else None
-                    if image_bytes:
-                        image_cache[image_id] = image_bytes
-                        if len(image_cache) > 10:
-                            image_cache.clear()
-            else:
-                image_url = None
-                image_bytes = None
-
-        screen.fill((0, 0, 0))
-        if image_bytes:
-            image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-            render = state.get("render", {})
-            transform = render.get("transform", {})
-            color = render.get("color", {})
-            output = render.get("output", {})
-            interpolation = output.get("interpolation", "linear")
-            bg = output.get("background", "#000000")
-            if bg.startswith("#") and len(bg) == 7:
-                screen.fill(tuple(int(bg[i:i+2], 16) for i in (1, 3, 5)))
-            image = apply_color(image, color)
-            image = apply_transform(image, transform, screen.get_size(), interpolation)
-            mode = image.mode
-            data = image.tobytes()
-            surface = pygame.image.frombuffer(data, image.size, mode)
-            x = (screen.get_width() - surface.get_width()) // 2
-            y = (screen.get_height() - surface.get_height()) // 2
-            screen.blit(surface, (x, y))
-
-        pygame.display.flip()
-        clock.tick(30)
-        time.sleep(config.poll_interval)
+            if shown_key is not None and preparer.upgraded(shown_key):
+                # The pyramid is ready: replace the thumbnail stand-in.
+                shown_key = None
+
+            if feed.take_mode_change():
+                # The monitor was replugged or power cycled; its mode may
+                # differ, so reopen the output to pick up the current resolution.
+                output.reopen()
+                shown_key = None
+
+            request = feed.take_prepare()
+            if isinstance(request, dict):
+                # A profile is about to be applied: render its frame now and
+                # tell the server, which commits the state once it is ready.
+                # Scheduled pre-warms send no token and want no answer.
+                token = request.get("token")
+                render = request.get("render") or {}
+                key = _slide_key(request.get("imageId"), render, output.size)
+                on_done = None
+                if token is not None:
+                    on_done = lambda _future, token=token: feed.emit("render.ready", {"token": token})
+                    awaiting = (token, key)
+                preparer.prepare(key, request.get("imageId"), render, on_done=on_done)
+
+            state = feed.get_state()
+            if not state:
+                feed.wait(0.1)
+                continue
+
+            output.configure(state)
+            current, upcoming = slide_plan(state, output.size)
+            # Switch to the next playlist slide on its own schedule rather
+            # than when the server's snapshot for it arrives.
+            due = upcoming if upcoming and upcoming[3] <= time.time() else current
+            if due[0] != shown_key:
+                late = time.time() - due[3] if due[3] else None
+                prepared = preparer.take(*due[:3])
+                if clip is not None:
+                    clip.close()
+                clip = prepared if isinstance(prepared, AnimationClip) else None
+                if clip is not None:
+                    prepared = clip.first
+                kind, seconds = transition_for(due[2], config)
+                if kind != "cut" and prepared and shown_frame and shown_frame[0] == prepared[0] and prepared[1] == "RGB":
+                    if buffers is None or buffers.size != prepared[0]:
+                        buffers = transitions.TransitionBuffers(prepared[0])
+                    transition = transitions.Transition(buffers, kind, shown_frame[2], prepared[2], seconds)
+                    play_transition(output, buffers, transition, config.transition_fps, telemetry)
+                shown_key = due[0]
+                shown_frame = prepared
+                with telemetry.stage("present"):
+                    output.show(prepared)
+                if late is not None:
+                    telemetry.record("slide_late", time.time(), max(0.0, late))
+                telemetry.record("frame", frame_wall, time.perf_counter() - frame_start)
+                telemetry.frame()
+                if clip is not None:
+                    clip.start()
+            elif clip is not None:
+                frame = clip.frame_at(time.perf_counter())
+                if frame is not None:
+                    with telemetry.stage("present"):
+                        output.show(frame)
+                    telemetry.frame()
+            elif output.stale(time.time()):
+                # The dim level moved (a ramp, or a new "dim"): show the same frame again.
+                with telemetry.stage("present"):
+                    output.show(output.last)
+            if awaiting and awaiting[1] == shown_key:
+                feed.emit("render.presented", {"token": awaiting[0]})
+                awaiting = None
+            if upcoming and upcoming[0] != shown_key:
+                # Render the next slide into the back buffer while this one shows.
+                preparer.prepare(*upcoming[:3])
+
+            telemetry.maybe_send(feed, image_cache, tile_cache)
+            timeout = config.poll_interval
+            if upcoming and upcoming[0] != shown_key:
+                timeout = max(0.0, min(timeout, upcoming[3] - time.time()))
+            if clip is not None:
+                remaining = clip.next_change(time.perf_counter())
+                if remaining is not None:
+                    timeout = min(timeout, remaining)
+            if output.ramping(time.time()):
+                timeout = min(timeout, 1.0 / config.transition_fps)
+            feed.wait(timeout)
+    finally:
+        output.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,456 @@
+"""Screen outputs the renderer draws finished frames to.
+
+Frames are (size, mode, data) tuples as `FramePreparer` produces them;
+`data` may be bytes or a NumPy array such as a transition's output buffer.
+Every output offers the same small interface:
+
+    size        current screen size in pixels
+    show(frame) put a frame on screen; None shows black
+    reopen()    pick up a new mode after the monitor was replugged
+    closed()    True once the user asked to quit
+    close()
+
+`PygameOutput` draws through SDL, normally inside an X session.
+`FramebufferOutput` writes straight into a memory-mapped Linux framebuffer
+(/dev/fb0, which the KMS driver also provides), so a kiosk can boot to the
+console and skip X. Pixels are converted into the mapped memory with NumPy
+(or, for 24/32 bpp, Pillow's raw packers without it), and when the
+framebuffer has room for two pages the frame is drawn off screen and
+shown with a pan. `DimmedOutput` wraps either one to apply the software
+dim level that brightness ramps use.
+"""
+import fcntl
+import mmap
+import os
+import stat
+import struct
+import time
+from dataclasses import dataclass
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pygame
+except Exception:
+    pygame = None
+
+from PIL import Image
+
+BACKENDS = ("auto", "pygame", "fbdev", "none")
+
+# linux/fb.h and linux/kd.h
+FBIOGET_VSCREENINFO = 0x4600
+FBIOGET_FSCREENINFO = 0x4602
+FBIOPAN_DISPLAY = 0x4606
+FBIO_WAITFORVSYNC = 0x40044620
+KDSETMODE = 0x4B3A
+KD_TEXT = 0x00
+KD_GRAPHICS = 0x01
+
+# fb_var_screeninfo is 40 u32s; fb_fix_screeninfo starts with id[16] and
+# smem_start (an unsigned long), so native alignment gives the right
+# offsets on both 32- and 64-bit kernels.
+VSCREENINFO = struct.Struct("=40I")
+FSCREENINFO = struct.Struct("@16sLIIIIHHHI")
+YOFFSET = 5
+
+
+@dataclass
+class FramebufferGeometry:
+    width: int
+    height: int
+    bpp: int = 32
+    stride: int = 0
+    pages: int = 1
+    # Bit offset and length of each channel within a pixel.
+    red: tuple[int, int] = (16, 8)
+    green: tuple[int, int] = (8, 8)
+    blue: tuple[int, int] = (0, 8)
+
+    def __post_init__(self):
+        if self.bpp not in (16, 24, 32):
+            raise ValueError(f"unsupported framebuffer depth: {self.bpp} bpp")
+        if self.bpp == 16 and self.red == (16, 8):
+            self.red, self.green, self.blue = (11, 5), (5, 6), (0, 5)
+        if not self.stride:
+            self.stride = self.width * self.bpp // 8
+
+    @property
+    def page_bytes(self) -> int:
+        return self.stride * self.height
+
+
+def parse_geometry(value: str) -> FramebufferGeometry:
+    """Parse WIDTHxHEIGHT[:BPP[:PAGES]], e.g. "1920x1080:32:2"."""
+    parts = value.strip().lower().split(":")
+    try:
+        width, height = (int(n) for n in parts[0].split("x"))
+        bpp = int(parts[1]) if len(parts) > 1 else 32
+        pages = int(parts[2]) if len(parts) > 2 else 1
+    except ValueError:
+        raise ValueError(f"invalid framebuffer geometry: {value!r}") from None
+    if width <= 0 or height <= 0 or pages not in (1, 2):
+        raise ValueError(f"invalid framebuffer geometry: {value!r}")
+    return FramebufferGeometry(width, height, bpp, pages=pages)
+
+
+def query_geometry(fd: int) -> tuple[FramebufferGeometry, bytearray]:
+    """Read the current mode of a framebuffer device.
+
+    Returns the geometry and the raw fb_var_screeninfo, which panning
+    sends back with a new y offset.
+    """
+    var = bytearray(VSCREENINFO.size)
+    fcntl.ioctl(fd, FBIOGET_VSCREENINFO, var, True)
+    fix = bytearray(FSCREENINFO.size)
+    fcntl.ioctl(fd, FBIOGET_FSCREENINFO, fix, True)
+    v = VSCREENINFO.unpack(var)
+    stride = FSCREENINFO.unpack(fix)[-1]
+    width, height, _, virtual_height, _, _, bpp = v[:7]
+    pages = 2 if virtual_height >= 2 * height else 1
+    geometry = FramebufferGeometry(width, height, bpp, stride, pages,
+                                   red=(v[8], v[9]), green=(v[11], v[12]), blue=(v[14], v[15]))
+    return geometry, var
+
+
+class PygameOutput:
+    def __init__(self):
+        pygame.init()
+        self._open()
+
+    def _open(self) -> None:
+        self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        pygame.display.set_caption("Screeny Renderer")
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.screen.get_size()
+
+    def show(self, frame) -> None:
+        if frame is None or frame[0] != self.size:
+            self.screen.fill((0, 0, 0))
+        if frame is not None:
+            self.screen.blit(pygame.image.frombuffer(frame[2], frame[0], frame[1]), (0, 0))
+        pygame.display.flip()
+
+    def reopen(self) -> None:
+        pygame.display.quit()
+        pygame.display.init()
+        self._open()
+
+    def closed(self) -> bool:
+        return any(event.type == pygame.QUIT for event in pygame.event.get())
+
+    def close(self) -> None:
+        pygame.quit()
+
+
+class FramebufferOutput:
+    """Full-screen output through a memory-mapped framebuffer.
+
+    `device` is normally /dev/fb0. Any regular file works as a fake
+    framebuffer when `geometry` is given; it is created or grown to fit and frames
+    can be read back from it, which is what the tests do.
+    """
+
+    def __init__(self, device: str = "/dev/fb0", geometry: FramebufferGeometry | None = None, tty: str | None = None):
+        self.device = device
+        self.fixed_geometry = geometry
+        self.tty = tty
+        self._tty_fd = None
+        self._open()
+        self._set_console_mode(KD_GRAPHICS)
+
+    def _open(self) -> None:
+        flags = os.O_RDWR | (os.O_CREAT if self.fixed_geometry is not None else 0)
+        self._fd = os.open(self.device, flags, 0o644)
+        self.is_device = stat.S_ISCHR(os.fstat(self._fd).st_mode)
+        if self.is_device:
+            self.geometry, self._var = query_geometry(self._fd)
+        elif self.fixed_geometry is not None:
+            self.geometry, self._var = self.fixed_geometry, None
+        else:
+            os.close(self._fd)
+            raise ValueError(f"{self.device} is not a framebuffer device; a geometry is required")
+        if np is None and self.geometry.bpp == 16:
+            os.close(self._fd)
+            raise ValueError("16 bpp framebuffers need NumPy")
+        length = self.geometry.page_bytes * self.geometry.pages
+        if not self.is_device and os.fstat(self._fd).st_size < length:
+            os.ftruncate(self._fd, length)
+        self._map = mmap.mmap(self._fd, length, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        # Start by showing page 0; draw into the other page when there is one.
+        self.front = 0
+        if self.geometry.pages > 1 and not self._pan(0):
+            self.geometry.pages = 1
+        self._pages = [self._page_view(n) for n in range(self.geometry.pages)] if np is not None else None
+        self._scratch = None
+        if np is not None and self.geometry.bpp == 16:
+            self._scratch = np.empty((self.geometry.height, self.geometry.width), np.uint16)
+        if np is not None and self.geometry.bpp == 32:
+            # The padding byte is never written per frame; make it opaque once.
+            for page in self._pages:
+                page[..., self._byte_index(None)] = 255
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.geometry.width, self.geometry.height
+
+    @property
+    def back(self) -> int:
+        return 1 - self.front if self.geometry.pages > 1 else 0
+
+    def show(self, frame) -> None:
+        page = self.back
+        if frame is None:
+            self._clear(page)
+        else:
+            size, mode, data = frame
+            if mode != "RGB":
+                image = Image.frombuffer(mode, size, data, "raw", mode, 0, 1).convert("RGB")
+                size, data = image.size, image.tobytes()
+            if size != self.size:
+                self._clear(page)
+            if np is not None:
+                self._convert(page, size, data)
+            else:
+                self._pack(page, size, data)
+        if self.geometry.pages > 1:
+            self._wait_vsync()
+            if self._pan(page):
+                self.front = page
+
+    def reopen(self) -> None:
+        self._release()
+        self._open()
+
+    def closed(self) -> bool:
+        return False
+
+    def close(self) -> None:
+        self._release()
+        self._set_console_mode(KD_TEXT)
+
+    def _release(self) -> None:
+        self._pages = None
+        self._scratch = None
+        self._map.close()
+        os.close(self._fd)
+
+    def _page_view(self, page: int):
+        # (height, width, bytes per pixel) view of one page, honouring the
+        # stride so row padding is never touched. 16 bpp pages are viewed
+        # as one uint16 per pixel instead.
+        g = self.geometry
+        offset = page * g.page_bytes
+        if g.bpp == 16:
+            return np.ndarray((g.height, g.width), np.uint16, buffer=self._map, offset=offset, strides=(g.stride, 2))
+        depth = g.bpp // 8
+        return np.ndarray((g.height, g.width, depth), np.uint8, buffer=self._map, offset=offset, strides=(g.stride, depth, 1))
+
+    def _byte_index(self, channel: tuple[int, int] | None) -> int:
+        # Byte position of a channel within a little-endian pixel; None
+        # finds the padding byte of a 32 bpp pixel.
+        if channel is not None:
+            return channel[0] // 8
+        used = {c[0] // 8 for c in (self.geometry.red, self.geometry.green, self.geometry.blue)}
+        return ({0, 1, 2, 3} - used).pop()
+
+    def _convert(self, page: int, size: tuple[int, int], data) -> None:
+        g = self.geometry
+        width, height = min(size[0], g.width), min(size[1], g.height)
+        src = np.frombuffer(data, dtype=np.uint8).reshape(size[1], size[0], 3)[:height, :width]
+        dest = self._pages[page][:height, :width]
+        if g.bpp == 16:
+            # Pack each channel's top bits into place: red straight into the
+            # mapped memory, green and blue ORed in through one scratch buffer.
+            scratch = self._scratch[:height, :width]
+            for index, (offset, length) in enumerate((g.red, g.green, g.blue)):
+                np.right_shift(src[..., index], 8 - length, out=scratch, casting="unsafe")
+                if index == 0:
+                    np.left_shift(scratch, offset, out=dest)
+                else:
+                    np.left_shift(scratch, offset, out=scratch)
+                    np.bitwise_or(dest, scratch, out=dest)
+            return
+        for index, channel in enumerate((g.red, g.green, g.blue)):
+            dest[..., self._byte_index(channel)] = src[..., index]
+
+    def _pack(self, page: int, size: tuple[int, int], data) -> None:
+        # Without NumPy: let Pillow pack the pixels, then copy row by row.
+        g = self.geometry
+        width, height = min(size[0], g.width), min(size[1], g.height)
+        image = Image.frombuffer("RGB", size, bytes(data), "raw", "RGB", 0, 1)
+        if (width, height) != size:
+            image = image.crop((0, 0, width, height))
+        packed = image.tobytes("raw", self._raw_mode())
+        row = width * g.bpp // 8
+        offset = page * g.page_bytes
+        if row == g.stride:
+            self._map[offset:offset + len(packed)] = packed
+            return
+        for y in range(height):
+            start = offset + y * g.stride
+            self._map[start:start + row] = packed[y * row:(y + 1) * row]
+
+    def _raw_mode(self) -> str:
+        g = self.geometry
+        order = "BGR" if g.red[0] > g.blue[0] else "RGB"
+        return order + "X" if g.bpp == 32 else order
+
+    def _clear(self, page: int) -> None:
+        offset = page * self.geometry.page_bytes
+        self._map[offset:offset + self.geometry.page_bytes] = bytes(self.geometry.page_bytes)
+        if self._pages is not None and self.geometry.bpp == 32:
+            self._pages[page][..., self._byte_index(None)] = 255
+
+    def _pan(self, page: int) -> bool:
+        if not self.is_device:
+            # A fake framebuffer "shows" whichever page was drawn last.
+            return True
+        var = bytearray(self._var)
+        struct.pack_into("=I", var, YOFFSET * 4, page * self.geometry.height)
+        try:
+            fcntl.ioctl(self._fd, FBIOPAN_DISPLAY, var)
+        except OSError:
+            return False
+        return True
+
+    def _wait_vsync(self) -> None:
+        if not self.is_device:
+            return
+        try:
+            fcntl.ioctl(self._fd, FBIO_WAITFORVSYNC, struct.pack("=I", 0))
+        except OSError:
+            # Not every driver supports it; the pan still avoids tearing
+            # within a frame.
+            pass
+
+    def _set_console_mode(self, mode: int) -> None:
+        # Stop the text console (cursor, kernel messages) drawing over the
+        # framebuffer. Needs access to the tty; without it the console
+        # stays in text mode and the renderer still works.
+        if not self.tty or not self.is_device:
+            return
+        try:
+            if self._tty_fd is None:
+                self._tty_fd = os.open(self.tty, os.O_RDWR)
+            fcntl.ioctl(self._tty_fd, KDSETMODE, mode)
+        except OSError:
+            return
+        if mode == KD_TEXT:
+            os.close(self._tty_fd)
+            self._tty_fd = None
+
+
+def open_output(backend: str, fb_device: str, fb_geometry: str = "", fb_tty: str | None = None):
+    """Open the configured output, or None to run headless.
+
+    "auto" uses pygame inside a desktop session (DISPLAY or
+    WAYLAND_DISPLAY set), the framebuffer when there is one, and pygame
+    (SDL picks its own video driver) otherwise.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown output backend: {backend}")
+    if backend == "none":
+        return None
+    geometry = parse_geometry(fb_geometry) if fb_geometry else None
+    if backend == "fbdev":
+        return FramebufferOutput(fb_device, geometry, fb_tty)
+    if backend == "pygame":
+        return PygameOutput() if pygame is not None else None
+    desktop = os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")
+    if pygame is not None and desktop:
+        return PygameOutput()
+    if os.path.exists(fb_device):
+        return FramebufferOutput(fb_device, geometry, fb_tty)
+    return PygameOutput() if pygame is not None else None
+
+
+def software_level(points: list, elapsed_ms: float) -> float:
+    # Same interpolation as hdmi_control.ddc.ramp.software_level.
+    if elapsed_ms <= points[0][0]:
+        return points[0][1]
+    for (t0, v0), (t1, v1) in zip(points, points[1:]):
+        if elapsed_ms <= t1:
+            return v0 + (v1 - v0) * (elapsed_ms - t0) / ((t1 - t0) or 1.0)
+    return points[-1][1]
+
+
+class DimmedOutput:
+    """Wraps an output and scales every frame by the software dim level.
+
+    The level is `render.output.dim` from the last snapshot, or, while a
+    DDC ramp with a software part runs, the snapshot's `softwareRamp`
+    keyframes at the current time, so the picture fades together with the
+    monitor's backlight. Dimming needs NumPy; without it frames pass
+    through unchanged.
+    """
+
+    # Smaller level changes than this are not visible in 8-bit output.
+    STEP = 1.0 / 256
+
+    def __init__(self, output):
+        self.output = output
+        self.base = 1.0
+        self.ramp = None
+        self.last = None
+        self.shown_level = 1.0
+        self._wide = None
+        self._out = None
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.output.size
+
+    def configure(self, state: dict) -> None:
+        output = (state.get("render") or {}).get("output") or {}
+        try:
+            self.base = min(1.0, max(0.0, float(output.get("dim", 1.0))))
+        except (TypeError, ValueError):
+            self.base = 1.0
+        self.ramp = state.get("softwareRamp")
+
+    def level(self, now: float) -> float:
+        if self.ramp and self.ramp.get("points"):
+            return min(1.0, max(0.0, software_level(self.ramp["points"], (now - self.ramp["startAt"]) * 1000.0)))
+        return self.base
+
+    def ramping(self, now: float) -> bool:
+        return bool(self.ramp) and now < self.ramp["startAt"] + self.ramp["durationMs"] / 1000.0
+
+    def stale(self, now: float) -> bool:
+        """True when the level moved since the last frame went out."""
+        return abs(self.level(now) - self.shown_level) >= self.STEP
+
+    def show(self, frame) -> None:
+        self.last = frame
+        self.shown_level = level = self.level(time.time())
+        if frame is None or level >= 1.0 - self.STEP or np is None or frame[1] != "RGB":
+            self.output.show(frame)
+            return
+        self.output.show((frame[0], "RGB", self._dim(frame, level)))
+
+    def _dim(self, frame, level: float):
+        width, height = frame[0]
+        if self._out is None or self._out.shape[:2] != (height, width):
+            self._wide = np.empty((height, width, 3), dtype=np.uint16)
+            self._out = np.empty((height, width, 3), dtype=np.uint8)
+        source = np.frombuffer(frame[2], dtype=np.uint8).reshape(height, width, 3)
+        # Fixed point: multiply by level * 256 and shift, in reused buffers.
+        np.multiply(source, int(level * 256), out=self._wide, dtype=np.uint16)
+        np.right_shift(self._wide, 8, out=self._wide)
+        np.copyto(self._out, self._wide, casting="unsafe")
+        return self._out
+
+    def reopen(self) -> None:
+        self.output.reopen()
+
+    def closed(self) -> bool:
+        return self.output.closed()
+
+    def close(self) -> None:
+        self.output.close()
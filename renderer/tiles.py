@@ -0,0 +1,138 @@
+"""Tile source for images the server has cut into a zoom pyramid.
+
+Decoded tiles are kept in an LRU bounded by bytes and backed by a disk
+cache with its own size bound. A tile's content never changes for a given
+image id, so disk hits are used without revalidating. Missing tiles are
+fetched in parallel.
+"""
+import io
+import json
+import os
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from renderer.diskcache import DiskBudget, touch
+
+
+class TileCache:
+    def __init__(self, server_url: str, cache_dir: str, max_bytes: int, workers: int = 4,
+                 disk_bytes: int = 512 * 1024 * 1024):
+        self.server_url = server_url
+        self.cache_dir = os.path.join(cache_dir, "tiles")
+        self.max_bytes = max_bytes
+        self.disk = DiskBudget(self.cache_dir, disk_bytes)
+        self._tiles: OrderedDict[tuple, Image.Image] = OrderedDict()
+        self._bytes = 0
+        self._manifests: dict[str, dict | None] = {}
+        self._pending: set[str] = set()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="tiles")
+        self.counts: dict[str, int] = {}
+
+    def manifest(self, image_id: str) -> dict | None:
+        """The image's pyramid manifest, or None if it is not tiled."""
+        if image_id in self._manifests:
+            return self._manifests[image_id]
+        try:
+            with urllib.request.urlopen(f"{self.server_url}/api/images/{image_id}/tiles", timeout=2) as resp:
+                manifest = json.loads(resp.read().decode("utf-8"))
+        except urllib.error.HTTPError as exc:
+            if exc.code != 404:
+                return None
+            try:
+                pending = json.loads(exc.read().decode("utf-8")).get("pending")
+            except Exception:
+                pending = False
+            if pending:
+                self._pending.add(image_id)
+                return None
+            manifest = None
+        except Exception:
+            # Server unreachable: do not remember the answer.
+            return None
+        self._manifests[image_id] = manifest
+        self._pending.discard(image_id)
+        return manifest
+
+    def pending(self, image_id: str) -> bool:
+        """Whether the server was still cutting the image's pyramid when last asked."""
+        return image_id in self._pending
+
+    def forget(self, image_id: str) -> None:
+        self._manifests.pop(image_id, None)
+        self._pending.discard(image_id)
+
+    def tiles(self, image_id: str, level: int, positions: list[tuple[int, int]]) -> dict[tuple[int, int], Image.Image]:
+        found = {}
+        missing = []
+        for col, row in positions:
+            key = (image_id, level, col, row)
+            tile = self._tiles.get(key)
+            if tile is not None:
+                self._tiles.move_to_end(key)
+                found[(col, row)] = tile
+                self._count("tile_memory")
+            else:
+                missing.append((col, row))
+        downloaded = 0
+        for (col, row), (tile, source, nbytes) in zip(missing, self._executor.map(lambda pos: self._load(image_id, level, *pos), missing)):
+            downloaded += nbytes
+            if tile is None:
+                continue
+            self._count(source)
+            found[(col, row)] = tile
+            self._tiles[(image_id, level, col, row)] = tile
+            self._bytes += _tile_bytes(tile)
+        # Evict least recently used tiles, but never the ones just requested.
+        while self._bytes > self.max_bytes and len(self._tiles) > len(found):
+            _, tile = self._tiles.popitem(last=False)
+            self._bytes -= _tile_bytes(tile)
+        if downloaded:
+            self.disk.added(downloaded, keep=[self._path(image_id, level, col, row) for col, row in positions])
+        return found
+
+    def take_counts(self) -> dict[str, int]:
+        counts, self.counts = self.counts, {}
+        return counts
+
+    def _count(self, result: str) -> None:
+        self.counts[result] = self.counts.get(result, 0) + 1
+
+    def _path(self, image_id: str, level: int, col: int, row: int) -> str:
+        safe_id = "".join(c for c in image_id if c.isalnum() or c in "-_")
+        return os.path.join(self.cache_dir, safe_id, str(level), f"{col}_{row}.jpg")
+
+    def _load(self, image_id: str, level: int, col: int, row: int) -> tuple[Image.Image | None, str, int]:
+        # Runs on the fetch pool; returns where the tile came from for
+        # counting and how many bytes were written to disk.
+        path = self._path(image_id, level, col, row)
+        written = 0
+        if os.path.exists(path):
+            source = "tile_disk"
+            with open(path, "rb") as f:
+                data = f.read()
+            touch(path)
+        else:
+            source = "tile_miss"
+            url = f"{self.server_url}/api/images/{image_id}/tiles/{level}/{col}_{row}.jpg"
+            try:
+                with urllib.request.urlopen(url, timeout=10) as resp:
+                    data = resp.read()
+            except Exception:
+                return None, source, 0
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".part"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            written = len(data)
+        tile = Image.open(io.BytesIO(data))
+        tile.load()
+        return (tile.convert("RGB") if tile.mode != "RGB" else tile), source, written
+
+
+def _tile_bytes(tile: Image.Image) -> int:
+    return tile.width * tile.height * 3
@@ -0,0 +1,93 @@
+"""Transitions between two pre-rendered, screen-sized RGB frames.
+
+Frames are raw RGB bytes (as produced by `FramePreparer`). With NumPy
+installed, each transition step blends into one preallocated output buffer
+using integer arithmetic and two preallocated uint16 scratch buffers, so a
+step allocates nothing. Without NumPy every transition is a cut.
+
+Progress is taken from the clock, not from a frame counter: a device that
+cannot keep up shows fewer intermediate frames, but the transition still
+ends on time.
+"""
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+KINDS = ("cut", "crossfade", "slide", "wipe")
+
+
+def available() -> bool:
+    return np is not None
+
+
+class TransitionBuffers:
+    """Output and scratch buffers for one screen size, reused across transitions."""
+
+    def __init__(self, size: tuple[int, int]):
+        width, height = size
+        self.size = size
+        self.output = np.zeros((height, width, 3), dtype=np.uint8)
+        self._a = np.empty((height, width, 3), dtype=np.uint16)
+        self._b = np.empty((height, width, 3), dtype=np.uint16)
+
+    def crossfade(self, before, after, alpha: int) -> None:
+        # out = (before * (256 - alpha) + after * alpha) >> 8; the largest
+        # intermediate is 255 * 256, which fits in uint16.
+        np.copyto(self._a, before)
+        np.copyto(self._b, after)
+        np.multiply(self._a, np.uint16(256 - alpha), out=self._a)
+        np.multiply(self._b, np.uint16(alpha), out=self._b)
+        np.add(self._a, self._b, out=self._a)
+        np.right_shift(self._a, 8, out=self._a)
+        np.copyto(self.output, self._a, casting="unsafe")
+
+    def slide(self, before, after, offset: int) -> None:
+        # The new frame pushes the old one out to the left.
+        width = self.size[0]
+        self.output[:, :width - offset] = before[:, offset:]
+        self.output[:, width - offset:] = after[:, :offset]
+
+    def wipe(self, before, after, offset: int) -> None:
+        self.output[:, :offset] = after[:, :offset]
+        self.output[:, offset:] = before[:, offset:]
+
+
+class Transition:
+    """One running transition from `before` to `after`.
+
+    `frame(now)` updates `buffers.output` for the given time and returns
+    False once the transition is over (the output then holds `after`).
+    """
+
+    def __init__(self, buffers: TransitionBuffers, kind: str, before: bytes, after: bytes,
+                 duration: float, started: float | None = None):
+        width, height = buffers.size
+        self.buffers = buffers
+        self.kind = kind if kind in KINDS else "cut"
+        self.before = np.frombuffer(before, dtype=np.uint8).reshape(height, width, 3)
+        self.after = np.frombuffer(after, dtype=np.uint8).reshape(height, width, 3)
+        self.duration = max(0.0, duration)
+        self.started = time.perf_counter() if started is None else started
+        self.frames = 0
+
+    def progress(self, now: float) -> float:
+        if self.duration <= 0 or self.kind == "cut":
+            return 1.0
+        return min(1.0, max(0.0, (now - self.started) / self.duration))
+
+    def frame(self, now: float) -> bool:
+        t = self.progress(now)
+        if t >= 1.0:
+            np.copyto(self.buffers.output, self.after)
+            return False
+        self.frames += 1
+        if self.kind == "crossfade":
+            self.buffers.crossfade(self.before, self.after, int(t * 256))
+        elif self.kind == "slide":
+            self.buffers.slide(self.before, self.after, int(t * self.buffers.size[0]))
+        else:
+            self.buffers.wipe(self.before, self.after, int(t * self.buffers.size[0]))
+        return True
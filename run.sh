@@ -14,7 +14,7 @@ fi
 
 info "Installing system packages"
 sudo apt update
-sudo apt install -y libmagic1 python3-pygame ddcutil i2c-tools
+sudo apt install -y libmagic1 python3-pygame python3-numpy ddcutil i2c-tools
 
 info "Ensuring i2c-dev is loaded"
 sudo modprobe i2c-dev || true
@@ -35,7 +35,32 @@ function debounce(fn, wait) {
   };
 }
 
+function throttle(fn, wait) {
+  let last = 0;
+  let t = null;
+  let pending = null;
+  return (...args) => {
+    pending = args;
+    const remaining = wait - (Date.now() - last);
+    if (remaining <= 0) {
+      clearTimeout(t);
+      t = null;
+      last = Date.now();
+      fn(...pending);
+      pending = null;
+    } else if (!t) {
+      t = setTimeout(() => {
+        t = null;
+        last = Date.now();
+        fn(...pending);
+        pending = null;
+      }, remaining);
+    }
+  };
+}
+
 const sendDdc = debounce((payload) => socket.emit("ddc.set", payload), 50);
+const sendRenderPatch = throttle((payload) => socket.emit("render.patch", payload), 33);
 
 tabButtons.forEach((btn) => {
   btn.addEventListener("click", () => {
@@ -68,7 +93,7 @@ mode.addEventListener("change", () => {
 
 scale.addEventListener("input", (e) => {
   scaleVal.textContent = Number(e.target.value).toFixed(1);
-  socket.emit("render.patch", { transform: { ...state.render.transform, scale: Number(e.target.value) } });
+  sendRenderPatch({ transform: { ...state.render.transform, scale: Number(e.target.value) } });
 });
 
 upload.addEventListener("change", async (e) => {
@@ -76,7 +101,12 @@ upload.addEventListener("change", async (e) => {
   if (!file) return;
   const form = new FormData();
   form.append("file", file);
-  await fetch("/api/images", { method: "POST", body: form });
+  const res = await fetch("/api/images", { method: "POST", body: form });
+  if (!res.ok) {
+    const err = await res.json().catch(() => ({}));
+    alert(`Upload failed: ${err.error || res.status}`);
+    return;
+  }
   await refreshImages();
 });
 
@@ -110,19 +140,74 @@ if (debugCopy) {
   });
 }
 
+const IMAGE_PAGE_SIZE = 40;
+let imageCursor = null;
+let imagesExhausted = false;
+let imagesLoading = false;
+let imageGeneration = 0;
+let imageFetch = null;
+
+const imageSentinel = document.createElement("div");
+imageSentinel.className = "image-sentinel";
+imageList.after(imageSentinel);
+
+async function loadImagePage() {
+  if (imagesLoading || imagesExhausted) return;
+  imagesLoading = true;
+  const generation = imageGeneration;
+  const controller = new AbortController();
+  imageFetch = controller;
+  try {
+    const params = new URLSearchParams({ limit: IMAGE_PAGE_SIZE });
+    if (imageCursor) params.set("after", imageCursor);
+    const res = await fetch(`/api/images?${params}`, { signal: controller.signal });
+    const images = await res.json();
+    if (generation !== imageGeneration) return;
+    imageCursor = res.headers.get("X-Next-Cursor");
+    imagesExhausted = !imageCursor;
+    images.forEach((img) => {
+      const div = document.createElement("div");
+      div.className = "image-item";
+      div.dataset.id = img.id;
+      if (img.status === "processing") div.classList.add("processing");
+      if (img.status === "failed") div.classList.add("failed");
+      div.innerHTML = `<img loading="lazy" src="/api/images/${img.id}/thumb?size=256" srcset="/api/images/${img.id}/thumb?size=256 1x, /api/images/${img.id}/thumb?size=512 2x" /><div>${img.original_name}</div>`;
+      div.addEventListener("click", () => {
+        socket.emit("image.select", { imageId: img.id });
+      });
+      imageList.appendChild(div);
+    });
+  } catch (err) {
+    if (err.name !== "AbortError") throw err;
+  } finally {
+    // A refresh has already handed the flag to the newer page.
+    if (generation === imageGeneration) {
+      imagesLoading = false;
+      imageFetch = null;
+    }
+  }
+  // The observer only fires on changes, so keep filling while the
+  // sentinel is still on screen.
+  if (!imagesExhausted && generation === imageGeneration
+      && imageSentinel.getBoundingClientRect().top < window.innerHeight + 400) {
+    loadImagePage();
+  }
+}
+
 async function refreshImages() {
-  const res = await fetch("/api/images");
-  const images = await res.json();
+  imageGeneration += 1;
+  if (imageFetch) imageFetch.abort();
   imageList.innerHTML = "";
-  images.forEach((img) => {
-    const div = document.createElement("div");
-    div.className = "image-item";
-    div.innerHTML = `<img src="/api/images/${img.id}/thumb" /><div>${img.original_name}</div>`;
-    div.addEventListener("click", () => {
-      socket.emit("image.select", { imageId: img.id });
-    });
-    imageList.appendChild(div);
-  });
+  imageCursor = null;
+  imagesExhausted = false;
+  imagesLoading = false;
+  await loadImagePage();
+}
+
+if ("IntersectionObserver" in window) {
+  new IntersectionObserver((entries) => {
+    if (entries.some((entry) => entry.isIntersecting)) loadImagePage();
+  }, { rootMargin: "400px" }).observe(imageSentinel);
 }
 
 async function refreshOutputs() {
@@ -135,10 +220,14 @@ async function refreshOutputs() {
   auto.textContent = "Auto (first detected)";
   outputSelect.appendChild(auto);
   const connectors = data.connectors || [];
+  const models = {};
+  (data.displays || []).forEach((display) => {
+    if (display.model) models[display.connector] = display.model;
+  });
   connectors.forEach((conn) => {
     const opt = document.createElement("option");
     opt.value = conn.name;
-    opt.textContent = `${conn.name} (${conn.status})`;
+    opt.textContent = models[conn.name] ? `${conn.name} – ${models[conn.name]} (${conn.status})` : `${conn.name} (${conn.status})`;
     outputSelect.appendChild(opt);
   });
   const pref = data.preference || {};
@@ -184,6 +273,13 @@ socket.on("connect", () => {
   refreshOutputs();
 });
 
+socket.on("image.processing", (payload) => {
+  const item = imageList.querySelector(`.image-item[data-id="${payload.imageId}"]`);
+  if (!item) return;
+  item.classList.toggle("processing", payload.status === "processing");
+  item.classList.toggle("failed", payload.status === "failed");
+});
+
 socket.on("ddc.updated", (payload) => {
   const values = payload.values;
   if (values?.brightness?.cur !== undefined) brightness.value = values.brightness.cur;
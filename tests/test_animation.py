@@ -0,0 +1,84 @@
+import io
+import time
+import unittest
+from PIL import Image
+from renderer.animation import AnimationClip, is_animated
+
+
+def make_gif(count=6, duration=50, size=(16, 8)):
+    frames = [Image.new("RGB", size, (n * 40, 0, 0)) for n in range(count)]
+    buf = io.BytesIO()
+    frames[0].save(buf, format="GIF", save_all=True, append_images=frames[1:], duration=duration, loop=0)
+    return buf.getvalue()
+
+
+def identity(image):
+    return image
+
+
+class TestAnimationClip(unittest.TestCase):
+    def test_detects_animation(self):
+        self.assertTrue(is_animated(make_gif()))
+        buf = io.BytesIO()
+        Image.new("RGB", (4, 4)).save(buf, format="PNG")
+        self.assertFalse(is_animated(buf.getvalue()))
+
+    def test_resident_clock_and_skips(self):
+        clip = AnimationClip(make_gif(), identity, budget_bytes=10 ** 6)
+        self.assertFalse(clip.streaming)
+        self.assertEqual(clip.frame_count, 6)
+        self.assertAlmostEqual(clip.total, 0.3)
+        clip.start(now=0.0)
+        self.assertEqual(clip.frame_at(0.0)[2][0], 0)
+        self.assertIsNone(clip.frame_at(0.01))
+        self.assertAlmostEqual(clip.next_change(0.01), 0.04)
+        # Jump ahead to frame 4: frames 1-3 are skipped, not shown late.
+        self.assertEqual(clip.frame_at(0.21)[2][0], 160)
+        self.assertEqual(clip.skipped, 3)
+        # Loops back to the first frame.
+        self.assertEqual(clip.frame_at(0.31)[2][0], 0)
+
+    def test_streams_when_over_budget(self):
+        frame_bytes = 16 * 8 * 3
+        clip = AnimationClip(make_gif(), identity, budget_bytes=frame_bytes * 2)
+        self.assertTrue(clip.streaming)
+        self.assertEqual(clip.capacity, 2)
+        start = time.perf_counter()
+        clip.start(now=start)
+        seen = []
+        try:
+            deadline = start + 1.0
+            while time.perf_counter() < deadline:
+                frame = clip.frame_at(time.perf_counter())
+                if frame is not None:
+                    seen.append(frame[2][0])
+                time.sleep(0.005)
+        finally:
+            clip.close()
+        # Frames arrive in order across loops (later loops decode again).
+        self.assertGreater(len(seen), 6)
+        self.assertIn(200, seen)
+        self.assertEqual(seen[:3], [0, 40, 80])
+
+    def test_streaming_clip_shown_twice(self):
+        # The renderer closes and restarts a cached clip after a replug or
+        # when a two-slide playlist comes back to it.
+        clip = AnimationClip(make_gif(), identity, budget_bytes=16 * 8 * 3 * 2)
+        self.assertTrue(clip.streaming)
+        for _ in range(2):
+            start = time.perf_counter()
+            clip.start(now=start)
+            seen = []
+            try:
+                while time.perf_counter() < start + 0.2:
+                    frame = clip.frame_at(time.perf_counter())
+                    if frame is not None:
+                        seen.append(frame[2][0])
+                    time.sleep(0.005)
+            finally:
+                clip.close()
+            self.assertEqual(seen[:2], [0, 40])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+import threading
+import time
+import unittest
+from hdmi_control.broadcast import BroadcastScheduler
+
+
+class TestBroadcastScheduler(unittest.TestCase):
+    def setUp(self):
+        self.sent = []
+        self.lock = threading.Lock()
+        self.slow = set()
+
+        def emit(event, payload, sid):
+            with self.lock:
+                self.sent.append((sid, event, payload))
+
+        self.scheduler = BroadcastScheduler(emit, max_hz=20, backlog=lambda sid: 1 if sid in self.slow else 0)
+        self.scheduler.start()
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def _received(self, sid):
+        with self.lock:
+            return [payload for s, _, payload in self.sent if s == sid]
+
+    def test_second_start_is_ignored(self):
+        # A second create_app() in the same process starts it again.
+        self.scheduler.start()
+        self.scheduler.add_client("a")
+        self.scheduler.publish("state.snapshot", lambda: 1)
+        time.sleep(0.2)
+        self.assertEqual(self._received("a"), [1])
+
+    def test_coalesces_to_latest(self):
+        self.scheduler.add_client("a")
+        for i in range(200):
+            self.scheduler.publish("state.snapshot", lambda i=i: i)
+        time.sleep(0.3)
+        received = self._received("a")
+        self.assertLess(len(received), 10)
+        self.assertEqual(received[-1], 199)
+
+    def test_slow_client_does_not_block_others(self):
+        self.scheduler.add_client("fast")
+        self.scheduler.add_client("slow")
+        self.slow.add("slow")
+        for i in range(5):
+            self.scheduler.publish("state.snapshot", lambda i=i: i)
+            time.sleep(0.06)
+        self.assertEqual(self._received("fast")[-1], 4)
+        self.assertEqual(self._received("slow"), [])
+        self.slow.clear()
+        time.sleep(0.2)
+        self.assertEqual(self._received("slow"), [4])
+
+
+if __name__ == "__main__":
+    unittest.main()
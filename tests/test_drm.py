@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+from hdmi_control.ddc.controller import DdcController
+from hdmi_control.ddc.parser import VcpValue
+from hdmi_control.drm import connector_bus, list_displays, parse_edid
+from hdmi_control.state import DdcState
+
+
+def make_edid(manufacturer="DEL", product=0x4321, serial=12345, name="U2720Q"):
+    data = bytearray(128)
+    data[0:8] = b"\x00\xff\xff\xff\xff\xff\xff\x00"
+    vendor = 0
+    for letter in manufacturer:
+        vendor = (vendor << 5) | (ord(letter) - 64)
+    data[8:10] = vendor.to_bytes(2, "big")
+    data[10:12] = product.to_bytes(2, "little")
+    data[12:16] = serial.to_bytes(4, "little")
+    data[17] = 30
+    # 3840x2160@60: 533.25 MHz, 160 h blank, 62 v blank.
+    timing = bytearray(18)
+    timing[0:2] = (53325).to_bytes(2, "little")
+    timing[2] = 3840 & 0xFF
+    timing[3] = 160 & 0xFF
+    timing[4] = ((3840 >> 8) << 4) | (160 >> 8)
+    timing[5] = 2160 & 0xFF
+    timing[6] = 62
+    timing[7] = (2160 >> 8) << 4
+    data[54:72] = timing
+    name_block = bytearray(18)
+    name_block[3] = 0xFC
+    name_block[5:18] = (name.encode() + b"\n").ljust(13, b" ")
+    data[72:90] = name_block
+    data[127] = (256 - sum(data[:127]) % 256) % 256
+    return bytes(data)
+
+
+class FakeDdcUtil:
+    def detect(self):
+        raise AssertionError("detect should not run when sysfs has a bus")
+
+    def get_vcp(self, code, target_args):
+        return VcpValue(code=code, cur=50, max=100), 1
+
+
+class TestEdid(unittest.TestCase):
+    def test_parse_edid(self):
+        info = parse_edid(make_edid())
+        self.assertEqual(info["manufacturer"], "DEL")
+        self.assertEqual(info["product"], 0x4321)
+        self.assertEqual(info["serial"], 12345)
+        self.assertEqual(info["year"], 2020)
+        self.assertEqual(info["name"], "U2720Q")
+        self.assertTrue(info["checksum_ok"])
+        mode = info["preferred_mode"]
+        self.assertEqual((mode["width"], mode["height"]), (3840, 2160))
+        self.assertAlmostEqual(mode["refresh"], 60.0, places=0)
+
+    def test_rejects_empty_and_garbage(self):
+        self.assertIsNone(parse_edid(b""))
+        self.assertIsNone(parse_edid(b"\x01" * 128))
+
+
+class TestSysfsInventory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.root = os.path.join(self.tmp.name, "drm")
+        os.makedirs(os.path.join(self.tmp.name, "i2c", "i2c-5"))
+        for name, status, edid in (("card0-HDMI-A-1", "connected", make_edid()), ("card0-HDMI-A-2", "disconnected", b"")):
+            os.makedirs(os.path.join(root, name))
+            with open(os.path.join(root, name, "status"), "w") as f:
+                f.write(status + "\n")
+            with open(os.path.join(root, name, "edid"), "wb") as f:
+                f.write(edid)
+        os.symlink(os.path.join(self.tmp.name, "i2c", "i2c-5"), os.path.join(root, "card0-HDMI-A-1", "ddc"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_list_displays_maps_bus(self):
+        self.assertEqual(connector_bus("card0-HDMI-A-1", self.root), "5")
+        self.assertIsNone(connector_bus("card0-HDMI-A-2", self.root))
+        displays = list_displays(self.root)
+        self.assertEqual(len(displays), 1)
+        self.assertEqual(displays[0]["connector"], "card0-HDMI-A-1")
+        self.assertEqual(displays[0]["bus"], "5")
+        self.assertEqual(displays[0]["model"], "U2720Q")
+        self.assertEqual(displays[0]["serial"], "12345")
+
+    def test_rescan_without_detect(self):
+        state = DdcState()
+        controller = DdcController(state, lambda: None)
+        controller.ddcutil = FakeDdcUtil()
+        controller.drm_path = self.root
+        controller.set_preference("card0-HDMI-A-1", None, None)
+        self.assertTrue(controller.rescan())
+        self.assertEqual(state.display["bus"], "5")
+        self.assertEqual(controller.get_target_args(), ["--bus", "5"])
+        self.assertEqual(state.status, "ok")
+        controller.drm_path = os.path.join(self.tmp.name, "missing")
+        controller.ddcutil.detect = lambda: ([], 1)
+        self.assertFalse(controller.rescan())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from hdmi_control.ddc.controller import DdcController
+from hdmi_control.hotplug import ConnectorWatcher
+from hdmi_control.state import DdcState
+
+
+def write_status(root, name, status):
+    os.makedirs(os.path.join(root, name), exist_ok=True)
+    with open(os.path.join(root, name, "status"), "w", encoding="utf-8") as f:
+        f.write(status + "\n")
+
+
+class FakeDdcUtil:
+    def __init__(self):
+        self.writes = []
+
+    def set_vcp(self, code, value, target_args):
+        self.writes.append((code, value))
+        return 1
+
+
+class TestConnectorWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        write_status(self.root, "card0-HDMI-A-1", "connected")
+        write_status(self.root, "card0-HDMI-A-2", "disconnected")
+        os.makedirs(os.path.join(self.root, "card0"))
+        self.events = []
+        self.changed = threading.Event()
+
+        def on_change(changes):
+            self.events.append(changes)
+            self.changed.set()
+
+        self.watcher = ConnectorWatcher(on_change, path=self.root, poll_ms=20, use_udev=False)
+
+    def tearDown(self):
+        self.watcher.stop()
+        self.tmp.cleanup()
+
+    def test_reports_disconnect_and_reconnect(self):
+        self.watcher.start()
+        write_status(self.root, "card0-HDMI-A-1", "disconnected")
+        self.assertTrue(self.changed.wait(2))
+        self.assertEqual(self.events[0], [{
+            "name": "card0-HDMI-A-1", "status": "disconnected", "connected": False, "previous": "connected",
+        }])
+        self.changed.clear()
+        write_status(self.root, "card0-HDMI-A-1", "connected")
+        self.assertTrue(self.changed.wait(2))
+        self.assertTrue(self.events[1][0]["connected"])
+
+    def test_no_event_without_change(self):
+        self.watcher.start()
+        self.watcher.start()
+        time.sleep(0.1)
+        self.assertEqual(self.events, [])
+        self.assertEqual(self.watcher.check_now(), [])
+
+
+class TestDdcSuspend(unittest.TestCase):
+    def test_writes_held_while_suspended(self):
+        state = DdcState()
+        state.supported["brightness"] = True
+        state.values["brightness"] = {"cur": 10, "max": 100}
+        controller = DdcController(state, lambda: None)
+        controller.ddcutil = FakeDdcUtil()
+        controller.start()
+        try:
+            controller.suspend("Display disconnected")
+            self.assertEqual(state.status, "unavailable")
+            for value in (20, 30, 40):
+                controller.set_brightness(value)
+            time.sleep(0.3)
+            self.assertEqual(controller.ddcutil.writes, [])
+            controller.resume()
+            deadline = time.time() + 2
+            while not controller.ddcutil.writes and time.time() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(controller.ddcutil.writes, [("10", 40)])
+        finally:
+            controller.stop()
+
+
+class TestRendererHotplug(unittest.TestCase):
+    def test_reopens_only_when_a_connector_comes_up(self):
+        from renderer.main import StateFeed
+        feed = StateFeed("http://127.0.0.1:1")
+        feed._on_hotplug({"changes": [{"name": "card0-HDMI-A-1", "connected": False}], "connected": []})
+        feed._on_hotplug({"changes": [], "connected": ["card0-HDMI-A-2"]})
+        self.assertFalse(feed.take_mode_change())
+        feed._on_hotplug({"changes": [{"name": "card0-HDMI-A-1", "connected": True}], "connected": ["card0-HDMI-A-1"]})
+        self.assertTrue(feed.take_mode_change())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,258 @@
+import dataclasses
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+from hdmi_control import db, files, images, thumbs, tiles
+from hdmi_control.processing import ImageProcessor
+
+
+def png_bytes(color=(255, 0, 0), size=(8, 6)) -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", size, color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def upload(data: bytes, name: str = "a.png") -> FileStorage:
+    return FileStorage(stream=io.BytesIO(data), filename=name)
+
+
+class DataDirTestCase(unittest.TestCase):
+    """Points the database and image directories at a temp DATA_DIR."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.data_dir = self.tmp.name
+        image_dir = os.path.join(self.data_dir, "images")
+        config = dataclasses.replace(db.CONFIG, data_dir=self.data_dir,
+                                     db_path=os.path.join(self.data_dir, "screeny.db"), db_pool=False)
+        for patcher in (
+            mock.patch.object(db, "CONFIG", config),
+            mock.patch.object(images, "IMAGE_DIR", image_dir),
+            mock.patch.object(images, "BLOB_DIR", os.path.join(image_dir, "blobs")),
+            mock.patch.object(thumbs, "THUMB_DIR", os.path.join(image_dir, "thumbs")),
+            mock.patch.object(tiles, "TILE_DIR", os.path.join(image_dir, "tiles")),
+            # Import workers are separate processes that read these.
+            mock.patch.dict(os.environ, {"DATA_DIR": self.data_dir, "DB_PATH": config.db_path}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        db.init_db()
+
+    def blob(self, sha256):
+        return images.get_blob(sha256)
+
+
+class TestBlobRefCounting(DataDirTestCase):
+    def test_duplicate_upload_shares_the_file(self):
+        first = images.add_image(upload(png_bytes()))
+        second = images.add_image(upload(png_bytes(), "copy.png"))
+        self.assertFalse(first["deduplicated"])
+        self.assertTrue(second["deduplicated"])
+        self.assertEqual(first["storage_path"], second["storage_path"])
+        self.assertEqual(self.blob(first["sha256"])["ref_count"], 2)
+        # No temp files are left behind.
+        self.assertEqual([n for n in os.listdir(images.IMAGE_DIR) if n.endswith(".upload")], [])
+
+        images.delete_image(first["id"])
+        self.assertEqual(self.blob(first["sha256"])["ref_count"], 1)
+        self.assertTrue(os.path.exists(second["storage_path"]))
+        images.delete_image(second["id"])
+        self.assertIsNone(self.blob(first["sha256"]))
+        self.assertFalse(os.path.exists(second["storage_path"]))
+
+    def test_lost_file_is_stored_again(self):
+        first = images.add_image(upload(png_bytes(), "a.png"))
+        os.remove(first["storage_path"])
+        second = images.add_image(upload(png_bytes(), "b.bin"))
+        self.assertFalse(second["deduplicated"])
+        self.assertNotEqual(second["storage_path"], first["storage_path"])
+        blob = self.blob(first["sha256"])
+        self.assertEqual(blob["ref_count"], 2)
+        self.assertEqual(blob["storage_path"], second["storage_path"])
+        self.assertTrue(os.path.exists(blob["storage_path"]))
+        self.assertEqual(images.get_image_path(first["id"]), second["storage_path"])
+
+    def test_stored_file_gets_umask_mode(self):
+        # Readable by a proxy running as another user (X-Sendfile).
+        image = images.add_image(upload(png_bytes()))
+        self.assertEqual(os.stat(image["storage_path"]).st_mode & 0o777, 0o666 & ~files.UMASK)
+
+    def test_thumbnail_gets_umask_mode(self):
+        image = images.add_image(upload(png_bytes()))
+        path, _ = thumbs.ensure_thumb(image["sha256"], image["storage_path"], 128)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o666 & ~files.UMASK)
+
+    def test_rejects_non_images(self):
+        with self.assertRaises(ValueError):
+            images.add_image(upload(b"plain text, not an image", "a.txt"))
+        self.assertEqual([n for n in os.listdir(images.IMAGE_DIR) if n.endswith(".upload")], [])
+
+
+class TestImport(DataDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.source = os.path.join(self.data_dir, "import", "set")
+        os.makedirs(os.path.join(self.source, "sub"))
+        self.write("red.png", png_bytes((255, 0, 0)))
+        self.write("sub/red-copy.png", png_bytes((255, 0, 0)))
+        self.write("blue.png", png_bytes((0, 0, 255)))
+        self.write("notes.txt", b"not an image")
+
+    def write(self, name, data):
+        with open(os.path.join(self.source, name), "wb") as f:
+            f.write(data)
+
+    def run_import(self, source=None, **kwargs):
+        return images.import_images(source or self.source, workers=1, **kwargs)
+
+    def leftovers(self):
+        return [n for n in os.listdir(images.IMAGE_DIR) if n.endswith(images.SPOOL_SUFFIX)]
+
+    def test_dedupe_unchanged_and_replace(self):
+        summary = self.run_import()
+        self.assertEqual((summary["scanned"], summary["imported"], summary["deduplicated"], summary["invalid"]), (4, 2, 1, 1))
+        self.assertEqual(summary["errors"][0]["file"], "notes.txt")
+        for item in images.list_images(limit=10)[0]:
+            self.assertEqual(os.stat(images.get_image_path(item["id"])).st_mode & 0o777, 0o666 & ~files.UMASK)
+
+        summary = self.run_import()
+        self.assertEqual((summary["unchanged"], summary["imported"], summary["deleted"]), (3, 0, 0))
+
+        # New content under a known name replaces the old image.
+        self.write("blue.png", png_bytes((0, 255, 0)))
+        summary = self.run_import()
+        self.assertEqual((summary["unchanged"], summary["imported"], summary["deleted"]), (2, 1, 1))
+        items, _ = images.list_images(limit=10)
+        self.assertEqual(len(items), 3)
+
+    def test_mirror_deletes_removed_files(self):
+        self.run_import()
+        os.remove(os.path.join(self.source, "blue.png"))
+        self.assertEqual(self.run_import()["deleted"], 0)
+        summary = self.run_import(mirror=True)
+        self.assertEqual(summary["deleted"], 1)
+        names = sorted(item["original_name"] for item in images.list_images(limit=10)[0])
+        self.assertEqual(names, ["red-copy.png", "red.png"])
+
+    def test_zip(self):
+        archive = os.path.join(self.data_dir, "import", "set.zip")
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("a/red.png", png_bytes((255, 0, 0)))
+            zf.writestr("b.png", png_bytes((0, 0, 255)))
+            zf.writestr("__MACOSX/._b.png", b"resource fork")
+            zf.writestr("a/", b"")
+        summary = self.run_import(archive)
+        self.assertEqual((summary["scanned"], summary["imported"]), (2, 2))
+        self.assertEqual(self.leftovers(), [])
+        self.assertEqual(self.run_import(archive)["unchanged"], 2)
+        # Spooled members are moved into place; they keep a readable mode.
+        for item in images.list_images(limit=10)[0]:
+            path = images.get_image_path(item["id"])
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o666 & ~files.UMASK)
+
+    def test_spooled_members_removed_on_failure(self):
+        def failing_source(source):
+            with open(os.path.join(self.source, "red.png"), "rb") as f:
+                yield "red.png", images._spool(f), True
+            raise OSError("archive truncated")
+
+        with mock.patch.object(images, "_iter_source", failing_source):
+            with self.assertRaises(OSError):
+                self.run_import()
+        self.assertEqual(self.leftovers(), [])
+
+    def test_resolve_source_stays_in_root(self):
+        root = os.path.join(self.data_dir, "import")
+        self.assertEqual(images.resolve_import_source("set", root), os.path.realpath(self.source))
+        os.symlink(self.data_dir, os.path.join(root, "escape"))
+        for bad in ("../screeny.db", "/etc", "escape/screeny.db", "missing", "", None):
+            with self.assertRaises(ValueError):
+                images.resolve_import_source(bad, root)
+
+
+class TestReceive(DataDirTestCase):
+    def setUp(self):
+        super().setUp()
+        images.ensure_dirs()
+
+    def test_chunks_hash_and_head(self):
+        data = os.urandom(images.SNIFF_BYTES * 3 + 5)
+        with mock.patch.object(images, "CHUNK_SIZE", 1000):
+            tmp_path, size, sha256, head = images._receive(io.BytesIO(data))
+        self.addCleanup(os.remove, tmp_path)
+        self.assertEqual(size, len(data))
+        self.assertEqual(sha256, hashlib.sha256(data).hexdigest())
+        self.assertEqual(head, data[:images.SNIFF_BYTES])
+        with open(tmp_path, "rb") as f:
+            self.assertEqual(f.read(), data)
+
+    def test_too_large_removes_temp_file(self):
+        config = dataclasses.replace(images.CONFIG, upload_max_mb=1)
+        with mock.patch.object(images, "CONFIG", config):
+            with self.assertRaisesRegex(ValueError, "too large"):
+                images._receive(io.BytesIO(b"x" * (1024 * 1024 + 1)))
+        self.assertEqual(os.listdir(images.IMAGE_DIR), [])
+
+
+class TestProbeImage(DataDirTestCase):
+    def save(self, image, name, **kwargs):
+        path = os.path.join(self.data_dir, name)
+        image.save(path, **kwargs)
+        return path
+
+    def test_rotated_orientation_swaps_size(self):
+        exif = Image.Exif()
+        exif[images.EXIF_ORIENTATION] = 6
+        path = self.save(Image.new("RGB", (40, 20)), "rotated.jpg", exif=exif)
+        self.assertEqual(images.probe_image(path), (20, 40, 6, 1, None))
+
+    def test_animated_frames_and_duration(self):
+        frames = [Image.new("RGB", (8, 8), color) for color in ((255, 0, 0), (0, 255, 0), (0, 0, 255))]
+        path = self.save(frames[0], "anim.gif", save_all=True, append_images=frames[1:], duration=[100, 200, 300], loop=0)
+        self.assertEqual(images.probe_image(path), (8, 8, 1, 3, 600))
+
+    def test_invalid_image_raises_value_error(self):
+        path = os.path.join(self.data_dir, "broken.png")
+        with open(path, "wb") as f:
+            f.write(png_bytes()[:40])
+        with self.assertRaises(ValueError):
+            images.probe_image(path)
+
+
+class TestImageProcessor(DataDirTestCase):
+    def run_processor(self, image):
+        events = []
+        processor = ImageProcessor(events.append, workers=1)
+        self.addCleanup(processor.shutdown)
+        processor.submit(image["id"], image["sha256"], image["storage_path"], "0").result(timeout=10)
+        self.assertEqual(processor.pending(), 0)
+        return events
+
+    def test_processing_becomes_ready(self):
+        image = images.add_image(upload(png_bytes()))
+        self.assertEqual(image["status"], "processing")
+        events = self.run_processor(image)
+        self.assertTrue(all(event["status"] == "processing" for event in events[:-1]))
+        self.assertEqual(events[-1], {"imageId": image["id"], "stage": "done", "progress": 1.0, "status": "ready"})
+        self.assertEqual(images.get_image(image["id"])["status"], "ready")
+        self.assertTrue(os.listdir(thumbs.THUMB_DIR))
+
+    def test_unreadable_file_becomes_failed(self):
+        image = images.add_image(upload(png_bytes()))
+        with open(image["storage_path"], "wb") as f:
+            f.write(b"truncated")
+        events = self.run_processor(image)
+        self.assertEqual((events[-1]["status"], events[-1]["stage"]), ("failed", "done"))
+        self.assertIn("error", events[-1])
+        self.assertEqual(images.get_image(image["id"])["status"], "failed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from hdmi_control.metrics import Counter, Gauge, Histogram, Registry
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counter_labels(self):
+        counter = Counter("test_total", "Test counter.", ("code",))
+        counter.inc(code="10")
+        counter.inc(2, code="10")
+        counter.inc(code="12")
+        self.assertEqual(counter.value(code="10"), 3)
+        lines = counter.render()
+        self.assertIn('test_total{code="10"} 3', lines)
+        self.assertIn('test_total{code="12"} 1', lines)
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("test_seconds", "Test histogram.", ("op",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value, op="setvcp")
+        lines = histogram.render()
+        self.assertIn('test_seconds_bucket{op="setvcp",le="0.1"} 1', lines)
+        self.assertIn('test_seconds_bucket{op="setvcp",le="1"} 3', lines)
+        self.assertIn('test_seconds_bucket{op="setvcp",le="+Inf"} 4', lines)
+        self.assertIn('test_seconds_count{op="setvcp"} 4', lines)
+        self.assertIn('test_seconds_sum{op="setvcp"} 6.05', lines)
+
+    def test_registry_renders_gauge_function_and_escapes(self):
+        registry = Registry()
+        registry.register(Gauge("test_depth", "Queue depth.", fn=lambda: 7))
+        counter = registry.register(Counter("test_events_total", "Events.", ("event",)))
+        counter.inc(event='a"b')
+        text = registry.render()
+        self.assertIn("# TYPE test_depth gauge\ntest_depth 7\n", text)
+        self.assertIn('test_events_total{event="a\\"b"} 1', text)
+        self.assertIs(registry.register(Counter("test_events_total", "Events.")), counter)
+
+
+class TestRendererTelemetry(unittest.TestCase):
+    def test_unknown_labels_become_other(self):
+        from hdmi_control import app
+        from hdmi_control.metrics import CACHE_REQUESTS, RENDERER_FRAME_SECONDS
+        before = CACHE_REQUESTS.value(cache="renderer", result="other")
+        app._record_telemetry({
+            "spans": [["decode", 1.0, 0.01], ["stage-1", 1.0, 0.01], [["nested"], 1.0, 0.01]],
+            "cache": {"miss": 1, "made-up": 2, ("not", "a", "str"): 1},
+        })
+        self.assertEqual(CACHE_REQUESTS.value(cache="renderer", result="other"), before + 3)
+        stages = {line.split('stage="')[1].split('"')[0] for line in RENDERER_FRAME_SECONDS.render() if "stage=" in line}
+        self.assertLessEqual(stages, app.TELEMETRY_STAGES | {"other"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from renderer import output
+from renderer.output import FramebufferGeometry, FramebufferOutput, parse_geometry
+
+
+def rgb_frame(size, pixel):
+    return size, "RGB", bytes(pixel) * (size[0] * size[1])
+
+
+class TestFramebufferOutput(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "fb0")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def open(self, geometry):
+        fb = FramebufferOutput(self.path, geometry)
+        self.addCleanup(fb.close)
+        return fb
+
+    def read_page(self, geometry, page):
+        with open(self.path, "rb") as f:
+            f.seek(page * geometry.page_bytes)
+            return f.read(geometry.page_bytes)
+
+    def test_parse_geometry(self):
+        g = parse_geometry("1920x1080:16:2")
+        self.assertEqual((g.width, g.height, g.bpp, g.pages, g.stride), (1920, 1080, 16, 2, 3840))
+        self.assertEqual(g.red, (11, 5))
+        with self.assertRaises(ValueError):
+            parse_geometry("1920x1080:8")
+
+    def test_rgb_to_xrgb8888_with_stride(self):
+        geometry = FramebufferGeometry(2, 2, 32, stride=12)
+        fb = self.open(geometry)
+        self.assertEqual(fb.size, (2, 2))
+        fb.show(rgb_frame((2, 2), (10, 20, 30)))
+        page = self.read_page(geometry, 0)
+        # B, G, R, X per pixel; the row padding is left alone.
+        self.assertEqual(page[0:8], bytes([30, 20, 10, 255] * 2))
+        self.assertEqual(page[8:12], bytes(4))
+        self.assertEqual(page[12:20], bytes([30, 20, 10, 255] * 2))
+
+    def test_rgb565(self):
+        geometry = parse_geometry("2x1:16")
+        fb = self.open(geometry)
+        fb.show(rgb_frame((2, 1), (255, 0, 255)))
+        value = int.from_bytes(self.read_page(geometry, 0)[0:2], "little")
+        self.assertEqual(value, 0xF81F)
+
+    def test_page_flip_draws_off_screen(self):
+        geometry = parse_geometry("2x1:32:2")
+        fb = self.open(geometry)
+        self.assertEqual(fb.front, 0)
+        fb.show(rgb_frame((2, 1), (1, 2, 3)))
+        self.assertEqual(fb.front, 1)
+        self.assertEqual(self.read_page(geometry, 1), bytes([3, 2, 1, 255] * 2))
+        fb.show(rgb_frame((2, 1), (4, 5, 6)))
+        self.assertEqual(fb.front, 0)
+        self.assertEqual(self.read_page(geometry, 0), bytes([6, 5, 4, 255] * 2))
+
+    def test_smaller_frame_is_padded_with_black(self):
+        geometry = parse_geometry("2x2:24")
+        fb = self.open(geometry)
+        fb.show(rgb_frame((2, 2), (9, 9, 9)))
+        fb.show(rgb_frame((1, 1), (1, 2, 3)))
+        self.assertEqual(self.read_page(geometry, 0), bytes([3, 2, 1]) + bytes(9))
+
+    def test_pillow_fallback_matches(self):
+        geometry = FramebufferGeometry(3, 2, 32, stride=16)
+        frame = ((3, 2), "RGB", bytes(range(18)))
+        fb = self.open(geometry)
+        fb.show(frame)
+        expected = self.read_page(geometry, 0)
+        with mock.patch.object(output, "np", None):
+            fallback = FramebufferOutput(self.path, geometry)
+            fallback.show(rgb_frame((3, 2), (0, 0, 0)))
+            fallback.show(frame)
+            fallback.close()
+        # Pillow leaves the padding byte at zero; compare the colour bytes.
+        actual = self.read_page(geometry, 0)
+        for offset in range(0, len(actual), 4):
+            self.assertEqual(actual[offset:offset + 3], expected[offset:offset + 3])
+
+    def test_regular_file_needs_geometry(self):
+        open(self.path, "wb").close()
+        with self.assertRaises(ValueError):
+            FramebufferOutput(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import threading
+import time
+import unittest
+from hdmi_control.persist import StatePersister
+
+
+class RecordingWriter:
+    def __init__(self, fail=0):
+        self.fail = fail
+        self.batches = []
+        self.written = threading.Event()
+
+    def __call__(self, values):
+        if self.fail:
+            self.fail -= 1
+            raise OSError("database is locked")
+        self.batches.append(dict(values))
+        self.written.set()
+
+
+class TestStatePersister(unittest.TestCase):
+    def make(self, debounce_ms=100, **kwargs):
+        writer = RecordingWriter(**kwargs)
+        persister = StatePersister(writer, debounce_ms=debounce_ms)
+        self.addCleanup(persister.stop)
+        return persister, writer
+
+    def test_burst_is_written_once_after_debounce(self):
+        persister, writer = self.make()
+        persister.start()
+        started = time.monotonic()
+        for value in range(20):
+            persister.mark("render", {"value": value})
+            persister.mark("active_image_id", {"value": "img"})
+        self.assertTrue(writer.written.wait(2))
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+        time.sleep(0.2)
+        self.assertEqual(writer.batches, [{"render": {"value": 19}, "active_image_id": {"value": "img"}}])
+
+    def test_stop_flushes_pending_values(self):
+        persister, writer = self.make(debounce_ms=10_000)
+        persister.start()
+        persister.mark("render", {"value": 1})
+        persister.stop()
+        self.assertEqual(writer.batches, [{"render": {"value": 1}}])
+
+    def test_failed_write_keeps_newer_values(self):
+        persister, writer = self.make(fail=1)
+        persister.mark("render", {"value": 1})
+        with self.assertRaises(OSError):
+            persister.flush()
+        persister.mark("render", {"value": 2})
+        persister.flush()
+        self.assertEqual(writer.batches, [{"render": {"value": 2}}])
+
+    def test_start_is_idempotent(self):
+        persister, writer = self.make()
+        persister.start()
+        persister.start()
+        persister.mark("playlist", {"value": None})
+        self.assertTrue(writer.written.wait(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
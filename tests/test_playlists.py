@@ -0,0 +1,108 @@
+import threading
+import time
+import unittest
+from hdmi_control.playback import PlaylistPlayer
+from hdmi_control.playlists import normalize_items
+from renderer.main import merge_render, slide_plan
+
+
+def make_playlist(durations, loop=True):
+    return {
+        "id": "pl1",
+        "name": "Lobby",
+        "loop": loop,
+        "items": [{"imageId": f"img{n}", "durationMs": ms, "render": {}} for n, ms in enumerate(durations)],
+    }
+
+
+class TestNormalizeItems(unittest.TestCase):
+    def test_defaults_and_validation(self):
+        items = normalize_items([{"imageId": "a"}, {"imageId": "b", "durationMs": "1500", "render": {"color": {"gamma": 1.2}}}])
+        self.assertEqual(items[0], {"imageId": "a", "durationMs": 10000, "render": {}})
+        self.assertEqual(items[1]["durationMs"], 1500)
+        for bad in ([{"durationMs": 1000}], [{"imageId": "a", "durationMs": 10}], [{"imageId": "a", "render": {"ddc": {}}}], "a"):
+            with self.assertRaises(ValueError):
+                normalize_items(bad)
+
+
+class TestPlaylistPlayer(unittest.TestCase):
+    def setUp(self):
+        self.events = []
+        self.changed = threading.Event()
+
+        def on_change(info):
+            self.events.append((time.time(), info))
+            self.changed.set()
+
+        self.player = PlaylistPlayer(on_change)
+        self.player.start()
+
+    def tearDown(self):
+        self.player.shutdown()
+
+    def test_advances_on_schedule_and_loops(self):
+        self.player.start()
+        info = self.player.play(make_playlist([100, 100]))
+        self.assertEqual(info["imageId"], "img0")
+        self.assertEqual(info["next"]["imageId"], "img1")
+        self.assertAlmostEqual(info["next"]["startsAt"], info["startedAt"] + 0.1, places=6)
+        deadline = time.time() + 2
+        while len(self.events) < 4 and time.time() < deadline:
+            time.sleep(0.01)
+        images = [event[1]["imageId"] for event in self.events[:4]]
+        self.assertEqual(images, ["img0", "img1", "img0", "img1"])
+        # Start times chain exactly, so lateness does not accumulate.
+        starts = [event[1]["startedAt"] for event in self.events[:4]]
+        for a, b in zip(starts, starts[1:]):
+            self.assertAlmostEqual(b - a, 0.1, places=6)
+
+    def test_ends_without_loop(self):
+        self.player.play(make_playlist([100], loop=False))
+        deadline = time.time() + 2
+        while (not self.events or self.events[-1][1]["status"] != "ended") and time.time() < deadline:
+            time.sleep(0.01)
+        last = self.events[-1][1]
+        self.assertEqual(last["status"], "ended")
+        self.assertEqual(last["imageId"], "img0")
+        self.assertIsNone(last["next"])
+
+    def test_pause_holds_and_controls(self):
+        self.player.play(make_playlist([150, 150, 150]))
+        info = self.player.pause()
+        self.assertEqual(info["status"], "paused")
+        self.assertIsNone(info["next"]["startsAt"])
+        time.sleep(0.3)
+        self.assertEqual(self.player.info()["index"], 0)
+        self.assertEqual(self.player.previous()["index"], 2)
+        self.assertEqual(self.player.goto(1)["imageId"], "img1")
+        self.assertEqual(self.player.resume()["status"], "playing")
+        with self.assertRaises(ValueError):
+            self.player.goto(5)
+        self.player.stop()
+        self.assertIsNone(self.events[-1][1])
+        self.assertIsNone(self.player.info())
+
+
+class TestSlidePlan(unittest.TestCase):
+    def test_item_render_overrides_global(self):
+        base = {"color": {"gamma": 1.0, "contrast": 1.0}, "transform": {"mode": "fit"}}
+        merged = merge_render(base, {"color": {"gamma": 2.0}})
+        self.assertEqual(merged["color"], {"gamma": 2.0, "contrast": 1.0})
+        self.assertEqual(base["color"]["gamma"], 1.0)
+
+    def test_upcoming_only_while_playing(self):
+        state = {
+            "activeImageId": "a",
+            "render": {"color": {"gamma": 1.0}},
+            "playlist": {"status": "playing", "render": {}, "next": {"imageId": "b", "render": {"color": {"gamma": 2.0}}, "startsAt": 100.0}},
+        }
+        current, upcoming = slide_plan(state, (1920, 1080))
+        self.assertEqual(current[1], "a")
+        self.assertEqual((upcoming[1], upcoming[2]["color"]["gamma"], upcoming[3]), ("b", 2.0, 100.0))
+        self.assertNotEqual(current[0], upcoming[0])
+        state["playlist"]["status"] = "paused"
+        self.assertIsNone(slide_plan(state, (1920, 1080))[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import threading
+import unittest
+from hdmi_control.ddc.controller import DdcController
+from hdmi_control.profile_apply import ProfileApplies
+from hdmi_control.profiles import compile_profile, vcp_code
+from hdmi_control.state import DdcState
+
+
+class FakeDdcUtil:
+    def __init__(self):
+        self.writes = []
+
+    def set_vcp(self, code, value, target_args):
+        self.writes.append((code, value))
+        return 5
+
+
+class TestCompileProfile(unittest.TestCase):
+    def test_compile(self):
+        compiled = compile_profile("p1", {
+            "activeImageId": "img",
+            "ddc": {"brightness": 70, "contrast": None, "extraVcp": {"0x60": "15", "bad": 1, "dc": 2}},
+            "render": {"color": {"gamma": 1.2}, "ddc": {}},
+        })
+        self.assertEqual(compiled.vcp, {"60": 15, "DC": 2, "10": 70})
+        self.assertEqual(compiled.render, {"color": {"gamma": 1.2}})
+        self.assertEqual(compiled.image_id, "img")
+
+    def test_vcp_code(self):
+        self.assertEqual(vcp_code("0x10"), "10")
+        self.assertEqual(vcp_code(18), "12")
+        with self.assertRaises(ValueError):
+            vcp_code("0x100")
+
+
+class TestSetMany(unittest.TestCase):
+    def test_batch_written_in_one_cycle(self):
+        state = DdcState()
+        state.supported.update(brightness=True, contrast=True)
+        state.values["brightness"]["max"] = 100
+        state.values["contrast"]["max"] = 100
+        controller = DdcController(state, lambda: None)
+        controller.ddcutil = FakeDdcUtil()
+        done = threading.Event()
+        results = {}
+
+        def on_done(batch):
+            results.update(batch)
+            done.set()
+
+        controller.start()
+        try:
+            controller.set_many({"10": 120, "12": 40}, on_done)
+            self.assertTrue(done.wait(2))
+        finally:
+            controller.stop()
+        self.assertEqual(sorted(controller.ddcutil.writes), [("10", 100), ("12", 40)])
+        self.assertTrue(all(result.ok for result in results.values()))
+        self.assertEqual(state.values["brightness"]["cur"], 100)
+
+    def test_empty_batch_completes_immediately(self):
+        controller = DdcController(DdcState(), lambda: None)
+        calls = []
+        controller.set_many({}, calls.append)
+        self.assertEqual(calls, [{}])
+
+
+class TestProfileApplies(unittest.TestCase):
+    def setUp(self):
+        self.finished = []
+        self.applies = ProfileApplies(self.finished.append)
+
+    def test_finishes_when_presented(self):
+        token = self.applies.begin()
+        self.applies.ready(token)
+        self.assertTrue(self.applies.wait_ready(token, 0))
+        self.applies.committed(token, {"profileId": "p1", "started": 0.0})
+        self.assertEqual(self.finished, [])
+        self.applies.presented(token)
+        self.assertEqual(len(self.finished), 1)
+        self.assertTrue(self.finished[0]["presented"])
+        self.assertGreater(self.finished[0]["totalMs"], 0)
+        self.assertNotIn("started", self.finished[0])
+
+    def test_already_on_screen_or_no_renderer(self):
+        token = self.applies.begin()
+        self.applies.presented(token)
+        self.applies.committed(token, {"started": 0.0})
+        self.applies.committed(None, {"started": 0.0})
+        self.assertEqual([t["presented"] for t in self.finished], [True, False])
+        self.assertFalse(self.applies.wait_ready("missing", 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
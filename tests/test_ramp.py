@@ -0,0 +1,137 @@
+import threading
+import time
+import unittest
+from hdmi_control.ddc.controller import DdcController
+from hdmi_control.ddc.ramp import Ramp, plan_ramp, software_level, software_points
+from hdmi_control.state import DdcState
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class SlowDdcUtil:
+    def __init__(self, ms=20):
+        self.ms = ms
+        self.writes = []
+
+    def set_vcp(self, code, value, target_args):
+        time.sleep(self.ms / 1000.0)
+        self.writes.append((code, value))
+        return self.ms
+
+
+class TestPlanRamp(unittest.TestCase):
+    def test_spacing_follows_latency(self):
+        plan = plan_ramp(0, 100, 2000, latency_ms=100)
+        # 100 ms per write plus headroom leaves room for 16 writes in 2 s.
+        self.assertEqual(len(plan), 16)
+        self.assertEqual(plan[-1], (2000, 100))
+        gaps = [b[0] - a[0] for a, b in zip(plan, plan[1:])]
+        self.assertTrue(all(gap >= 125 for gap in gaps))
+        # A second ramp sharing the bus halves the rate.
+        self.assertEqual(len(plan_ramp(0, 100, 2000, latency_ms=100, bus_share=2)), 8)
+
+    def test_never_more_writes_than_values(self):
+        plan = plan_ramp(50, 45, 5000, latency_ms=10, curve="ease")
+        self.assertEqual([value for _, value in plan], [49, 48, 47, 46, 45])
+        self.assertEqual(plan_ramp(30, 30, 1000, 50), [])
+        self.assertEqual(plan_ramp(30, 10, 0, 50), [(0.0, 10)])
+        with self.assertRaises(ValueError):
+            plan_ramp(0, 10, 1000, 50, curve="bounce")
+
+    def test_due_skips_missed_steps(self):
+        ramp = Ramp("10", 0, 4, 400, "linear", started=100.0, started_at=0.0,
+                    steps=plan_ramp(0, 4, 400, latency_ms=50))
+        self.assertIsNone(ramp.due(100.05))
+        self.assertEqual(ramp.due(100.35), 3)
+        self.assertAlmostEqual(ramp.next_in(100.35), 0.05)
+        self.assertEqual(ramp.due(101.0), 4)
+        self.assertTrue(ramp.finished)
+        self.assertEqual(ramp.last, 4)
+
+    def test_software_points(self):
+        points = software_points(1.0, 0.5, 1000, "linear")
+        self.assertEqual(points[0], [0.0, 1.0])
+        self.assertEqual(points[-1], [1000.0, 0.5])
+        self.assertAlmostEqual(software_level(points, 500), 0.75)
+        self.assertEqual(software_level(points, 5000), 0.5)
+
+
+class TestControllerRamp(unittest.TestCase):
+    def setUp(self):
+        self.state = DdcState()
+        self.state.supported.update(brightness=True, contrast=True)
+        self.state.values["brightness"].update(cur=10, max=100)
+        self.controller = DdcController(self.state, lambda: None)
+        self.controller.ddcutil = SlowDdcUtil()
+        self.events = []
+        self.ended = threading.Event()
+        self.controller.set_on_ramp(self._on_ramp)
+
+    def _on_ramp(self, info):
+        self.events.append(info)
+        self.ended.set()
+
+    def test_ramp_writes_in_order(self):
+        self.controller.start()
+        try:
+            info = self.controller.ramp("10", 20, 300)
+            self.assertEqual(info["status"], "running")
+            self.assertTrue(self.ended.wait(2))
+        finally:
+            self.controller.stop()
+        values = [value for _, value in self.controller.ddcutil.writes]
+        self.assertEqual(values, sorted(values))
+        self.assertEqual(values[-1], 20)
+        self.assertEqual(self.events[-1]["status"], "done")
+        self.assertEqual(self.state.values["brightness"]["cur"], 20)
+
+    def test_interactive_write_cancels(self):
+        self.controller.start()
+        try:
+            self.controller.ramp("10", 90, 2000)
+            time.sleep(0.3)
+            self.controller.set_brightness(5)
+            self.assertTrue(self.ended.wait(1))
+            time.sleep(0.3)
+        finally:
+            self.controller.stop()
+        self.assertEqual(self.events[0]["status"], "cancelled")
+        self.assertEqual(self.controller.ddcutil.writes[-1], ("10", 5))
+        self.assertEqual(self.controller.ramps(), [])
+
+    def test_rejects_unsupported(self):
+        with self.assertRaises(ValueError):
+            self.controller.ramp("12", 50, 1000)
+        with self.assertRaises(ValueError):
+            self.controller.ramp("60", 1, 1000)
+
+
+@unittest.skipIf(np is None, "needs numpy")
+class TestDimmedOutput(unittest.TestCase):
+    def test_dims_frames(self):
+        from renderer.output import DimmedOutput
+
+        class Sink:
+            size = (2, 1)
+            shown = None
+
+            def show(self, frame):
+                self.shown = frame
+
+        sink = Sink()
+        output = DimmedOutput(sink)
+        frame = ((2, 1), "RGB", bytes([200, 100, 0, 255, 255, 255]))
+        output.show(frame)
+        self.assertIs(sink.shown, frame)
+        output.configure({"render": {"output": {"dim": 0.5}}})
+        self.assertTrue(output.stale(time.time()))
+        output.show(output.last)
+        self.assertEqual(bytes(sink.shown[2]), bytes([100, 50, 0, 127, 127, 127]))
+        self.assertFalse(output.stale(time.time()))
+
+
+if __name__ == "__main__":
+    unittest.main()
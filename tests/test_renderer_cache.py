@@ -0,0 +1,137 @@
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from PIL import Image
+from renderer.diskcache import DiskBudget
+from renderer.main import ImageCache
+from renderer.tiles import TileCache
+
+
+class FakeServer:
+    """Serves `bodies[path] = (etag, bytes)`; `truncate` cuts the next body short."""
+
+    def __init__(self):
+        self.bodies: dict[str, tuple[str, bytes]] = {}
+        self.requests: list[dict] = []
+        self.truncate = False
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(dict(self.headers))
+                etag, body = server.bodies[self.path]
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if server.truncate:
+                    server.truncate = False
+                    self.wfile.write(body[: len(body) // 2])
+                    self.close_connection = True
+                    return
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class TestImageCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.server = FakeServer()
+        self.addCleanup(self.server.close)
+
+    def test_etag_only_replaced_after_complete_download(self):
+        cache = ImageCache(self.tmp.name, memory_items=0)
+        self.server.bodies["/a"] = ("v1", b"old" * 100)
+        self.assertEqual(cache._fetch("a", self.server.url + "/a"), b"old" * 100)
+
+        self.server.bodies["/a"] = ("v2", b"new" * 100)
+        self.server.truncate = True
+        # The download fails; the old copy is used and keeps its own ETag.
+        self.assertEqual(cache._fetch("a", self.server.url + "/a"), b"old" * 100)
+        with open(os.path.join(self.tmp.name, "a.etag")) as f:
+            self.assertEqual(f.read(), "v1")
+        self.assertEqual(cache._fetch("a", self.server.url + "/a"), b"new" * 100)
+        self.assertEqual(self.server.requests[-1].get("If-None-Match"), "v1")
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "a.part.etag")))
+        self.assertEqual(cache._fetch("a", self.server.url + "/a"), b"new" * 100)
+        self.assertEqual(cache.take_counts(), {"miss": 2, "offline": 1, "revalidated": 1})
+
+    def test_evicts_least_recently_used(self):
+        cache = ImageCache(self.tmp.name, memory_items=0, max_bytes=2500)
+        os.makedirs(os.path.join(self.tmp.name, "tiles"))
+        with open(os.path.join(self.tmp.name, "tiles", "big"), "wb") as f:
+            f.write(b"x" * 10000)
+        for name in ("a", "b", "c"):
+            self.server.bodies["/" + name] = (name, name.encode() * 1000)
+        cache.get("a", self.server.url + "/a")
+        cache.get("b", self.server.url + "/b")
+        # Using "a" again makes "b" the least recently used.
+        os.utime(os.path.join(self.tmp.name, "b.bin"), (time.time() - 60, time.time() - 60))
+        cache.get("a", self.server.url + "/a")
+        cache.get("c", self.server.url + "/c")
+        names = sorted(os.listdir(self.tmp.name))
+        self.assertEqual(names, ["a.bin", "a.etag", "c.bin", "c.etag", "tiles"])
+        self.assertEqual(cache.budget.evicted, 1)
+
+
+class TestTileCacheDisk(unittest.TestCase):
+    def test_disk_tiles_evicted_oldest_first(self):
+        server = FakeServer()
+        self.addCleanup(server.close)
+        buf = io.BytesIO()
+        Image.new("RGB", (16, 16), (0, 128, 255)).save(buf, format="JPEG")
+        for image_id in ("a", "b"):
+            for col in range(2):
+                server.bodies[f"/api/images/{image_id}/tiles/0/{col}_0.jpg"] = ("t", buf.getvalue())
+        with tempfile.TemporaryDirectory() as root:
+            cache = TileCache(server.url, root, max_bytes=0, workers=2, disk_bytes=3 * len(buf.getvalue()))
+            self.addCleanup(cache._executor.shutdown)
+            self.assertEqual(len(cache.tiles("a", 0, [(0, 0), (1, 0)])), 2)
+            old = time.time() - 60
+            os.utime(cache._path("a", 0, 1, 0), (old, old))
+            # A disk hit on (0, 0) marks it as recently used.
+            cache._tiles.clear()
+            self.assertEqual(len(cache.tiles("a", 0, [(0, 0)])), 1)
+            self.assertEqual(len(cache.tiles("b", 0, [(0, 0), (1, 0)])), 2)
+            self.assertEqual(cache.take_counts(), {"tile_miss": 4, "tile_disk": 1})
+            self.assertEqual(sorted(os.listdir(os.path.join(root, "tiles", "a", "0"))), ["0_0.jpg"])
+            self.assertEqual(sorted(os.listdir(os.path.join(root, "tiles", "b", "0"))), ["0_0.jpg", "1_0.jpg"])
+            self.assertEqual(cache.disk.evicted, 1)
+
+
+class TestDiskBudget(unittest.TestCase):
+    def test_recursive_evicts_and_prunes(self):
+        with tempfile.TemporaryDirectory() as root:
+            budget = DiskBudget(root, max_bytes=150)
+            now = time.time()
+            for n in range(3):
+                path = os.path.join(root, f"img{n}", "0", "0_0.jpg")
+                os.makedirs(os.path.dirname(path))
+                with open(path, "wb") as f:
+                    f.write(b"t" * 100)
+                os.utime(path, (now - 100 + n, now - 100 + n))
+            budget.added(0, keep=[os.path.join(root, "img0", "0", "0_0.jpg")])
+            self.assertEqual(sorted(os.listdir(root)), ["img0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
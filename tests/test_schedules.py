@@ -0,0 +1,112 @@
+import threading
+import time
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from hdmi_control.scheduler import ProfileScheduler
+from hdmi_control.schedules import next_fire, normalize_rule, parse_cron, sun_times
+
+
+def local(*args) -> datetime:
+    return datetime(*args).astimezone()
+
+
+class TestRules(unittest.TestCase):
+    def test_parse_cron(self):
+        minutes, hours, days, months, weekdays = parse_cron("*/15 9-17 1,15 * 5-7")
+        self.assertEqual(sorted(minutes), [0, 15, 30, 45])
+        self.assertEqual(sorted(hours), list(range(9, 18)))
+        self.assertEqual(sorted(weekdays), [0, 5, 6])
+        for bad in ("* * * *", "60 * * * *", "* * 0 * *", "*/0 * * * *", "a * * * *"):
+            with self.assertRaises(ValueError):
+                parse_cron(bad)
+
+    def test_normalize_rule(self):
+        self.assertEqual(normalize_rule({"type": "cron", "expr": " 0  22 * * * "}), {"type": "cron", "expr": "0 22 * * *"})
+        self.assertEqual(normalize_rule({"type": "sun", "event": "sunset"}), {"type": "sun", "event": "sunset", "offsetMin": 0})
+        for bad in ({"type": "sun", "event": "noon"}, {"type": "sun", "event": "sunset", "offsetMin": 900}, {"type": "at"}, []):
+            with self.assertRaises(ValueError):
+                normalize_rule(bad)
+
+    def test_next_cron(self):
+        rule = {"type": "cron", "expr": "0 22 * * *"}
+        self.assertEqual(next_fire(rule, local(2024, 3, 30, 21, 59, 30)), local(2024, 3, 30, 22, 0))
+        self.assertEqual(next_fire(rule, local(2024, 3, 30, 22, 0)), local(2024, 3, 31, 22, 0))
+        # 2024-03-30 is a Saturday; the next weekday slot is Monday 09:00.
+        weekdays = {"type": "cron", "expr": "*/15 9-17 * * 1-5"}
+        self.assertEqual(next_fire(weekdays, local(2024, 3, 30, 12, 0)), local(2024, 4, 1, 9, 0))
+        leap = {"type": "cron", "expr": "0 0 29 2 *"}
+        self.assertEqual(next_fire(leap, local(2024, 3, 1)), local(2028, 2, 29))
+
+    def test_sun_times(self):
+        # London at the June solstice: about 03:43 and 20:21 UTC.
+        sunrise, sunset = sun_times(date(2024, 6, 21), 51.5, -0.12)
+        self.assertLess(abs(sunrise - datetime(2024, 6, 21, 3, 43, tzinfo=timezone.utc)), timedelta(minutes=3))
+        self.assertLess(abs(sunset - datetime(2024, 6, 21, 20, 21, tzinfo=timezone.utc)), timedelta(minutes=3))
+        self.assertIsNone(sun_times(date(2024, 6, 21), 78.0, 15.0))
+
+    def test_next_sun(self):
+        rule = {"type": "sun", "event": "sunset", "offsetMin": -30}
+        after = datetime(2024, 6, 21, 12, 0, tzinfo=timezone.utc)
+        fire = next_fire(rule, after, 51.5, -0.12)
+        self.assertLess(abs(fire - datetime(2024, 6, 21, 19, 51, tzinfo=timezone.utc)), timedelta(minutes=3))
+        self.assertGreater(next_fire(rule, fire, 51.5, -0.12), fire + timedelta(hours=23))
+        with self.assertRaises(ValueError):
+            next_fire(rule, after)
+
+
+class TestProfileScheduler(unittest.TestCase):
+    def test_warms_then_fires_on_time(self):
+        events = []
+        fired = threading.Event()
+        start = time.time()
+        fire_at = start + 0.4
+
+        def stub_next_fire(rule, after):
+            at = fire_at if after.timestamp() < fire_at else fire_at + 3600
+            return datetime.fromtimestamp(at).astimezone()
+
+        def on_fire(schedule):
+            events.append(("fire", schedule["id"], time.time()))
+            fired.set()
+
+        scheduler = ProfileScheduler(lambda schedule: events.append(("warm", schedule["id"], time.time())), on_fire,
+                                     lead=0.2, next_fire=stub_next_fire)
+        scheduler.start()
+        try:
+            scheduler.reload([{"id": "s1", "rule": {}, "enabled": True}, {"id": "s2", "rule": {}, "enabled": False}])
+            self.assertEqual(list(scheduler.upcoming()), ["s1"])
+            self.assertTrue(fired.wait(2))
+        finally:
+            scheduler.shutdown()
+        self.assertEqual([(kind, sid) for kind, sid, _ in events], [("warm", "s1"), ("fire", "s1")])
+        warm_at, fired_at = events[0][2], events[1][2]
+        self.assertAlmostEqual(warm_at, fire_at - 0.2, delta=0.1)
+        self.assertAlmostEqual(fired_at, fire_at, delta=0.1)
+        self.assertAlmostEqual(scheduler.upcoming()["s1"], fire_at + 3600, delta=0.001)
+
+    def test_failing_callback_keeps_worker_alive(self):
+        fires = []
+        second = threading.Event()
+
+        def every_200ms(rule, after):
+            return datetime.fromtimestamp((int(after.timestamp() * 5) + 1) / 5).astimezone()
+
+        def on_fire(schedule):
+            fires.append(schedule["id"])
+            if len(fires) == 1:
+                raise RuntimeError("database is locked")
+            second.set()
+
+        scheduler = ProfileScheduler(lambda schedule: None, on_fire, lead=0.0, next_fire=every_200ms)
+        scheduler.start()
+        scheduler.start()
+        try:
+            with self.assertLogs("hdmi_control.scheduler", "ERROR"):
+                scheduler.reload([{"id": "s1", "rule": {}, "enabled": True}])
+                self.assertTrue(second.wait(2))
+        finally:
+            scheduler.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
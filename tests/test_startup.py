@@ -0,0 +1,51 @@
+import threading
+import time
+import unittest
+from hdmi_control.startup import Startup, process_age
+
+
+class TestStartup(unittest.TestCase):
+    def test_chains_run_in_parallel_and_in_order(self):
+        startup = Startup()
+        order = []
+        ready = threading.Event()
+
+        def step(name, seconds=0.0):
+            def run():
+                time.sleep(seconds)
+                order.append(name)
+            return run
+
+        def fail():
+            raise RuntimeError("no bus")
+
+        started = time.perf_counter()
+        startup.run_background([
+            [("a1", step("a1", 0.2)), ("a2", fail), ("a3", step("a3"))],
+            [("b1", step("b1", 0.2))],
+        ], ready.set)
+        self.assertEqual(startup.info()["status"], "initializing")
+        self.assertTrue(ready.wait(2))
+        # The two chains overlapped rather than running one after the other.
+        self.assertLess(time.perf_counter() - started, 0.35)
+        self.assertLess(order.index("a1"), order.index("a3"))
+        info = startup.info()
+        self.assertEqual(info["status"], "ready")
+        self.assertEqual(info["errors"], {"a2": "no bus"})
+        self.assertGreaterEqual(info["phases"]["a1"], 200)
+        self.assertIsNotNone(info["readyMs"])
+
+    def test_no_chains_is_ready(self):
+        startup = Startup()
+        calls = []
+        startup.run_background([], lambda: calls.append(True))
+        self.assertEqual(calls, [True])
+        with startup.phase("db"):
+            pass
+        startup.mark("serving")
+        self.assertEqual(sorted(startup.info()["phases"]), ["db", "serving"])
+        self.assertGreaterEqual(process_age(), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
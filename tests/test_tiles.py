@@ -0,0 +1,180 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from PIL import Image, ImageChops, ImageOps, ImageStat
+from hdmi_control import files, tiles as server_tiles
+from renderer.main import FramePreparer, Telemetry, apply_transform, render_tiled
+
+
+def make_source(path, size=(2400, 1400)):
+    r = Image.linear_gradient("L").resize(size)
+    g = Image.linear_gradient("L").rotate(90).resize(size)
+    b = Image.radial_gradient("L").resize(size)
+    Image.merge("RGB", (r, g, b)).save(path, format="PNG")
+
+
+class DiskTiles:
+    """Stands in for the renderer's TileCache, reading the server's tile tree."""
+
+    def __init__(self, key):
+        self.key = key
+        self.requests = []
+
+    def tiles(self, image_id, level, positions):
+        self.requests.append((level, list(positions)))
+        found = {}
+        for col, row in positions:
+            with Image.open(server_tiles.tile_path(self.key, level, col, row)) as tile:
+                found[(col, row)] = tile.convert("RGB")
+        return found
+
+
+class PendingTiles(DiskTiles):
+    """A TileCache whose pyramid is still being cut until `ready` is set."""
+
+    def __init__(self, key, manifest):
+        super().__init__(key)
+        self.ready = False
+        self._manifest = manifest
+
+    def manifest(self, image_id):
+        return self._manifest if self.ready else None
+
+    def pending(self, image_id):
+        return not self.ready
+
+
+class ThumbOnlyCache:
+    def __init__(self, thumb):
+        self.thumb = thumb
+        self.urls = []
+
+    def get(self, key, url):
+        self.urls.append(url)
+        return self.thumb if "/thumb" in url else None
+
+
+class TestPyramid(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(server_tiles, "TILE_DIR", os.path.join(self.tmp.name, "tiles"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        self.source = os.path.join(self.tmp.name, "big.png")
+        make_source(self.source)
+        self.manifest = server_tiles.build_pyramid("abc", self.source)
+
+    def test_levels_halve_until_one_tile(self):
+        levels = self.manifest["levels"]
+        self.assertEqual((self.manifest["width"], self.manifest["height"]), (2400, 1400))
+        self.assertEqual([(l["width"], l["height"], l["cols"], l["rows"]) for l in levels], [
+            (2400, 1400, 5, 3), (1200, 700, 3, 2), (600, 350, 2, 1), (300, 175, 1, 1),
+        ])
+        self.assertEqual(server_tiles.load_manifest("abc"), self.manifest)
+        with Image.open(server_tiles.tile_path("abc", 0, 4, 2)) as tile:
+            self.assertEqual(tile.size, (2400 - 4 * 512, 1400 - 2 * 512))
+        mode = os.stat(server_tiles.tile_dir("abc")).st_mode & 0o777
+        self.assertEqual(mode, 0o777 & ~files.UMASK)
+        server_tiles.delete_tiles("abc")
+        self.assertIsNone(server_tiles.load_manifest("abc"))
+
+    def assertClose(self, a, b, tolerance=3.0):
+        diff = ImageStat.Stat(ImageChops.difference(a, b)).mean
+        self.assertLess(max(diff), tolerance, diff)
+
+    def test_fit_uses_coarse_level(self):
+        source = Image.open(self.source).convert("RGB")
+        render = {"transform": {"mode": "fit"}, "output": {"interpolation": "linear"}}
+        disk = DiskTiles("abc")
+        frame = render_tiled(self.manifest, disk, "img", render, (640, 360), None)
+        self.assertEqual(frame.size, (640, 360))
+        self.assertEqual(disk.requests[0][0], 1)
+        self.assertClose(frame, apply_transform(source, render["transform"], (640, 360), "linear"))
+
+    def test_zoom_loads_only_visible_tiles(self):
+        source = Image.open(self.source).convert("RGB")
+        transform = {"mode": "custom", "scale": 2.0, "pan": {"x": 0.2, "y": -0.1}}
+        render = {"transform": transform, "output": {"interpolation": "linear"}}
+        disk = DiskTiles("abc")
+        frame = render_tiled(self.manifest, disk, "img", render, (640, 360), None)
+        level, positions = disk.requests[0]
+        self.assertEqual(level, 0)
+        self.assertLessEqual(len(positions), 4)
+        self.assertClose(frame, apply_transform(source, transform, (640, 360), "linear"))
+
+    def test_pending_pyramid_shows_thumbnail_until_ready(self):
+        thumb = os.path.join(self.tmp.name, "thumb.jpg")
+        Image.open(self.source).reduce(5).convert("RGB").save(thumb, format="JPEG")
+        with open(thumb, "rb") as f:
+            cache = ThumbOnlyCache(f.read())
+        tiles = PendingTiles("abc", self.manifest)
+        preparer = FramePreparer(cache, "http://server", Telemetry(60), tiles=tiles)
+        preparer.PENDING_RECHECK_S = 0.0
+        render = {"transform": {"mode": "fit"}, "output": {"interpolation": "linear"}}
+        key = ("slide", "x", (320, 180))
+        stand_in = preparer.take(key, "img", render)
+        self.assertEqual(stand_in[0], (320, 180))
+        self.assertEqual(cache.urls, ["http://server/api/images/img/thumb?size=512"])
+        self.assertEqual(tiles.requests, [])
+
+        self.assertFalse(preparer.upgraded(key))
+        tiles.ready = True
+        deadline = time.time() + 5
+        while not preparer.upgraded(key):
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.01)
+        self.assertTrue(tiles.requests)
+        # The original was never downloaded.
+        self.assertTrue(all("/thumb" in url for url in cache.urls))
+        self.assertNotEqual(preparer.take(key, "img", render)[2], stand_in[2])
+        self.assertFalse(preparer.upgraded(key))
+
+
+class TestOrientedPyramid(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        patcher = mock.patch.object(server_tiles, "TILE_DIR", os.path.join(self.tmp.name, "tiles"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmp.cleanup)
+        png = os.path.join(self.tmp.name, "src.png")
+        make_source(png, size=(1300, 700))
+        self.pixels = Image.open(png).convert("RGB")
+
+    def mosaic(self, key, level):
+        info = server_tiles.load_manifest(key)["levels"][level]
+        canvas = Image.new("RGB", (info["width"], info["height"]))
+        size = server_tiles.CONFIG.tile_size
+        for row in range(info["rows"]):
+            for col in range(info["cols"]):
+                with Image.open(server_tiles.tile_path(key, level, col, row)) as tile:
+                    canvas.paste(tile, (col * size, row * size))
+        return canvas
+
+    def assertClose(self, a, b, tolerance=4.0):
+        self.assertEqual(a.size, b.size)
+        diff = ImageStat.Stat(ImageChops.difference(a, b)).mean
+        self.assertLess(max(diff), tolerance, diff)
+
+    def test_orientation_applied_per_tile(self):
+        for orientation in range(1, 9):
+            with self.subTest(orientation=orientation):
+                path = os.path.join(self.tmp.name, f"o{orientation}.jpg")
+                exif = Image.Exif()
+                exif[server_tiles.EXIF_ORIENTATION] = orientation
+                self.pixels.save(path, format="JPEG", quality=95, exif=exif)
+                key = f"o{orientation}"
+                manifest = server_tiles.build_pyramid(key, path)
+                with Image.open(path) as image:
+                    expected = ImageOps.exif_transpose(image).convert("RGB")
+                self.assertEqual((manifest["width"], manifest["height"]), expected.size)
+                self.assertClose(self.mosaic(key, 0), expected)
+                # Lower levels are decoded at reduced scale by libjpeg.
+                self.assertClose(self.mosaic(key, 1), expected.reduce(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import time
+import unittest
+from hdmi_control.trace import SamplingProfiler, Tracer
+
+
+class TestTracer(unittest.TestCase):
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer(capacity=10, slow_ms=0, enabled=False)
+        with tracer.span("noop"):
+            pass
+        self.assertEqual(tracer.chrome_trace()["traceEvents"], [])
+
+    def test_ring_buffer_keeps_latest_spans(self):
+        tracer = Tracer(capacity=3, slow_ms=0, enabled=True)
+        for i in range(5):
+            with tracer.span(f"op{i}", "ddc", code="10"):
+                pass
+        events = tracer.chrome_trace()["traceEvents"]
+        self.assertEqual([e["name"] for e in events], ["op2", "op3", "op4"])
+        self.assertEqual(events[0]["ph"], "X")
+        self.assertEqual(events[0]["cat"], "ddc")
+        self.assertEqual(events[0]["args"], {"code": "10"})
+        self.assertGreaterEqual(events[0]["dur"], 1)
+
+    def test_slow_ops_logged_without_tracing(self):
+        tracer = Tracer(capacity=10, slow_ms=5, enabled=False)
+        with self.assertLogs("hdmi_control.trace", level="WARNING"):
+            with tracer.span("slow"):
+                time.sleep(0.01)
+        with tracer.span("fast"):
+            pass
+        self.assertEqual([op["name"] for op in tracer.slow_ops()], ["slow"])
+        self.assertEqual(tracer.chrome_trace()["traceEvents"], [])
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def test_fixed_window(self):
+        profiler = SamplingProfiler()
+        self.assertTrue(profiler.start(0.2, 5))
+        self.assertFalse(profiler.start(0.2, 5))
+        time.sleep(0.4)
+        result = profiler.result()
+        self.assertFalse(result["running"])
+        self.assertGreater(result["samples"], 0)
+        self.assertTrue(any("test_trace.py:test_fixed_window" in s["stack"] for s in result["stacks"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from PIL import Image, ImageChops, ImageStat
+from renderer.main import apply_transform, apply_transform_stepwise, compile_transform
+
+SCREEN = (320, 240)
+
+
+def sample_image(size=(400, 250)):
+    r = Image.linear_gradient("L").resize(size)
+    g = Image.linear_gradient("L").rotate(90).resize(size)
+    b = Image.radial_gradient("L").resize(size)
+    return Image.merge("RGB", (r, g, b))
+
+
+def reference(image, transform):
+    out = apply_transform_stepwise(image, transform, SCREEN, "linear")
+    frame = Image.new("RGB", SCREEN)
+    frame.paste(out, ((SCREEN[0] - out.width) // 2, (SCREEN[1] - out.height) // 2))
+    return frame
+
+
+def mean_difference(a, b):
+    return max(ImageStat.Stat(ImageChops.difference(a, b)).mean)
+
+
+class TestSinglePassTransform(unittest.TestCase):
+    def setUp(self):
+        self.image = sample_image()
+
+    def test_matches_stepwise_pipeline(self):
+        cases = [
+            ({"mode": "fit"}, 0.5),
+            ({"mode": "fill"}, 0.5),
+            ({"mode": "stretch"}, 0.5),
+            ({"mode": "custom", "scale": 0.5}, 0.5),
+            ({"mode": "fit", "crop": {"x": 0.2, "y": 0.1, "w": 0.5, "h": 0.6}}, 0.5),
+            ({"mode": "fill", "rotationDeg": 180, "flipV": True}, 0.5),
+            ({"mode": "fit", "rotationDeg": 90, "flipH": True}, 0.5),
+            # The old pipeline rotated with nearest neighbour; only edges differ.
+            ({"mode": "fit", "rotationDeg": 20}, 2.0),
+            ({"mode": "fill", "rotationDeg": 30, "crop": {"x": 0.2, "y": 0.2, "w": 0.5, "h": 0.5}}, 2.0),
+        ]
+        for transform, tolerance in cases:
+            with self.subTest(transform=transform):
+                out = apply_transform(self.image, transform, SCREEN, "linear")
+                self.assertEqual(out.size, SCREEN)
+                self.assertLessEqual(mean_difference(out, reference(self.image, transform)), tolerance)
+
+    def test_background_and_pan(self):
+        out = apply_transform(self.image, {"mode": "custom", "scale": 0.25, "pan": {"x": 0.25, "y": 0.0}}, SCREEN,
+                              "linear", background=(10, 20, 30))
+        self.assertEqual(out.getpixel((0, 0)), (10, 20, 30))
+        # 100x62 image centred, then moved right by a quarter of the screen.
+        self.assertEqual(out.getpixel((SCREEN[0] // 2 - 50 + 80 - 1, SCREEN[1] // 2)), (10, 20, 30))
+        self.assertNotEqual(out.getpixel((SCREEN[0] // 2 - 50 + 80 + 2, SCREEN[1] // 2)), (10, 20, 30))
+
+    def test_compile_right_angle_matrix(self):
+        compiled = compile_transform({"mode": "one_to_one", "rotationDeg": 90}, (400, 250), SCREEN)
+        a, b, c, d, e, f = compiled["matrix"]
+        # Counter-clockwise 90: source x runs up the screen, source y runs right.
+        self.assertEqual((a, b, d, e), (0.0, 1.0, -1.0, 0.0))
+        self.assertEqual(compiled["rect"], (35.0, -80.0, 285.0, 320.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+from renderer import transitions
+
+
+@unittest.skipUnless(transitions.available(), "numpy not installed")
+class TestTransitions(unittest.TestCase):
+    size = (8, 2)
+
+    def frames(self):
+        w, h = self.size
+        return bytes([0] * (w * h * 3)), bytes([200] * (w * h * 3))
+
+    def run_at(self, kind, t):
+        buffers = transitions.TransitionBuffers(self.size)
+        before, after = self.frames()
+        running = transitions.Transition(buffers, kind, before, after, 1.0, started=0.0).frame(t)
+        return running, buffers.output
+
+    def test_crossfade_midpoint(self):
+        running, out = self.run_at("crossfade", 0.5)
+        self.assertTrue(running)
+        self.assertTrue((out == 100).all())
+
+    def test_slide_and_wipe_split(self):
+        _, out = self.run_at("wipe", 0.25)
+        self.assertEqual(out[0, :, 0].tolist(), [200, 200, 0, 0, 0, 0, 0, 0])
+        _, out = self.run_at("slide", 0.25)
+        self.assertEqual(out[0, :, 0].tolist(), [0, 0, 0, 0, 0, 0, 200, 200])
+
+    def test_finishes_on_time_with_new_frame(self):
+        for kind in ("crossfade", "slide", "wipe", "cut"):
+            running, out = self.run_at(kind, 1.5 if kind != "cut" else 0.0)
+            self.assertFalse(running)
+            self.assertTrue((out == 200).all())
+
+    def test_reuses_output_buffer(self):
+        buffers = transitions.TransitionBuffers(self.size)
+        before, after = self.frames()
+        output = buffers.output
+        transition = transitions.Transition(buffers, "crossfade", before, after, 1.0, started=0.0)
+        for t in (0.1, 0.5, 0.9, 1.0):
+            transition.frame(t)
+        self.assertIs(buffers.output, output)
+
+
+if __name__ == "__main__":
+    unittest.main()